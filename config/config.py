@@ -8,11 +8,109 @@ class Config:
     # OpenAI API配置
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.gptsapi.net/v1")
     
-    # 模型参数
+    # HTTP连接池配置，所有OpenAI客户端共享
+    OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 100))
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 20))
+    OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 30.0))
+    
+    # 模型参数（README生成使用OPENAI_MODEL及以下参数）
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", 4096))
     TEMPERATURE = float(os.getenv("TEMPERATURE", 0.7))
     
+    # 文件分析的模型参数：调用量大且只需提取结构化JSON，可使用更便宜的模型，留空表示使用OPENAI_MODEL
+    ANALYSIS_MODEL = os.getenv("ANALYSIS_MODEL", "")
+    ANALYSIS_MAX_TOKENS = int(os.getenv("ANALYSIS_MAX_TOKENS", 2048))
+    ANALYSIS_TEMPERATURE = float(os.getenv("ANALYSIS_TEMPERATURE", 0.3))
+    # 文件分析模型返回的JSON无法解析时，改用OPENAI_MODEL重新分析
+    ANALYSIS_ESCALATE_ON_PARSE_ERROR = os.getenv("ANALYSIS_ESCALATE_ON_PARSE_ERROR", "true").lower() in ("1", "true", "yes")
+    
+    # 请求重试与熔断配置
+    OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", 120))  # 单次请求超时秒数
+    OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", 4))
+    OPENAI_RETRY_BASE_DELAY = float(os.getenv("OPENAI_RETRY_BASE_DELAY", 1.0))
+    OPENAI_RETRY_MAX_DELAY = float(os.getenv("OPENAI_RETRY_MAX_DELAY", 60.0))
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))  # 连续失败多少次后熔断
+    CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", 30.0))  # 熔断持续秒数
+    
+    # 进程内共享的TPM/RPM限流配置（按模型），0表示不限制
+    RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", 0))
+    RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", 0))
+    
+    # 并发配置
+    ANALYSIS_MAX_WORKERS = int(os.getenv("ANALYSIS_MAX_WORKERS", 8))  # 文件分析线程数，即并发请求的硬上限，1表示串行
+    
+    # Python文件本地静态提取：组件和依赖由ast计算，模型只需给出用途和逻辑
+    ANALYSIS_LOCAL_EXTRACTION = os.getenv("ANALYSIS_LOCAL_EXTRACTION", "true").lower() in ("1", "true", "yes")
+    ANALYSIS_LOCAL_ONLY_MAX_LINES = int(os.getenv("ANALYSIS_LOCAL_ONLY_MAX_LINES", 15))  # 不超过该有效行数的Python文件完全本地分析，0表示关闭
+    
+    # 大文件分块分析配置：超过分块大小的文件按顶层定义切分后并发分析再合并，不再截断
+    ANALYSIS_CHUNKED_ENABLED = os.getenv("ANALYSIS_CHUNKED_ENABLED", "true").lower() in ("1", "true", "yes")
+    ANALYSIS_CHUNK_TOKENS = int(os.getenv("ANALYSIS_CHUNK_TOKENS", 6000))  # 每个分块的token上限
+    ANALYSIS_FILE_TOKEN_CAP = int(os.getenv("ANALYSIS_FILE_TOKEN_CAP", 30000))  # 单个文件最多分析的token数，0表示不限制
+    
+    # 小文件批量分析配置：多个小文件合并到一个请求中，按路径返回JSON
+    ANALYSIS_BATCH_ENABLED = os.getenv("ANALYSIS_BATCH_ENABLED", "true").lower() in ("1", "true", "yes")
+    ANALYSIS_BATCH_FILE_MAX_TOKENS = int(os.getenv("ANALYSIS_BATCH_FILE_MAX_TOKENS", 600))  # 不超过该token数的文件才参与合并
+    ANALYSIS_BATCH_TOKEN_BUDGET = int(os.getenv("ANALYSIS_BATCH_TOKEN_BUDGET", 4000))  # 每批文件内容的token总数上限
+    ANALYSIS_BATCH_MAX_FILES = int(os.getenv("ANALYSIS_BATCH_MAX_FILES", 8))
+    ANALYSIS_BATCH_MAX_TOKENS = int(os.getenv("ANALYSIS_BATCH_MAX_TOKENS", 4096))  # 每批的最大输出token数
+    
+    # 自适应并发（AIMD）配置：健康时逐步增加在途请求数，遇到限流或超时时按比例下降
+    ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "true").lower() in ("1", "true", "yes")
+    ADAPTIVE_INITIAL_LIMIT = int(os.getenv("ADAPTIVE_INITIAL_LIMIT", 4))
+    ADAPTIVE_MIN_LIMIT = int(os.getenv("ADAPTIVE_MIN_LIMIT", 1))
+    ADAPTIVE_MAX_LIMIT = int(os.getenv("ADAPTIVE_MAX_LIMIT", 16))
+    ADAPTIVE_DECREASE_FACTOR = float(os.getenv("ADAPTIVE_DECREASE_FACTOR", 0.5))
+    ADAPTIVE_LATENCY_THRESHOLD = float(os.getenv("ADAPTIVE_LATENCY_THRESHOLD", 30.0))  # 超过该延迟（秒）的请求不再增加并发
+    ADAPTIVE_ERROR_THRESHOLD = int(os.getenv("ADAPTIVE_ERROR_THRESHOLD", 3))  # 连续多少次5xx或连接失败后下降并发
+    
+    # 增量分析配置：记录每个仓库的文件清单，未变化的文件不再重新读取和分析
+    INCREMENTAL_ANALYSIS = os.getenv("INCREMENTAL_ANALYSIS", "true").lower() in ("1", "true", "yes")
+    MANIFEST_DIR = os.getenv("MANIFEST_DIR", os.path.join(os.path.expanduser("~"), ".cache", "germ", "manifests"))
+    
+    # README缓存配置：处理后的分析结果未变化时直接返回上次生成的README
+    README_CACHE_ENABLED = os.getenv("README_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    README_CACHE_DIR = os.getenv("README_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "germ", "readme"))
+    README_CACHE_MAX_BYTES = int(os.getenv("README_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    
+    # 核心文件排序方式: imports（按被导入次数）或 pagerank（按导入图中心性）
+    CORE_FILE_RANKING = os.getenv("CORE_FILE_RANKING", "imports")
+    
+    # 文件分析缓存配置
+    ANALYSIS_CACHE_ENABLED = os.getenv("ANALYSIS_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    ANALYSIS_CACHE_DIR = os.getenv("ANALYSIS_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "germ", "analysis"))
+    ANALYSIS_CACHE_MAX_BYTES = int(os.getenv("ANALYSIS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    
+    # 提示词中仓库结构树的渲染参数
+    STRUCTURE_MAX_DEPTH = int(os.getenv("STRUCTURE_MAX_DEPTH", 4))
+    STRUCTURE_MAX_CHILDREN = int(os.getenv("STRUCTURE_MAX_CHILDREN", 20))
+    STRUCTURE_COLLAPSE_THRESHOLD = int(os.getenv("STRUCTURE_COLLAPSE_THRESHOLD", 8))
+    
+    # README生成提示词的token预算（含系统提示词，不含输出）
+    README_PROMPT_TOKEN_BUDGET = int(os.getenv("README_PROMPT_TOKEN_BUDGET", 100000))
+    
+    # 分章节并行生成README：各章节只使用所需的分析结果并发生成，再按固定顺序拼接
+    README_SECTION_PARALLEL = os.getenv("README_SECTION_PARALLEL", "false").lower() in ("1", "true", "yes")
+    README_SECTION_MAX_TOKENS = int(os.getenv("README_SECTION_MAX_TOKENS", 1024))  # 每个章节的最大输出token数
+    
+    # Web后台生成任务配置
+    WEB_JOB_WORKERS = int(os.getenv("WEB_JOB_WORKERS", 2))  # 同时执行的生成任务数
+    WEB_JOB_MAX_QUEUED = int(os.getenv("WEB_JOB_MAX_QUEUED", 20))  # 排队任务数上限，超出时拒绝提交
+    WEB_JOB_RETENTION = float(os.getenv("WEB_JOB_RETENTION", 3600))  # 已结束任务状态的保留秒数
+    WEB_SSE_HEARTBEAT = float(os.getenv("WEB_SSE_HEARTBEAT", 15))  # SSE进度流无新事件时发送心跳的间隔秒数
+    
+    # Git仓库镜像缓存配置（Web端克隆仓库时复用本地裸镜像，只做增量fetch）
+    GIT_MIRROR_CACHE_ENABLED = os.getenv("GIT_MIRROR_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    GIT_MIRROR_CACHE_DIR = os.getenv("GIT_MIRROR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "germ", "mirrors"))
+    GIT_MIRROR_CACHE_MAX_BYTES = int(os.getenv("GIT_MIRROR_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024))  # 所有镜像的总大小上限
+    
+    # 上传ZIP的解压限制，防止ZIP炸弹耗尽内存，0表示不限制（只统计忽略规则过滤后保留的文件）
+    ZIP_MAX_ENTRY_BYTES = int(os.getenv("ZIP_MAX_ENTRY_BYTES", 20 * 1024 * 1024))  # 单个文件解压后的大小上限
+    ZIP_MAX_TOTAL_BYTES = int(os.getenv("ZIP_MAX_TOTAL_BYTES", 500 * 1024 * 1024))  # 解压后的总大小上限
+    ZIP_MAX_ENTRIES = int(os.getenv("ZIP_MAX_ENTRIES", 20000))  # 文件数上限
+    
     # 应用配置
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     
@@ -0,0 +1,106 @@
+import time
+import logging
+import threading
+from typing import Dict, Callable
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态时拒绝请求抛出的异常"""
+
+
+class CircuitBreaker:
+    """
+    API端点熔断器
+
+    连续失败次数达到阈值后进入打开状态，在冷却时间内直接拒绝请求；
+    冷却结束后进入半开状态，只放行一个试探请求，成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    _registry: Dict[str, "CircuitBreaker"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, failure_threshold: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化熔断器
+
+        Args:
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 打开状态持续的秒数
+            clock: 时钟函数，便于测试
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, failure_threshold: int, reset_timeout: float) -> "CircuitBreaker":
+        """
+        获取端点对应的进程内共享熔断器，使同一端点的所有客户端共享熔断状态
+
+        Args:
+            endpoint: API端点地址
+            failure_threshold: 触发熔断的连续失败次数
+            reset_timeout: 打开状态持续的秒数
+
+        Returns:
+            CircuitBreaker: 熔断器
+        """
+        with cls._registry_lock:
+            if endpoint not in cls._registry:
+                cls._registry[endpoint] = cls(failure_threshold, reset_timeout)
+            return cls._registry[endpoint]
+
+    def before_call(self) -> None:
+        """
+        请求前检查熔断状态
+
+        Raises:
+            CircuitOpenError: 熔断器打开或半开状态下已有试探请求时
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                remaining = self.opened_at + self.reset_timeout - self.clock()
+                if remaining > 0:
+                    raise CircuitOpenError(f"API端点暂不可用，熔断器将在 {remaining:.1f} 秒后重试")
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._trial_in_flight:
+                    raise CircuitOpenError("API端点暂不可用，熔断器正在等待试探请求结果")
+                self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        """记录一次成功请求"""
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info("API端点已恢复，熔断器关闭")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """记录一次失败请求，必要时打开熔断器"""
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f"API端点连续失败 {self.failures} 次，熔断 {self.reset_timeout} 秒")
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    def release(self) -> None:
+        """请求因与端点健康无关的原因结束时释放半开状态的试探名额"""
+        with self._lock:
+            self._trial_in_flight = False
@@ -0,0 +1,59 @@
+import logging
+import threading
+from typing import Dict, Tuple
+
+import httpx
+from openai import OpenAI, DefaultHttpxClient
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+class ClientPool:
+    """进程级OpenAI客户端池，同一API地址和密钥共享一个带连接池的客户端，以复用keep-alive连接和TLS会话"""
+
+    _clients: Dict[Tuple[str, str], OpenAI] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_client(cls, base_url: str, api_key: str) -> OpenAI:
+        """
+        获取共享的OpenAI客户端，不存在时创建
+
+        Args:
+            base_url: API地址
+            api_key: API密钥
+
+        Returns:
+            OpenAI: 共享的客户端
+        """
+        key = (base_url, api_key or "")
+        with cls._lock:
+            if key not in cls._clients:
+                logger.debug(f"创建共享OpenAI客户端: {base_url}")
+                limits = httpx.Limits(
+                    max_connections=Config.OPENAI_MAX_CONNECTIONS,
+                    max_keepalive_connections=Config.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=Config.OPENAI_KEEPALIVE_EXPIRY
+                )
+                # 重试由OpenAIClient统一处理，关闭SDK自带的重试；
+                # DefaultHttpxClient保留SDK默认的超时和重定向设置，仅替换连接限制
+                cls._clients[key] = OpenAI(
+                    base_url=base_url,
+                    api_key=api_key,
+                    timeout=Config.OPENAI_TIMEOUT,
+                    max_retries=0,
+                    http_client=DefaultHttpxClient(limits=limits)
+                )
+            return cls._clients[key]
+
+    @classmethod
+    def close_all(cls) -> None:
+        """关闭并移除所有共享客户端"""
+        with cls._lock:
+            for client in cls._clients.values():
+                try:
+                    client.close()
+                except Exception as e:
+                    logger.warning(f"关闭OpenAI客户端失败: {str(e)}")
+            cls._clients.clear()
@@ -0,0 +1,139 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class AIMDLimiter:
+    """
+    加性增、乘性减（AIMD）的自适应并发限制器
+
+    请求健康（成功且延迟不超过阈值）时，每完成约一个窗口的请求并发上限加一；
+    遇到限流（429）或超时时，并发上限按比例下降。同一时刻的一批限流错误只触发一次下降。
+    连续出现服务端错误（5xx或连接失败）说明上游已过载，同样按比例下降；
+    其他错误（如400、401）与上游负载无关，不影响并发上限。
+    """
+
+    _registry: Dict[str, "AIMDLimiter"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        initial_limit: float,
+        min_limit: int,
+        max_limit: int,
+        decrease_factor: float,
+        latency_threshold: float,
+        error_threshold: int = 3,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        初始化限制器
+
+        Args:
+            initial_limit: 初始并发上限
+            min_limit: 并发上限的下限
+            max_limit: 并发上限的上限
+            decrease_factor: 乘性下降系数
+            latency_threshold: 健康请求的延迟阈值（秒）
+            error_threshold: 连续多少次服务端错误后下降并发上限
+            clock: 时钟函数，便于测试
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.decrease_factor = decrease_factor
+        self.latency_threshold = latency_threshold
+        self.error_threshold = error_threshold
+        self.clock = clock
+        self.in_flight = 0
+        self.latency_ewma = None
+        self.decreases = 0
+        self.consecutive_errors = 0
+        self._last_decrease = float('-inf')
+        self._condition = threading.Condition()
+
+    @classmethod
+    def for_endpoint(cls, endpoint: str, **kwargs) -> "AIMDLimiter":
+        """
+        获取端点对应的进程内共享限制器
+
+        Args:
+            endpoint: API端点地址
+            **kwargs: 首次创建时传给构造函数的参数
+
+        Returns:
+            AIMDLimiter: 限制器
+        """
+        with cls._registry_lock:
+            if endpoint not in cls._registry:
+                cls._registry[endpoint] = cls(**kwargs)
+            return cls._registry[endpoint]
+
+    def acquire(self) -> float:
+        """
+        等待直到在途请求数低于当前并发上限
+
+        Returns:
+            float: 请求开始时间，用于release时计算延迟
+        """
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return self.clock()
+
+    def release(self, started_at: float, outcome: str) -> None:
+        """
+        请求结束后释放名额并根据结果调整并发上限
+
+        Args:
+            started_at: acquire返回的开始时间
+            outcome: 请求结果，success（成功）、overload（限流或超时）、
+                     server_error（5xx或连接失败）或error（其他错误）
+        """
+        now = self.clock()
+        latency = now - started_at
+
+        with self._condition:
+            self.in_flight -= 1
+
+            if outcome == "success":
+                self.consecutive_errors = 0
+                self.latency_ewma = latency if self.latency_ewma is None else 0.8 * self.latency_ewma + 0.2 * latency
+                if latency <= self.latency_threshold and self.limit < self.max_limit:
+                    self.limit = min(self.limit + 1.0 / self.limit, self.max_limit)
+            elif outcome == "overload":
+                self._decrease(now, latency, "限流或超时")
+            elif outcome == "server_error":
+                # 偶发的服务端错误不调整，持续出现时按过载处理
+                self.consecutive_errors += 1
+                if self.consecutive_errors >= self.error_threshold:
+                    self._decrease(now, latency, f"连续 {self.consecutive_errors} 次服务端错误")
+
+            self._condition.notify_all()
+
+    def _decrease(self, now: float, latency: float, reason: str) -> None:
+        """乘性下降并发上限，同一批请求中的多个过载信号只下降一次，调用方需持有锁"""
+        window = self.latency_ewma or latency
+        if now - self._last_decrease >= window:
+            self.limit = max(self.limit * self.decrease_factor, self.min_limit)
+            self._last_decrease = now
+            self.decreases += 1
+            logger.warning(f"检测到{reason}，并发上限降至 {int(self.limit)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取限制器状态，用于监控
+
+        Returns:
+            Dict[str, Any]: 当前并发上限、在途请求数、延迟滑动平均值和下降次数
+        """
+        with self._condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "latency_ewma": self.latency_ewma,
+                "decreases": self.decreases,
+            }
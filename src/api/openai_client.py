@@ -1,27 +1,66 @@
+import time
+import random
 import logging
-from typing import Dict, Any, List
-from openai import OpenAI
+from email.utils import parsedate_to_datetime
+from typing import Any, Optional, Iterator
+from openai import OpenAI, APIConnectionError, APIStatusError, APITimeoutError
 
 from config.config import Config
+from src.api.client_pool import ClientPool
+from src.api.circuit_breaker import CircuitBreaker
+from src.api.concurrency_limiter import AIMDLimiter
+from src.api.rate_limiter import TokenBucketRateLimiter
+from src.utils.token_counter import TokenCounter
 
 logger = logging.getLogger(__name__)
 
 class OpenAIClient:
     """OpenAI API客户端类"""
     
-    def __init__(self):
-        """初始化OpenAI客户端"""
-        self.client = OpenAI(base_url="https://api.gptsapi.net/v1", api_key=Config.OPENAI_API_KEY)
+    # 可重试的HTTP状态码
+    RETRYABLE_STATUS_CODES = {408, 409, 429}
+    
+    # 每条消息在聊天格式中额外占用的token数
+    MESSAGE_TOKEN_OVERHEAD = 4
+    
+    def __init__(self, base_url: Optional[str] = None, client: Optional[OpenAI] = None):
+        """
+        初始化OpenAI客户端
+        
+        Args:
+            base_url: API地址，默认使用Config.OPENAI_BASE_URL
+            client: 要使用的OpenAI SDK客户端，默认从进程级客户端池获取
+        """
+        self.base_url = base_url or Config.OPENAI_BASE_URL
+        self.client = client or ClientPool.get_client(self.base_url, Config.OPENAI_API_KEY)
         self.model = Config.OPENAI_MODEL
         self.max_tokens = Config.MAX_TOKENS
         self.temperature = Config.TEMPERATURE
+        self.max_retries = Config.OPENAI_MAX_RETRIES
+        self.circuit_breaker = CircuitBreaker.for_endpoint(
+            self.base_url,
+            Config.CIRCUIT_FAILURE_THRESHOLD,
+            Config.CIRCUIT_RESET_TIMEOUT
+        )
+        self.concurrency_limiter = None
+        if Config.ADAPTIVE_CONCURRENCY:
+            self.concurrency_limiter = AIMDLimiter.for_endpoint(
+                self.base_url,
+                initial_limit=Config.ADAPTIVE_INITIAL_LIMIT,
+                min_limit=Config.ADAPTIVE_MIN_LIMIT,
+                max_limit=Config.ADAPTIVE_MAX_LIMIT,
+                decrease_factor=Config.ADAPTIVE_DECREASE_FACTOR,
+                latency_threshold=Config.ADAPTIVE_LATENCY_THRESHOLD,
+                error_threshold=Config.ADAPTIVE_ERROR_THRESHOLD
+            )
     
     def chat_completion(
         self, 
         system_prompt: str, 
         user_prompt: str,
         temperature: float = None,
-        max_tokens: int = None
+        max_tokens: int = None,
+        model: str = None
     ) -> str:
         """
         发送请求到OpenAI Chat Completion API
@@ -31,6 +70,7 @@ class OpenAIClient:
             user_prompt: 用户提示词
             temperature: 温度参数，控制输出的随机性
             max_tokens: 生成的最大token数
+            model: 要使用的模型，默认使用Config.OPENAI_MODEL
             
         Returns:
             str: 模型生成的响应文本
@@ -41,11 +81,17 @@ class OpenAIClient:
         if max_tokens is None:
             max_tokens = self.max_tokens
         
+        if model is None:
+            model = self.model
+        
         try:
-            logger.debug(f"发送请求到OpenAI API，模型: {self.model}")
+            logger.debug(f"发送请求到OpenAI API，模型: {model}")
+            
+            estimated_tokens = self._estimate_tokens(system_prompt, user_prompt, max_tokens, model)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
+            response = self._create_with_retry(
+                estimated_tokens,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
@@ -63,3 +109,238 @@ class OpenAIClient:
         except Exception as e:
             logger.error(f"OpenAI API调用失败: {str(e)}")
             raise
+    
+    def chat_completion_stream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = None,
+        max_tokens: int = None,
+        model: str = None
+    ) -> Iterator[str]:
+        """
+        以流式方式发送请求到OpenAI Chat Completion API，逐块返回生成的文本
+        
+        建立连接前的失败按chat_completion相同的策略重试，开始输出后出错则直接抛出。
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            temperature: 温度参数，控制输出的随机性
+            max_tokens: 生成的最大token数
+            model: 要使用的模型，默认使用Config.OPENAI_MODEL
+            
+        Yields:
+            str: 模型生成的文本片段
+        """
+        if temperature is None:
+            temperature = self.temperature
+            
+        if max_tokens is None:
+            max_tokens = self.max_tokens
+        
+        if model is None:
+            model = self.model
+        
+        try:
+            logger.debug(f"发送流式请求到OpenAI API，模型: {model}")
+            
+            estimated_tokens = self._estimate_tokens(system_prompt, user_prompt, max_tokens, model)
+            
+            stream = self._create_with_retry(
+                estimated_tokens,
+                model=model,
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt}
+                ],
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True
+            )
+            
+            total_length = 0
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    total_length += len(content)
+                    yield content
+            
+            logger.debug(f"OpenAI API流式响应结束，长度: {total_length}")
+            
+        except Exception as e:
+            logger.error(f"OpenAI API流式调用失败: {str(e)}")
+            raise
+    
+    def _estimate_tokens(self, system_prompt: str, user_prompt: str, max_tokens: int, model: str) -> int:
+        """
+        估算请求占用的token数（提示词 + 每条消息的格式开销 + 最大输出），用于TPM限流预留
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            max_tokens: 生成的最大token数
+            model: 用于计数的模型名称
+            
+        Returns:
+            int: 估算的token数
+        """
+        return (
+            TokenCounter.count(system_prompt, model)
+            + TokenCounter.count(user_prompt, model)
+            + self.MESSAGE_TOKEN_OVERHEAD * 2
+            + max_tokens
+        )
+    
+    def _create_with_retry(self, estimated_tokens: int, **kwargs) -> Any:
+        """
+        调用Chat Completion接口，对限流、超时和服务端错误进行带抖动的指数退避重试
+        
+        Args:
+            estimated_tokens: 估算的token数，用于TPM限流预留
+            **kwargs: 传递给chat.completions.create的参数
+            
+        Returns:
+            Any: API响应对象
+            
+        Raises:
+            CircuitOpenError: 熔断器打开时
+        """
+        for attempt in range(self.max_retries + 1):
+            self.circuit_breaker.before_call()
+            
+            # 进程内共享的TPM/RPM限流，额度不足时排队等待
+            rate_limiter = TokenBucketRateLimiter.for_model(
+                kwargs["model"],
+                Config.RATE_LIMIT_TPM,
+                Config.RATE_LIMIT_RPM
+            )
+            reserved_tokens = rate_limiter.acquire(estimated_tokens) if rate_limiter else 0
+            started_at = self.concurrency_limiter.acquire() if self.concurrency_limiter else None
+            
+            try:
+                response = self.client.chat.completions.create(**kwargs)
+            except Exception as e:
+                if rate_limiter:
+                    rate_limiter.reconcile(reserved_tokens, 0)
+                if self.concurrency_limiter:
+                    self.concurrency_limiter.release(started_at, self._classify_outcome(e))
+                
+                if not self._is_retryable(e):
+                    # 端点有响应（如400/401），说明服务本身可用
+                    if isinstance(e, APIStatusError):
+                        self.circuit_breaker.record_success()
+                    else:
+                        self.circuit_breaker.release()
+                    raise
+                
+                self.circuit_breaker.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                
+                delay = self._get_retry_delay(e, attempt)
+                logger.warning(f"OpenAI API请求失败({str(e)})，{delay:.2f} 秒后进行第 {attempt + 1} 次重试")
+                time.sleep(delay)
+                continue
+            
+            if self.concurrency_limiter:
+                self.concurrency_limiter.release(started_at, "success")
+            if rate_limiter:
+                usage = getattr(response, "usage", None)
+                actual_tokens = getattr(usage, "total_tokens", None) if usage else None
+                rate_limiter.reconcile(reserved_tokens, reserved_tokens if actual_tokens is None else actual_tokens)
+            self.circuit_breaker.record_success()
+            return response
+    
+    @staticmethod
+    def _classify_outcome(error: Exception) -> str:
+        """
+        将请求错误分类为并发限制器使用的结果
+        
+        Args:
+            error: 请求抛出的异常
+            
+        Returns:
+            str: 限流或超时返回overload，5xx或连接失败返回server_error，其他返回error
+        """
+        if isinstance(error, APITimeoutError):
+            return "overload"
+        if isinstance(error, APIStatusError) and error.status_code == 429:
+            return "overload"
+        if isinstance(error, APIConnectionError) or (isinstance(error, APIStatusError) and error.status_code >= 500):
+            return "server_error"
+        return "error"
+    
+    def _is_retryable(self, error: Exception) -> bool:
+        """
+        判断错误是否可以重试
+        
+        Args:
+            error: 请求抛出的异常
+            
+        Returns:
+            bool: 是否可重试
+        """
+        if isinstance(error, (APITimeoutError, APIConnectionError)):
+            return True
+        if isinstance(error, APIStatusError):
+            return error.status_code in self.RETRYABLE_STATUS_CODES or error.status_code >= 500
+        return False
+    
+    def _get_retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        计算重试等待时间，优先使用服务端返回的Retry-After，否则使用带完全抖动的指数退避
+        
+        Args:
+            error: 请求抛出的异常
+            attempt: 已重试次数（从0开始）
+            
+        Returns:
+            float: 等待秒数
+        """
+        retry_after = self._parse_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, Config.OPENAI_RETRY_MAX_DELAY)
+        
+        backoff = min(Config.OPENAI_RETRY_BASE_DELAY * (2 ** attempt), Config.OPENAI_RETRY_MAX_DELAY)
+        return random.uniform(0, backoff)
+    
+    @staticmethod
+    def _parse_retry_after(error: Exception) -> Optional[float]:
+        """
+        从错误响应头中解析Retry-After
+        
+        Args:
+            error: 请求抛出的异常
+            
+        Returns:
+            Optional[float]: 等待秒数，响应中没有该头时返回None
+        """
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if not headers:
+            return None
+        
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return max(float(retry_after_ms) / 1000, 0)
+            except ValueError:
+                pass
+        
+        retry_after = headers.get("retry-after")
+        if not retry_after:
+            return None
+        try:
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        
+        # Retry-After也可以是HTTP日期
+        try:
+            retry_at = parsedate_to_datetime(retry_after)
+            return max(retry_at.timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
@@ -0,0 +1,138 @@
+import time
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class TokenBucketRateLimiter:
+    """
+    按每分钟token数（TPM）和每分钟请求数（RPM）限流的令牌桶
+
+    请求发送前按估算的token数预留额度，额度不足时排队等待；
+    收到响应后按实际usage多退少补。同一模型的所有客户端共享一个限流器。
+    """
+
+    _registry: Dict[str, "TokenBucketRateLimiter"] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int, clock: Callable[[], float] = time.monotonic):
+        """
+        初始化限流器
+
+        Args:
+            tokens_per_minute: 每分钟token额度，0表示不限制
+            requests_per_minute: 每分钟请求额度，0表示不限制
+            clock: 时钟函数，便于测试
+        """
+        self.tokens_per_minute = tokens_per_minute
+        self.requests_per_minute = requests_per_minute
+        self.clock = clock
+        self.available_tokens = float(tokens_per_minute)
+        self.available_requests = float(requests_per_minute)
+        self.waiting = 0
+        self._updated_at = clock()
+        self._condition = threading.Condition()
+
+    @classmethod
+    def for_model(cls, model: str, tokens_per_minute: int, requests_per_minute: int) -> Optional["TokenBucketRateLimiter"]:
+        """
+        获取模型对应的进程内共享限流器
+
+        Args:
+            model: 模型名称
+            tokens_per_minute: 每分钟token额度
+            requests_per_minute: 每分钟请求额度
+
+        Returns:
+            Optional[TokenBucketRateLimiter]: 限流器，两项额度均未配置时返回None
+        """
+        if not tokens_per_minute and not requests_per_minute:
+            return None
+
+        with cls._registry_lock:
+            if model not in cls._registry:
+                cls._registry[model] = cls(tokens_per_minute, requests_per_minute)
+            return cls._registry[model]
+
+    def _refill(self) -> None:
+        """按经过的时间补充额度，调用方需持有锁"""
+        now = self.clock()
+        elapsed = now - self._updated_at
+        self._updated_at = now
+        if self.tokens_per_minute:
+            self.available_tokens = min(self.available_tokens + elapsed * self.tokens_per_minute / 60, self.tokens_per_minute)
+        if self.requests_per_minute:
+            self.available_requests = min(self.available_requests + elapsed * self.requests_per_minute / 60, self.requests_per_minute)
+
+    def _wait_time(self, tokens: int) -> float:
+        """计算额度足够前还需等待的秒数，调用方需持有锁"""
+        wait = 0.0
+        if self.tokens_per_minute and self.available_tokens < tokens:
+            wait = max(wait, (tokens - self.available_tokens) * 60 / self.tokens_per_minute)
+        if self.requests_per_minute and self.available_requests < 1:
+            wait = max(wait, (1 - self.available_requests) * 60 / self.requests_per_minute)
+        return wait
+
+    def acquire(self, tokens: int) -> int:
+        """
+        预留一次请求和指定数量的token，额度不足时阻塞等待
+
+        Args:
+            tokens: 估算的token数
+
+        Returns:
+            int: 实际预留的token数（超过桶容量的请求按桶容量预留，避免永远无法满足）
+        """
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+
+        with self._condition:
+            self.waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    wait = self._wait_time(tokens)
+                    if wait <= 0:
+                        break
+                    logger.debug(f"触发TPM/RPM限流，等待 {wait:.2f} 秒")
+                    self._condition.wait(wait)
+            finally:
+                self.waiting -= 1
+
+            if self.tokens_per_minute:
+                self.available_tokens -= tokens
+            if self.requests_per_minute:
+                self.available_requests -= 1
+            return tokens
+
+    def reconcile(self, reserved_tokens: int, actual_tokens: int) -> None:
+        """
+        按实际用量修正预留的token额度
+
+        Args:
+            reserved_tokens: acquire预留的token数
+            actual_tokens: 响应usage中的实际token数，请求失败时为0
+        """
+        if not self.tokens_per_minute:
+            return
+
+        with self._condition:
+            self._refill()
+            self.available_tokens = min(self.available_tokens + reserved_tokens - actual_tokens, self.tokens_per_minute)
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取限流器状态，用于监控
+
+        Returns:
+            Dict[str, Any]: 剩余token额度、剩余请求额度和排队数
+        """
+        with self._condition:
+            self._refill()
+            return {
+                "available_tokens": int(self.available_tokens),
+                "available_requests": int(self.available_requests),
+                "waiting": self.waiting,
+            }
@@ -3,7 +3,7 @@ import sys
 import logging
 import click
 from tqdm import tqdm
-from typing import Optional
+from typing import Optional, Iterator, Dict, Any
 
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from config.config import Config
 from src.services.code_analyzer import CodeAnalyzer
 from src.services.readme_generator import ReadmeGenerator
+from src.models.agent import ReadmeAgent
 from src.utils.file_handler import FileHandler
 
 # 配置日志
@@ -20,12 +21,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _echo_chunks(chunks: Iterator[str]) -> Iterator[str]:
+    """将内容片段同时输出到标准输出"""
+    for chunk in chunks:
+        click.echo(chunk, nl=False)
+        yield chunk
+    click.echo()
+
+def _describe_progress(pbar: tqdm, stage: str, info: Dict[str, Any]) -> None:
+    """根据代码分析进度更新进度条描述"""
+    descriptions = {"scan": "扫描仓库文件", "score": "识别核心文件", "analyze": "分析代码文件"}
+    description = descriptions.get(stage, stage)
+    if stage == "analyze":
+        description += f" {info['done']}/{info['total']}"
+    pbar.set_description(description)
+
 @click.command()
 @click.option('--repo_path', required=True, help='要分析的代码仓库路径')
 @click.option('--output', default=Config.DEFAULT_OUTPUT_FILENAME, help='输出README文件的名称')
-@click.option('--model', default=None, help='要使用的OpenAI模型')
+@click.option('--model', default=None, help='生成README使用的OpenAI模型')
+@click.option('--max-tokens', 'max_tokens', type=int, default=None, help='生成README的最大输出token数')
+@click.option('--temperature', type=float, default=None, help='生成README的温度参数')
+@click.option('--analysis-model', 'analysis_model', default=None, help='文件分析使用的模型，默认与README生成相同')
+@click.option('--analysis-max-tokens', 'analysis_max_tokens', type=int, default=None, help='文件分析的最大输出token数')
+@click.option('--analysis-temperature', 'analysis_temperature', type=float, default=None, help='文件分析的温度参数')
+@click.option('--escalate/--no-escalate', default=None, help='文件分析结果无法解析为JSON时是否改用README生成模型重试')
 @click.option('--verbose', is_flag=True, help='显示详细日志')
-def main(repo_path: str, output: str, model: Optional[str], verbose: bool):
+@click.option('--force', is_flag=True, help='忽略README缓存，强制重新生成')
+@click.option('--stream', is_flag=True, help='流式生成README，边生成边写入输出文件')
+@click.option('--stdout', 'to_stdout', is_flag=True, help='同时将README内容输出到标准输出')
+@click.option('--sections', is_flag=True, help='分章节并行生成README后按固定顺序拼接')
+def main(
+    repo_path: str,
+    output: str,
+    model: Optional[str],
+    max_tokens: Optional[int],
+    temperature: Optional[float],
+    analysis_model: Optional[str],
+    analysis_max_tokens: Optional[int],
+    analysis_temperature: Optional[float],
+    escalate: Optional[bool],
+    verbose: bool,
+    force: bool,
+    stream: bool,
+    to_stdout: bool,
+    sections: bool
+):
     """根据代码仓库生成README.md文件的命令行工具"""
     try:
         # 验证配置
@@ -38,25 +79,60 @@ def main(repo_path: str, output: str, model: Optional[str], verbose: bool):
         # 如果提供了模型参数，覆盖配置
         if model:
             Config.OPENAI_MODEL = model
+        if max_tokens is not None:
+            Config.MAX_TOKENS = max_tokens
+        if temperature is not None:
+            Config.TEMPERATURE = temperature
+        
+        # 文件分析的模型参数
+        if analysis_model:
+            Config.ANALYSIS_MODEL = analysis_model
+        if analysis_max_tokens is not None:
+            Config.ANALYSIS_MAX_TOKENS = analysis_max_tokens
+        if analysis_temperature is not None:
+            Config.ANALYSIS_TEMPERATURE = analysis_temperature
+        if escalate is not None:
+            Config.ANALYSIS_ESCALATE_ON_PARSE_ERROR = escalate
+        
+        if sections:
+            Config.README_SECTION_PARALLEL = True
         
         logger.info(f"开始分析仓库: {repo_path}")
         
         # 分析代码仓库
         with tqdm(total=3, desc="生成README") as pbar:
             pbar.set_description("分析代码仓库")
-            code_analyzer = CodeAnalyzer(repo_path)
+            agent = ReadmeAgent()
+            code_analyzer = CodeAnalyzer(
+                repo_path,
+                agent=agent,
+                progress_callback=lambda stage, info: _describe_progress(pbar, stage, info)
+            )
             repo_analysis = code_analyzer.analyze()
             pbar.update(1)
             
-            pbar.set_description("生成README内容")
-            readme_generator = ReadmeGenerator()
-            readme_content = readme_generator.generate(repo_analysis)
-            pbar.update(1)
-            
-            pbar.set_description("保存README文件")
+            readme_generator = ReadmeGenerator(agent=agent)
             output_path = os.path.join(repo_path, output)
-            FileHandler.write_file(output_path, readme_content)
-            pbar.update(1)
+            
+            if stream:
+                # 边生成边写入临时文件（以及标准输出），全部生成后才替换README，生成失败时原文件保持不变
+                pbar.set_description("流式生成README内容")
+                chunks = readme_generator.generate_stream(repo_analysis, force=force)
+                if to_stdout:
+                    chunks = _echo_chunks(chunks)
+                if not FileHandler.write_file_stream(output_path, chunks):
+                    raise RuntimeError(f"流式写入README文件失败: {output_path}")
+                pbar.update(2)
+            else:
+                pbar.set_description("生成README内容")
+                readme_content = readme_generator.generate(repo_analysis, force=force)
+                pbar.update(1)
+                
+                pbar.set_description("保存README文件")
+                FileHandler.write_file(output_path, readme_content)
+                if to_stdout:
+                    click.echo(readme_content)
+                pbar.update(1)
         
         logger.info(f"README生成完成，已保存到: {output_path}")
         
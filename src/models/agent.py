@@ -1,8 +1,18 @@
+import os
+import re
+import json
 import logging
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Iterator, Tuple
 
 from src.api.openai_client import OpenAIClient
 from src.utils.prompt_templates import PromptTemplates
+from src.utils.analysis_cache import AnalysisCache
+from src.utils.prompt_packer import PromptPacker
+from src.utils.token_counter import TokenCounter
+from src.utils.markdown_fence import MarkdownFenceStripper
+from src.utils.code_chunker import CodeChunker
+from src.utils.code_parser import CodeParser
 from config.config import Config
 
 logger = logging.getLogger(__name__)
@@ -10,10 +20,17 @@ logger = logging.getLogger(__name__)
 class ReadmeAgent:
     """基于LLM的README生成Agent"""
     
-    def __init__(self):
-        """初始化README生成Agent"""
-        self.openai_client = OpenAIClient()
+    def __init__(self, openai_client: Optional[OpenAIClient] = None):
+        """
+        初始化README生成Agent
+        
+        Args:
+            openai_client: 要使用的OpenAI客户端，默认创建一个使用共享连接池的客户端
+        """
+        self.openai_client = openai_client or OpenAIClient()
         self.system_prompt = Config.SYSTEM_PROMPT
+        self.analysis_cache = AnalysisCache.get_shared()
+        self.last_pack_report = []
     
     def generate_readme(self, repo_analysis: Dict[str, Any]) -> str:
         """
@@ -27,8 +44,7 @@ class ReadmeAgent:
         """
         logger.info("开始生成README内容")
         
-        # 构建用户提示词
-        user_prompt = PromptTemplates.get_readme_generation_prompt(repo_analysis)
+        user_prompt = self._build_readme_prompt(repo_analysis)
         
         # 调用OpenAI API生成README
         try:
@@ -44,10 +60,175 @@ class ReadmeAgent:
             logger.error(f"生成README内容失败: {str(e)}")
             raise
     
+    def generate_readme_stream(self, repo_analysis: Dict[str, Any]) -> Iterator[str]:
+        """
+        以流式方式生成README内容
+        
+        Args:
+            repo_analysis: 包含代码仓库分析结果的字典
+            
+        Yields:
+            str: 模型生成的README片段
+        """
+        logger.info("开始流式生成README内容")
+        
+        user_prompt = self._build_readme_prompt(repo_analysis)
+        
+        try:
+            yield from self.openai_client.chat_completion_stream(
+                system_prompt=self.system_prompt,
+                user_prompt=user_prompt
+            )
+            
+            logger.info("README内容流式生成完成")
+            
+        except Exception as e:
+            logger.error(f"流式生成README内容失败: {str(e)}")
+            raise
+    
+    def generate_readme_sections(self, repo_analysis: Dict[str, Any]) -> Iterator[str]:
+        """
+        分章节并发生成README，按PromptTemplates.README_SECTIONS的固定顺序依次返回
+        
+        Args:
+            repo_analysis: 包含代码仓库分析结果的字典
+            
+        Yields:
+            str: 去除外层代码块标记的章节内容（含章节间的空行），全部拼接后即为完整README
+        """
+        sections = PromptTemplates.README_SECTIONS
+        logger.info(f"开始分章节并行生成README，共 {len(sections)} 个章节")
+        
+        max_workers = max(1, min(len(sections), Config.ANALYSIS_MAX_WORKERS))
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        futures = []
+        try:
+            futures = [executor.submit(self._generate_section, section, repo_analysis) for section in sections]
+            
+            # 按章节顺序等待结果，先完成的章节不会打乱最终顺序
+            pack_report = []
+            first = True
+            for section, future in zip(sections, futures):
+                content, report = future.result()
+                pack_report.extend({"section": section["key"], **entry} for entry in report)
+                if not content:
+                    logger.warning(f"README章节 {section['key']} 生成结果为空，已跳过")
+                    continue
+                yield content if first else "\n\n" + content
+                first = False
+            
+            self.last_pack_report = pack_report
+            logger.info("README各章节生成完成")
+            
+        except Exception as e:
+            logger.error(f"分章节生成README失败: {str(e)}")
+            raise
+        finally:
+            # 出错或调用方提前停止时取消尚未开始的章节（cancel_futures参数需要Python 3.9）
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def _generate_section(self, section: Dict[str, Any], repo_analysis: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        生成README的单个章节
+        
+        Args:
+            section: README_SECTIONS中的章节定义
+            repo_analysis: 包含代码仓库分析结果的字典
+            
+        Returns:
+            Tuple[str, List[Dict[str, Any]]]: 章节内容，以及提示词裁剪报告
+        """
+        user_prompt, report = self._build_section_prompt(section, repo_analysis)
+        content = self.openai_client.chat_completion(
+            system_prompt=self.system_prompt,
+            user_prompt=user_prompt,
+            max_tokens=Config.README_SECTION_MAX_TOKENS
+        )
+        return MarkdownFenceStripper.strip(content).strip(), report
+    
+    def _build_section_prompt(self, section: Dict[str, Any], repo_analysis: Dict[str, Any]) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        只取章节所需的分析结果字段，按token预算裁剪后构建章节提示词
+        
+        Args:
+            section: README_SECTIONS中的章节定义
+            repo_analysis: 包含代码仓库分析结果的字典
+            
+        Returns:
+            Tuple[str, List[Dict[str, Any]]]: 用户提示词，以及提示词裁剪报告
+        """
+        section_analysis = {key: repo_analysis[key] for key in section["fields"] if key in repo_analysis}
+        
+        model = self.openai_client.model
+        overhead = (
+            TokenCounter.count(self.system_prompt, model)
+            + TokenCounter.count(PromptTemplates.get_readme_section_prompt(section, {}), model)
+        )
+        packer = PromptPacker(Config.README_PROMPT_TOKEN_BUDGET - overhead, model)
+        section_analysis, report = packer.pack(section_analysis)
+        
+        return PromptTemplates.get_readme_section_prompt(section, section_analysis), report
+    
+    def _build_readme_prompt(self, repo_analysis: Dict[str, Any]) -> str:
+        """
+        按token预算裁剪分析结果并构建README生成提示词
+        
+        Args:
+            repo_analysis: 包含代码仓库分析结果的字典
+            
+        Returns:
+            str: 用户提示词
+        """
+        # 预算需扣除系统提示词和模板本身的开销
+        model = self.openai_client.model
+        overhead = (
+            TokenCounter.count(self.system_prompt, model)
+            + TokenCounter.count(PromptTemplates.get_readme_generation_prompt({}), model)
+        )
+        packer = PromptPacker(Config.README_PROMPT_TOKEN_BUDGET - overhead, model)
+        repo_analysis, self.last_pack_report = packer.pack(repo_analysis)
+        
+        return PromptTemplates.get_readme_generation_prompt(repo_analysis)
+    
+    def get_analysis_model(self) -> str:
+        """
+        获取文件分析使用的模型
+        
+        Returns:
+            str: Config.ANALYSIS_MODEL，未配置时与README生成使用同一模型
+        """
+        return Config.ANALYSIS_MODEL or self.openai_client.model
+    
+    def get_analysis_version(self) -> str:
+        """
+        获取文件分析结果的版本，包含所有影响分析结果的模型、提示词和分析方式配置
+        
+        Returns:
+            str: 分析版本，任一配置变化时随之变化
+        """
+        return json.dumps({
+            "model": self.get_analysis_model(),
+            "escalation_model": self.openai_client.model if Config.ANALYSIS_ESCALATE_ON_PARSE_ERROR else None,
+            "temperature": Config.ANALYSIS_TEMPERATURE,
+            "max_tokens": Config.ANALYSIS_MAX_TOKENS,
+            "prompt_version": PromptTemplates.FILE_ANALYSIS_PROMPT_VERSION,
+            "chunked": [Config.ANALYSIS_CHUNK_TOKENS, Config.ANALYSIS_FILE_TOKEN_CAP] if Config.ANALYSIS_CHUNKED_ENABLED else None,
+            "local_extraction": Config.ANALYSIS_LOCAL_ONLY_MAX_LINES if Config.ANALYSIS_LOCAL_EXTRACTION else None,
+            "batch": [
+                Config.ANALYSIS_BATCH_FILE_MAX_TOKENS, Config.ANALYSIS_BATCH_TOKEN_BUDGET,
+                Config.ANALYSIS_BATCH_MAX_FILES, Config.ANALYSIS_BATCH_MAX_TOKENS
+            ] if Config.ANALYSIS_BATCH_ENABLED else None,
+        }, sort_keys=True)
+    
     def analyze_code_file(self, file_path: str, file_content: str) -> Dict[str, Any]:
         """
         分析单个代码文件
         
+        使用文件分析模型提取结构化信息，其返回的JSON无法解析时可升级到README生成模型重新分析。
+        Python文件的组件和依赖由本地静态提取，简单文件完全在本地分析。
+        
         Args:
             file_path: 文件路径
             file_content: 文件内容
@@ -57,26 +238,391 @@ class ReadmeAgent:
         """
         logger.debug(f"分析代码文件: {file_path}")
         
-        # 构建文件分析提示词
-        user_prompt = PromptTemplates.get_file_analysis_prompt(file_path, file_content)
+        # 简单的Python文件直接使用本地提取结果，不调用LLM
+        structure = self._extract_local_structure(file_path, file_content)
+        if structure is not None and self._is_trivial(structure):
+            logger.debug(f"本地分析简单文件: {file_path}")
+            return self._build_local_analysis(file_path, structure)
+        
+        model = self.get_analysis_model()
+        temperature = Config.ANALYSIS_TEMPERATURE  # 较低的温度以获得更精确的分析
+        
+        # 查询分析缓存，命中时跳过API调用；分块、截断和本地提取方式不同的结果使用不同的缓存键
+        variant = self._get_file_analysis_variant(file_content, model, local_structure=structure is not None)
+        cache_key = self._get_analysis_cache_key(file_content, model, temperature, variant=variant)
+        if cache_key is not None:
+            cached = self.analysis_cache.get(cache_key)
+            if cached is not None:
+                logger.debug(f"分析缓存命中: {file_path}")
+                return cached
         
         # 调用OpenAI API分析文件
         try:
-            analysis_result = self.openai_client.chat_completion(
-                system_prompt="你是一个代码分析专家，请分析以下代码文件并提取关键信息。",
-                user_prompt=user_prompt,
-                temperature=0.3  # 降低温度以获得更精确的分析
-            )
-            
-            # 解析分析结果
-            try:
-                import json
-                analysis_dict = json.loads(analysis_result)
+            # 超过分块大小的文件分块并发分析后合并，不再截断
+            if variant.startswith("chunked"):
+                analysis_dict, parsed = self._analyze_file_chunks(file_path, file_content, model, temperature)
+                analysis_dict = self._apply_local_structure(analysis_dict, structure)
+                # 有分块结果无法解析时不写入缓存，避免偶发的错误响应被长期复用
+                if cache_key is not None and parsed:
+                    self.analysis_cache.put(cache_key, analysis_dict)
                 return analysis_dict
-            except json.JSONDecodeError:
-                # 如果无法解析为JSON，直接返回文本
-                return {"summary": analysis_result}
+            
+            # 构建文件分析提示词，启用分块分析时内容已在token上限以内，无需截断
+            # 已在本地提取组件和依赖的文件只需让模型给出用途和逻辑
+            max_chars = None if Config.ANALYSIS_CHUNKED_ENABLED else 10000
+            if structure is not None:
+                user_prompt = PromptTemplates.get_file_purpose_prompt(file_path, file_content, structure, max_chars=max_chars)
+            else:
+                user_prompt = PromptTemplates.get_file_analysis_prompt(file_path, file_content, max_chars=max_chars)
+            
+            analysis_result = self._request_file_analysis(user_prompt, model, temperature)
+            analysis_dict = self._parse_analysis_json(analysis_result)
+            
+            # 便宜模型返回的JSON无法解析时，改用README生成模型重新分析
+            escalation_model = self.openai_client.model
+            if analysis_dict is None and Config.ANALYSIS_ESCALATE_ON_PARSE_ERROR and escalation_model != model:
+                logger.info(f"{model} 返回的分析结果无法解析为JSON，改用 {escalation_model} 重新分析: {file_path}")
+                analysis_result = self._request_file_analysis(user_prompt, escalation_model, temperature)
+                analysis_dict = self._parse_analysis_json(analysis_result)
+            
+            parsed = analysis_dict is not None
+            if not parsed:
+                # 如果无法解析为JSON，直接返回文本，并标记为未解析的结果，不会被缓存或写入清单
+                analysis_dict = {"summary": analysis_result, "unparsed": True}
+            
+            analysis_dict = self._apply_local_structure(analysis_dict, structure)
+            # 只缓存成功解析的结果，避免偶发的错误响应被长期复用
+            if cache_key is not None and parsed:
+                self.analysis_cache.put(cache_key, analysis_dict)
+            
+            return analysis_dict
                 
         except Exception as e:
             logger.error(f"分析代码文件失败: {str(e)}")
             return {"error": str(e)}
+    
+    def analyze_code_files_batch(self, files: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        在一个请求中合并分析多个小文件，响应为按路径组织的JSON对象
+        
+        缓存命中的文件不进入请求；响应无法解析或缺少某个文件时，相应文件改为单独分析。
+        
+        Args:
+            files: (文件路径, 文件内容) 元组列表
+            
+        Returns:
+            List[Dict[str, Any]]: 与files顺序一致的分析结果列表
+        """
+        model = self.get_analysis_model()
+        temperature = Config.ANALYSIS_TEMPERATURE
+        
+        results = {}
+        pending = []
+        structures = {}
+        for file_path, file_content in files:
+            structure = self._extract_local_structure(file_path, file_content)
+            if structure is not None and self._is_trivial(structure):
+                results[file_path] = self._build_local_analysis(file_path, structure)
+                continue
+            structures[file_path] = structure
+            
+            # 优先使用单独分析的结果；合并分析的结果来自不同的提示词，使用独立的缓存键
+            cached = None
+            local_structure = structure is not None
+            batch_variant = "batch:local" if local_structure else "batch"
+            batch_cache_key = self._get_analysis_cache_key(file_content, model, temperature, variant=batch_variant)
+            if batch_cache_key is not None:
+                variant = self._get_file_analysis_variant(file_content, model, local_structure=local_structure)
+                cached = self.analysis_cache.get(self._get_analysis_cache_key(file_content, model, temperature, variant=variant))
+                if cached is None:
+                    cached = self.analysis_cache.get(batch_cache_key)
+            if cached is not None:
+                logger.debug(f"分析缓存命中: {file_path}")
+                results[file_path] = cached
+            else:
+                pending.append((file_path, file_content, batch_cache_key))
+        
+        if len(pending) > 1:
+            logger.debug(f"合并分析 {len(pending)} 个小文件")
+            user_prompt = PromptTemplates.get_batch_file_analysis_prompt(
+                [(file_path, file_content) for file_path, file_content, _ in pending]
+            )
+            
+            batch_result = None
+            try:
+                response = self.openai_client.chat_completion(
+                    system_prompt="你是一个代码分析专家，请分析以下代码文件并提取关键信息。",
+                    user_prompt=user_prompt,
+                    temperature=temperature,
+                    max_tokens=Config.ANALYSIS_BATCH_MAX_TOKENS,
+                    model=model
+                )
+                batch_result = self._parse_analysis_json(response)
+            except Exception as e:
+                logger.warning(f"合并分析请求失败，改为逐个分析: {str(e)}")
+            
+            if batch_result is None:
+                batch_result = {}
+            
+            remaining = []
+            for file_path, file_content, cache_key in pending:
+                analysis_dict = batch_result.get(file_path)
+                if isinstance(analysis_dict, dict) and analysis_dict:
+                    analysis_dict = self._apply_local_structure(analysis_dict, structures[file_path])
+                    results[file_path] = analysis_dict
+                    if cache_key is not None:
+                        self.analysis_cache.put(cache_key, analysis_dict)
+                else:
+                    remaining.append((file_path, file_content, cache_key))
+            
+            if remaining and batch_result:
+                logger.info(f"合并分析结果缺少 {len(remaining)} 个文件，改为逐个分析")
+            pending = remaining
+        
+        # 未能合并分析的文件逐个分析
+        for file_path, file_content, _ in pending:
+            results[file_path] = self.analyze_code_file(file_path, file_content)
+        
+        return [results[file_path] for file_path, _ in files]
+    
+    def _extract_local_structure(self, file_path: str, file_content: str) -> Optional[Dict[str, Any]]:
+        """
+        对Python文件进行本地静态提取
+        
+        Args:
+            file_path: 文件路径
+            file_content: 文件内容
+            
+        Returns:
+            Optional[Dict[str, Any]]: CodeParser.extract_python_structure的结果，非Python文件、未启用或无法解析时返回None
+        """
+        if not Config.ANALYSIS_LOCAL_EXTRACTION or CodeParser.identify_language(file_path) != 'Python':
+            return None
+        return CodeParser.extract_python_structure(file_content)
+    
+    @staticmethod
+    def _is_trivial(structure: Dict[str, Any]) -> bool:
+        """判断文件是否简单到无需调用LLM"""
+        return structure["lines"] <= Config.ANALYSIS_LOCAL_ONLY_MAX_LINES
+    
+    @staticmethod
+    def _build_local_analysis(file_path: str, structure: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        仅根据本地提取结果构建分析结果
+        
+        Args:
+            file_path: 文件路径
+            structure: 本地提取结果
+            
+        Returns:
+            Dict[str, Any]: 分析结果
+        """
+        purpose = structure["docstring"]
+        if not purpose:
+            if structure["components"]:
+                purpose = f"定义 {'、'.join(structure['components'][:5])}"
+            elif os.path.basename(file_path) == "__init__.py":
+                purpose = "包初始化文件"
+            else:
+                purpose = "模块"
+        
+        analysis = {
+            "purpose": purpose,
+            "components": structure["components"],
+            "dependencies": structure["dependencies"],
+        }
+        if structure["docstrings"]:
+            analysis["docstrings"] = structure["docstrings"]
+        return analysis
+    
+    @staticmethod
+    def _apply_local_structure(analysis: Dict[str, Any], structure: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        用本地提取的组件和依赖覆盖模型给出的结果
+        
+        Args:
+            analysis: 模型返回的分析结果
+            structure: 本地提取结果，为None时不做修改
+            
+        Returns:
+            Dict[str, Any]: 合并后的分析结果
+        """
+        if structure is None:
+            return analysis
+        
+        analysis = dict(analysis)
+        analysis["components"] = structure["components"]
+        analysis["dependencies"] = structure["dependencies"]
+        if structure["docstrings"]:
+            analysis["docstrings"] = structure["docstrings"]
+        return analysis
+    
+    def _analyze_file_chunks(self, file_path: str, file_content: str, model: str, temperature: float) -> Tuple[Dict[str, Any], bool]:
+        """
+        大文件的分块分析：按顶层定义切分，并发分析各分块（map），再合并为一个分析结果（reduce）
+        
+        Args:
+            file_path: 文件路径
+            file_content: 文件内容
+            model: 分析使用的模型
+            temperature: 温度参数
+            
+        Returns:
+            Tuple[Dict[str, Any], bool]: 整个文件的分析结果，以及所有模型响应是否都成功解析
+        """
+        chunks = CodeChunker.split(file_content, Config.ANALYSIS_CHUNK_TOKENS, model)
+        chunks, dropped = CodeChunker.limit_tokens(chunks, Config.ANALYSIS_FILE_TOKEN_CAP, model)
+        if dropped:
+            logger.info(f"{file_path} 超出单文件token上限 {Config.ANALYSIS_FILE_TOKEN_CAP}，跳过最后 {dropped} 个分块")
+        logger.debug(f"分块分析 {file_path}，共 {len(chunks)} 个分块")
+        
+        def analyze_chunk(item):
+            index, chunk = item
+            user_prompt = PromptTemplates.get_file_chunk_analysis_prompt(file_path, chunk, index + 1, len(chunks))
+            result = self._request_file_analysis(user_prompt, model, temperature)
+            analysis = self._parse_analysis_json(result)
+            return (analysis, True) if analysis is not None else ({"summary": result}, False)
+        
+        max_workers = max(1, min(len(chunks), Config.ANALYSIS_MAX_WORKERS))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # executor.map按分块顺序返回结果
+            chunk_results = list(executor.map(analyze_chunk, enumerate(chunks)))
+        chunk_analyses = [analysis for analysis, _ in chunk_results]
+        parsed = all(chunk_parsed for _, chunk_parsed in chunk_results)
+        
+        merged = self._merge_chunk_analyses(chunk_analyses)
+        if len(chunk_analyses) > 1:
+            user_prompt = PromptTemplates.get_chunk_reduce_prompt(file_path, chunk_analyses)
+            reduced = self._parse_analysis_json(self._request_file_analysis(user_prompt, model, temperature))
+            if reduced is not None:
+                # 合并结果中缺失的字段使用本地合并的结果补全
+                merged = {**merged, **reduced}
+            else:
+                logger.warning(f"{file_path} 分块结果的合并响应无法解析，使用本地合并结果")
+                parsed = False
+        
+        merged["chunks"] = len(chunks)
+        if dropped:
+            merged["truncated"] = True
+        if not parsed:
+            merged["unparsed"] = True
+        return merged, parsed
+    
+    @staticmethod
+    def _merge_chunk_analyses(chunk_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        在本地合并各分块的分析结果：列表字段按顺序去重合并，文本字段按顺序拼接
+        
+        Args:
+            chunk_analyses: 按顺序排列的各分块分析结果
+            
+        Returns:
+            Dict[str, Any]: 合并后的分析结果
+        """
+        merged = {}
+        for field in ("components", "dependencies"):
+            values = []
+            for analysis in chunk_analyses:
+                items = analysis.get(field) or []
+                for item in items if isinstance(items, list) else [items]:
+                    if item not in values:
+                        values.append(item)
+            if values:
+                merged[field] = values
+        
+        for field in ("purpose", "logic", "configuration", "quality", "summary"):
+            texts = []
+            for analysis in chunk_analyses:
+                text = analysis.get(field)
+                if text and isinstance(text, str) and text not in texts:
+                    texts.append(text)
+            if texts:
+                merged[field] = "；".join(texts)
+        
+        return merged
+    
+    def _get_file_analysis_variant(self, file_content: str, model: str, local_structure: bool = False) -> str:
+        """
+        获取单独分析文件时使用的分析方式，用于区分缓存键
+        
+        Args:
+            file_content: 文件内容
+            model: 分析使用的模型
+            local_structure: 是否使用本地提取的组件和依赖（只让模型给出用途和逻辑）
+            
+        Returns:
+            str: 分块分析时为包含分块配置的chunked标记，关闭分块分析（内容会被截断）时为truncated，否则为空；
+                 使用本地提取结果时追加local标记
+        """
+        if not Config.ANALYSIS_CHUNKED_ENABLED:
+            variant = "truncated"
+        elif TokenCounter.count(file_content, model) > Config.ANALYSIS_CHUNK_TOKENS:
+            variant = f"chunked:{Config.ANALYSIS_CHUNK_TOKENS}:{Config.ANALYSIS_FILE_TOKEN_CAP}"
+        else:
+            variant = ""
+        if local_structure:
+            variant = f"{variant}:local" if variant else "local"
+        return variant
+    
+    def _get_analysis_cache_key(self, file_content: str, model: str, temperature: float, variant: str = "") -> Optional[str]:
+        """
+        计算文件分析缓存键
+        
+        Args:
+            file_content: 文件内容
+            model: 分析使用的模型
+            temperature: 温度参数
+            variant: 分析方式，不同方式的结果使用不同的缓存键，如batch表示合并分析
+            
+        Returns:
+            Optional[str]: 缓存键，未启用分析缓存时返回None
+        """
+        if self.analysis_cache is None:
+            return None
+        prompt_version = PromptTemplates.FILE_ANALYSIS_PROMPT_VERSION
+        if variant:
+            prompt_version = f"{prompt_version}:{variant}"
+        return AnalysisCache.make_key(file_content, prompt_version, model, temperature)
+    
+    def _request_file_analysis(self, user_prompt: str, model: str, temperature: float) -> str:
+        """
+        调用指定模型分析文件
+        
+        Args:
+            user_prompt: 文件分析提示词
+            model: 要使用的模型
+            temperature: 温度参数
+            
+        Returns:
+            str: 模型返回的文本
+        """
+        return self.openai_client.chat_completion(
+            system_prompt="你是一个代码分析专家，请分析以下代码文件并提取关键信息。",
+            user_prompt=user_prompt,
+            temperature=temperature,
+            max_tokens=Config.ANALYSIS_MAX_TOKENS,
+            model=model
+        )
+    
+    @staticmethod
+    def _parse_analysis_json(text: str) -> Optional[Dict[str, Any]]:
+        """
+        将模型返回的文本解析为分析结果，允许外层包裹```json代码块
+        
+        Args:
+            text: 模型返回的文本
+            
+        Returns:
+            Optional[Dict[str, Any]]: 分析结果，不是有效的JSON对象时返回None
+        """
+        text = (text or "").strip()
+        match = re.match(r"^```[\w-]*\s*\n(.*?)\n?```$", text, re.DOTALL)
+        if match:
+            text = match.group(1)
+        
+        try:
+            result = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        
+        return result if isinstance(result, dict) else None
@@ -1,12 +1,19 @@
 import os
 import logging
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Set, Optional, Callable
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 import re
+import threading
 
 from src.utils.code_parser import CodeParser
-from src.utils.file_handler import FileHandler
+from src.utils.file_handler import DirectorySource
+from src.utils.import_resolver import ImportResolver
+from src.utils.graph_rank import GraphRanker
+from src.utils.repo_manifest import RepoManifest
+from src.utils.token_counter import TokenCounter
 from src.models.agent import ReadmeAgent
+from config.config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -29,15 +36,36 @@ class CodeAnalyzer:
         'comments': 1.5,   # 注释密度
     }
     
-    def __init__(self, repo_path: str):
+    def __init__(
+        self,
+        repo_path: str,
+        agent: Optional[ReadmeAgent] = None,
+        progress_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+        source: Optional[Any] = None,
+        incremental: bool = True
+    ):
         """
         初始化代码分析器
         
         Args:
-            repo_path: 代码仓库路径
+            repo_path: 代码仓库路径（ZIP来源时为ZIP文件路径）
+            agent: 要使用的README生成Agent，默认新建
+            progress_callback: 进度回调，参数为阶段名称（scan、score、analyze）和进度信息
+            source: 仓库来源，提供scan、read_file和relpath接口（如FileHandler.open_zip返回的ZipFileSystem），
+                    默认读取repo_path目录
+            incremental: 是否使用文件清单增量分析（同时受Config.INCREMENTAL_ANALYSIS控制），
+                         分析每次都位于新临时目录中的仓库时应关闭，否则清单永远不会被再次读取
         """
         self.repo_path = repo_path
-        self.agent = ReadmeAgent()
+        self.source = source or DirectorySource(repo_path, ignore_entry_func=CodeParser.should_ignore_entry)
+        self.incremental = incremental
+        self.agent = agent or ReadmeAgent()
+        self.progress_callback = progress_callback
+        self.file_profiles = {}
+        self.file_sizes = {}
+        self.file_mtimes = {}
+        self.import_graph = {}
+        self.manifest = None
     
     def analyze(self) -> Dict[str, Any]:
         """
@@ -54,7 +82,7 @@ class CodeAnalyzer:
         
         # 初始化分析结果
         analysis_result = {
-            "repo_name": os.path.basename(self.repo_path),
+            "repo_name": self.source.name,
             "structure": {},
             "files_analysis": {},
             "dependencies": {},
@@ -64,33 +92,56 @@ class CodeAnalyzer:
         }
         
         try:
-            # 获取仓库结构
-            analysis_result["structure"] = FileHandler.get_repo_structure(
-                self.repo_path, 
-                ignore_func=CodeParser.should_ignore
-            )
+            # 加载上次分析的文件清单，用于跳过未变化的文件
+            if Config.INCREMENTAL_ANALYSIS and self.incremental:
+                self.manifest = RepoManifest(self.repo_path, Config.MANIFEST_DIR, self.agent.get_analysis_version())
+                self.manifest.load()
             
-            # 列出所有文件
-            all_files = FileHandler.list_files(
-                self.repo_path, 
-                ignore_func=CodeParser.should_ignore
-            )
+            # 一次遍历获取仓库结构、文件列表和文件大小
+            self._report_progress("scan")
+            scan_result = self.source.scan()
+            analysis_result["structure"] = scan_result["structure"]
+            all_files = scan_result["files"]
+            self.file_sizes = scan_result["sizes"]
+            self.file_mtimes = scan_result["mtimes"]
             
-            # 识别依赖
-            analysis_result["dependencies"] = CodeParser.identify_dependencies(self.repo_path)
+            # 识别依赖（从仓库来源读取根目录下的依赖文件）
+            rel_paths = {self._rel_path(f): f for f in all_files}
+            root_files = {name: f for name, f in rel_paths.items() if os.sep not in name}
+            analysis_result["dependencies"] = CodeParser.identify_dependencies(
+                self.repo_path,
+                read_func=lambda name: self.source.read_file(root_files[name]) if name in root_files else None
+            )
             
             # 分析关键配置文件
             self._analyze_key_files(all_files, analysis_result)
             
             # 识别核心文件
+            self._report_progress("score", files=len(all_files))
             core_files = self._identify_core_files(all_files)
-            analysis_result["core_files"] = [os.path.relpath(f, self.repo_path) for f in core_files]
+            analysis_result["core_files"] = [self._rel_path(f) for f in core_files]
             
             # 分析核心文件
             self._analyze_core_files(core_files, analysis_result)
             
-            # 转换语言集合为列表
-            analysis_result["languages"] = list(analysis_result["languages"])
+            # 保存文件清单，移除已删除的文件
+            if self.manifest is not None:
+                self.manifest.save(keep_paths=list(rel_paths))
+            
+            # 转换语言集合为有序列表，保证多次分析结果一致
+            analysis_result["languages"] = sorted(analysis_result["languages"])
+            
+            # 输出分析缓存统计
+            analysis_cache = getattr(self.agent, "analysis_cache", None)
+            if analysis_cache is not None:
+                cache_stats = analysis_cache.stats()
+                logger.info(f"分析缓存命中 {cache_stats['hits']} 次，未命中 {cache_stats['misses']} 次")
+            
+            # 输出自适应并发状态
+            concurrency_limiter = getattr(self.agent.openai_client, "concurrency_limiter", None)
+            if concurrency_limiter is not None:
+                limiter_stats = concurrency_limiter.stats()
+                logger.info(f"当前并发上限 {limiter_stats['limit']}，平均延迟 {limiter_stats['latency_ewma']} 秒")
             
             logger.info(f"代码仓库分析完成，识别到 {len(analysis_result['languages'])} 种语言，分析了 {len(analysis_result['files_analysis'])} 个文件")
             
@@ -117,8 +168,8 @@ class CodeAnalyzer:
         
         # 读取关键文件内容
         for file_path in key_files:
-            rel_path = os.path.relpath(file_path, self.repo_path)
-            file_content = FileHandler.read_file(file_path)
+            rel_path = self._rel_path(file_path)
+            file_content = self.source.read_file(file_path)
             
             # 添加到关键文件字典
             analysis_result["key_files"][rel_path] = file_content
@@ -138,16 +189,26 @@ class CodeAnalyzer:
         # 文件评分字典
         file_scores = {}
         
+        # 一次读取构建所有文件的画像，后续评分步骤均基于画像进行
+        profiles = self._build_file_profiles(all_files)
+        self.file_profiles = profiles
+        
         # 统计文件被导入的次数
-        import_counts = self._count_imports(all_files)
+        import_counts = self._count_imports(profiles)
+        
+        # 中心性排序模式下，以PageRank得分代替被导入次数
+        if Config.CORE_FILE_RANKING == 'pagerank':
+            import_counts = self._get_centrality_scores()
         
         # 分析每个文件
         for file_path in all_files:
+            profile = profiles[file_path]
+            
             # 跳过自动生成的文件
-            if self._is_generated_file(file_path):
+            if profile["is_generated"]:
                 continue
                 
-            rel_path = os.path.relpath(file_path, self.repo_path)
+            rel_path = self._rel_path(file_path)
             file_name = os.path.basename(file_path)
             
             # 跳过README文件
@@ -158,26 +219,23 @@ class CodeAnalyzer:
             score = 0
             
             # 评分因素1: 文件大小(KB)
-            try:
-                size_kb = os.path.getsize(file_path) / 1024
-                score += min(size_kb * self.WEIGHTS['size'], 10)  # 限制大小评分上限
-            except:
-                pass
+            size_kb = profile["size"] / 1024
+            score += min(size_kb * self.WEIGHTS['size'], 10)  # 限制大小评分上限
                 
             # 评分因素2: 文件路径深度
             depth = len(rel_path.split(os.sep))
             score += depth * self.WEIGHTS['depth']
             
-            # 评分因素3: 被导入次数
+            # 评分因素3: 被导入次数（或导入图中心性）
             imports = import_counts.get(rel_path, 0)
             score += imports * self.WEIGHTS['imports']
             
             # 评分因素4: 注释密度
-            comments_ratio = self._get_comments_ratio(file_path)
+            comments_ratio = profile["comments"] / profile["lines"] if profile["lines"] else 0
             score += comments_ratio * self.WEIGHTS['comments']
             
             # 评分因素5: 是否是入口文件
-            if self._is_entry_point(file_path):
+            if profile["is_entry_point"]:
                 score += 10
                 
             # 记录文件评分
@@ -202,75 +260,276 @@ class CodeAnalyzer:
             core_files: 核心文件路径列表
             analysis_result: 分析结果字典
         """
+        # 先在本线程读取文件并识别语言，清单中已有分析结果的未变化文件直接复用
+        entries = []
+        languages = {}
+        reused = {}
         for file_path in core_files:
-            rel_path = os.path.relpath(file_path, self.repo_path)
-            
-            # 读取文件内容
-            file_content = FileHandler.read_file(file_path)
+            rel_path = self._rel_path(file_path)
             
-            # 识别语言
-            language = CodeParser.identify_language(file_path)
+            # 识别语言（优先使用评分阶段已计算的画像）
+            profile = self.file_profiles.get(file_path)
+            language = profile["language"] if profile else CodeParser.identify_language(file_path)
             if language != 'Unknown':
                 analysis_result["languages"].add(language)
+            languages[rel_path] = language
             
-            # 使用Agent分析文件
-            file_analysis = self.agent.analyze_code_file(rel_path, file_content)
+            manifest_entry = self.manifest.files.get(rel_path) if self.manifest is not None else None
+            if manifest_entry and "analysis" in manifest_entry:
+                reused[rel_path] = (manifest_entry["analysis"], manifest_entry.get("content_length", 0))
+                continue
             
-            # 添加到分析结果
+            # 读取文件内容
+            file_content = self.source.read_file(file_path)
+            entries.append((rel_path, file_content, language))
+        
+        if reused:
+            logger.info(f"复用清单中 {len(reused)} 个未变化核心文件的分析结果")
+        
+        # 使用Agent分析文件，可并发执行
+        file_analyses = self._run_file_analyses(entries)
+        
+        fresh = {}
+        for (rel_path, file_content, _), file_analysis in zip(entries, file_analyses):
+            fresh[rel_path] = (file_analysis, len(file_content))
+            if self.manifest is not None:
+                self.manifest.record_analysis(rel_path, file_analysis, len(file_content))
+        
+        # 按core_files顺序添加到分析结果
+        for file_path in core_files:
+            rel_path = self._rel_path(file_path)
+            file_analysis, size = reused[rel_path] if rel_path in reused else fresh[rel_path]
             analysis_result["files_analysis"][rel_path] = {
-                "language": language,
+                "language": languages[rel_path],
                 "analysis": file_analysis,
-                "size": len(file_content),
+                "size": size,
                 "is_core": True
             }
     
-    def _count_imports(self, all_files: List[str]) -> Dict[str, int]:
+    def _run_file_analyses(self, entries: List[tuple]) -> List[Dict[str, Any]]:
         """
-        统计文件被导入的次数
+        使用有界线程池并发分析文件，小文件按token预算合并为一个请求
         
         Args:
-            all_files: 所有文件路径列表
+            entries: (相对路径, 文件内容, 语言) 元组列表
             
         Returns:
-            Dict[str, int]: 文件被导入次数的字典
+            List[Dict[str, Any]]: 与entries顺序一致的分析结果列表
         """
-        import_counts = Counter()
+        tasks = self._plan_analysis_tasks(entries)
+        max_workers = min(max(Config.ANALYSIS_MAX_WORKERS, 1), len(tasks) or 1)
         
-        for file_path in all_files:
-            content = FileHandler.read_file(file_path)
-            if not content:
+        done = 0
+        done_lock = threading.Lock()
+        self._report_progress("analyze", done=0, total=len(entries))
+        
+        def analyze(task):
+            nonlocal done
+            if len(task) == 1:
+                rel_path, file_content, _ = entries[task[0]]
+                task_result = [self.agent.analyze_code_file(rel_path, file_content)]
+            else:
+                task_result = self.agent.analyze_code_files_batch([entries[index][:2] for index in task])
+            
+            with done_lock:
+                done += len(task)
+                self._report_progress("analyze", done=done, total=len(entries))
+            return task_result
+        
+        if max_workers == 1:
+            task_results = [analyze(task) for task in tasks]
+        else:
+            logger.info(f"并发分析 {len(entries)} 个核心文件（{len(tasks)} 个请求），最大并发数: {max_workers}")
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                # executor.map按提交顺序返回结果，与完成顺序无关
+                task_results = list(executor.map(analyze, tasks))
+        
+        # 将各请求的结果放回entries中的原始位置
+        results = [None] * len(entries)
+        for task, task_result in zip(tasks, task_results):
+            for index, file_analysis in zip(task, task_result):
+                results[index] = file_analysis
+        return results
+    
+    def _rel_path(self, file_path: str) -> str:
+        """
+        获取文件相对于仓库根目录的路径
+        
+        Args:
+            file_path: 仓库来源扫描得到的文件路径
+            
+        Returns:
+            str: 相对路径
+        """
+        return self.source.relpath(file_path)
+    
+    def _report_progress(self, stage: str, **info) -> None:
+        """
+        向进度回调报告当前阶段，回调出错不影响分析
+        
+        Args:
+            stage: 阶段名称
+            **info: 进度信息
+        """
+        if self.progress_callback is None:
+            return
+        try:
+            self.progress_callback(stage, info)
+        except Exception as e:
+            logger.warning(f"进度回调出错: {str(e)}")
+    
+    def _plan_analysis_tasks(self, entries: List[tuple]) -> List[List[int]]:
+        """
+        将待分析文件划分为请求：小文件按token预算和文件数合并，其余文件单独请求
+        
+        Args:
+            entries: (相对路径, 文件内容, 语言) 元组列表
+            
+        Returns:
+            List[List[int]]: 每个请求包含的entries下标列表
+        """
+        if not Config.ANALYSIS_BATCH_ENABLED:
+            return [[index] for index in range(len(entries))]
+        
+        model = self.agent.get_analysis_model()
+        tasks = []
+        batch = []
+        batch_tokens = 0
+        for index, (_, file_content, _) in enumerate(entries):
+            tokens = TokenCounter.count(file_content, model)
+            if tokens > Config.ANALYSIS_BATCH_FILE_MAX_TOKENS:
+                tasks.append([index])
                 continue
-                
-            # 获取文件语言
-            language = CodeParser.identify_language(file_path)
             
-            # 解析导入语句
-            imported_files = CodeParser.parse_imports(content, language)
-            
-            # 将相对导入路径转换为绝对路径
-            file_dir = os.path.dirname(file_path)
-            for imp in imported_files:
-                abs_path = os.path.normpath(os.path.join(file_dir, imp))
-                if os.path.exists(abs_path):
-                    rel_path = os.path.relpath(abs_path, self.repo_path)
-                    import_counts[rel_path] += 1
-                    
-                # 处理没有扩展名的导入
-                if os.path.splitext(abs_path)[1] == '':
-                    for ext in ['.py', '.js', '.ts', '.jsx', '.tsx']:
-                        path_with_ext = abs_path + ext
-                        if os.path.exists(path_with_ext):
-                            rel_path = os.path.relpath(path_with_ext, self.repo_path)
-                            import_counts[rel_path] += 1
+            if batch and (batch_tokens + tokens > Config.ANALYSIS_BATCH_TOKEN_BUDGET
+                          or len(batch) >= Config.ANALYSIS_BATCH_MAX_FILES):
+                tasks.append(batch)
+                batch = []
+                batch_tokens = 0
+            batch.append(index)
+            batch_tokens += tokens
+        
+        if batch:
+            tasks.append(batch)
+        
+        batched = sum(len(task) for task in tasks if len(task) > 1)
+        if batched:
+            logger.info(f"{batched} 个小文件合并为 {sum(1 for task in tasks if len(task) > 1)} 个分析请求")
+        return tasks
+    
+    def _build_file_profiles(self, all_files: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        构建文件画像，每个文件只读取一次
+        
+        Args:
+            all_files: 所有文件路径列表
+            
+        Returns:
+            Dict[str, Dict[str, Any]]: 文件路径到文件画像的字典
+        """
+        return {file_path: self._profile_file(file_path) for file_path in all_files}
+    
+    def _profile_file(self, file_path: str) -> Dict[str, Any]:
+        """
+        读取一次文件并计算评分所需的全部指标
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            Dict[str, Any]: 包含大小、语言、结构化导入、注释数、行数、生成标记和入口标记的画像
+        """
+        # 优先使用遍历阶段已获取的文件大小
+        size = self.file_sizes.get(file_path)
+        if size is None:
+            try:
+                size = os.path.getsize(file_path)
+            except OSError:
+                size = 0
+        
+        # 大小和修改时间都未变化的文件直接复用清单中的画像，不再读取
+        rel_path = self._rel_path(file_path)
+        mtime = self.file_mtimes.get(file_path)
+        if self.manifest is not None and mtime is not None:
+            manifest_entry = self.manifest.lookup(rel_path, size, mtime)
+            if manifest_entry and "profile" in manifest_entry:
+                return manifest_entry["profile"]
+        
+        content = self.source.read_file(file_path)
+        language = CodeParser.identify_language(file_path)
+        
+        profile = {
+            "size": size,
+            "language": language,
+            "imports": [],
+            "comments": 0,
+            "lines": 0,
+            "is_generated": self._is_generated_file(file_path, content),
+            "is_entry_point": self._is_entry_point(file_path, content),
+        }
+        
+        if content:
+            if language == 'Python':
+                profile["imports"] = CodeParser.parse_python_imports(content)
+            profile["comments"] = len(CodeParser.extract_comments(content, language))
+            profile["lines"] = len(content.split('\n'))
+        
+        if self.manifest is not None and mtime is not None:
+            self.manifest.record_profile(rel_path, size, mtime, RepoManifest.hash_content(content), profile)
+        
+        return profile
+    
+    def _count_imports(self, profiles: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+        """
+        构建仓库导入图并统计文件被导入的次数
+        
+        Args:
+            profiles: 文件路径到文件画像的字典
+            
+        Returns:
+            Dict[str, int]: 文件相对路径到导入它的文件数量的字典
+        """
+        resolver = ImportResolver(None, [self._rel_path(file_path) for file_path in profiles])
+        imports_by_file = {
+            self._rel_path(file_path): profile["imports"]
+            for file_path, profile in profiles.items()
+            if profile["imports"]
+        }
+        self.import_graph = resolver.build_graph(imports_by_file)
+        
+        import_counts = Counter()
+        for targets in self.import_graph.values():
+            import_counts.update(targets)
         
         return import_counts
     
-    def _is_entry_point(self, file_path: str) -> bool:
+    def _get_centrality_scores(self) -> Dict[str, float]:
+        """
+        基于导入图计算文件的中心性得分
+        
+        Returns:
+            Dict[str, float]: 文件相对路径到中心性得分的字典，
+                              得分总和等于导入边数，与被导入次数的量级一致
+        """
+        ranks = GraphRanker.pagerank(self.import_graph)
+        edge_count = sum(len(targets) for targets in self.import_graph.values())
+        if not ranks or not edge_count:
+            return {}
+        
+        # 未被任何文件导入的节点得分最低，以其为基线归零
+        baseline = min(ranks.values())
+        total = sum(rank - baseline for rank in ranks.values())
+        if total <= 0:
+            return {}
+        return {path: (rank - baseline) / total * edge_count for path, rank in ranks.items()}
+    
+    def _is_entry_point(self, file_path: str, content: Optional[str] = None) -> bool:
         """
         判断文件是否可能是入口点
         
         Args:
             file_path: 文件路径
+            content: 已读取的文件内容，为None时从仓库来源读取
             
         Returns:
             bool: 是否是入口点
@@ -289,7 +548,8 @@ class CodeAnalyzer:
                 return True
                 
         # 检查文件内容中是否有main函数或类似入口点标志
-        content = FileHandler.read_file(file_path)
+        if content is None:
+            content = self.source.read_file(file_path)
         if content:
             language = CodeParser.identify_language(file_path)
             
@@ -303,12 +563,13 @@ class CodeAnalyzer:
                 
         return False
     
-    def _is_generated_file(self, file_path: str) -> bool:
+    def _is_generated_file(self, file_path: str, content: Optional[str] = None) -> bool:
         """
         判断文件是否是自动生成的
         
         Args:
             file_path: 文件路径
+            content: 已读取的文件内容，为None时从仓库来源读取
             
         Returns:
             bool: 是否是自动生成的文件
@@ -325,7 +586,8 @@ class CodeAnalyzer:
                 return True
                 
         # 检查文件内容是否包含生成标记
-        content = FileHandler.read_file(file_path)
+        if content is None:
+            content = self.source.read_file(file_path)
         if content and content.strip():
             first_lines = '\n'.join(content.split('\n')[:5])
             generated_markers = [
@@ -339,17 +601,19 @@ class CodeAnalyzer:
         
         return False
     
-    def _get_comments_ratio(self, file_path: str) -> float:
+    def _get_comments_ratio(self, file_path: str, content: Optional[str] = None) -> float:
         """
         获取文件的注释密度
         
         Args:
             file_path: 文件路径
+            content: 已读取的文件内容，为None时从仓库来源读取
             
         Returns:
             float: 注释密度（注释行数/总行数）
         """
-        content = FileHandler.read_file(file_path)
+        if content is None:
+            content = self.source.read_file(file_path)
         if not content:
             return 0
             
@@ -1,24 +1,40 @@
 import os
+import json
+import hashlib
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Iterator
 
 from src.models.agent import ReadmeAgent
+from src.utils.file_handler import FileHandler
+from src.utils.analysis_cache import AnalysisCache
+from src.utils.prompt_templates import PromptTemplates
+from src.utils.markdown_fence import MarkdownFenceStripper
+from config.config import Config
 
 logger = logging.getLogger(__name__)
 
 class ReadmeGenerator:
     """README生成服务类"""
     
-    def __init__(self):
-        """初始化GeRM"""
-        self.agent = ReadmeAgent()
+    def __init__(self, agent: Optional[ReadmeAgent] = None):
+        """
+        初始化GeRM
+        
+        Args:
+            agent: 要使用的README生成Agent，默认新建
+        """
+        self.agent = agent or ReadmeAgent()
+        self.readme_cache = None
+        if Config.README_CACHE_ENABLED:
+            self.readme_cache = AnalysisCache(Config.README_CACHE_DIR, Config.README_CACHE_MAX_BYTES)
     
-    def generate(self, repo_analysis: Dict[str, Any]) -> str:
+    def generate(self, repo_analysis: Dict[str, Any], force: bool = False) -> str:
         """
         根据仓库分析结果生成README
         
         Args:
             repo_analysis: 仓库分析结果
+            force: 是否忽略README缓存强制重新生成
             
         Returns:
             str: 生成的README内容
@@ -29,14 +45,28 @@ class ReadmeGenerator:
             # 预处理分析结果
             processed_analysis = self._preprocess_analysis(repo_analysis)
             
-            # 使用Agent生成README
-            readme_content = self.agent.generate_readme(processed_analysis)
+            # 处理后的分析结果与上次相同时直接返回缓存的README
+            cache_key = None
+            if self.readme_cache is not None:
+                cache_key = self._get_cache_key(processed_analysis)
+                if not force:
+                    cached = self.readme_cache.get(cache_key)
+                    if cached is not None:
+                        logger.info("分析结果未变化，使用缓存的README")
+                        return cached["readme"]
             
-            # 去掉开头的```markdown标识头
-            if readme_content.startswith("```markdown"):
-                readme_content = readme_content.replace("```markdown", "", 1).strip()
-            if readme_content.endswith("```"):
-                readme_content = readme_content[:-3].strip()
+            if Config.README_SECTION_PARALLEL:
+                # 各章节并发生成并按固定顺序拼接，章节内容已去除代码块标记
+                readme_content = "".join(self.agent.generate_readme_sections(processed_analysis))
+            else:
+                # 使用Agent生成README
+                readme_content = self.agent.generate_readme(processed_analysis)
+                
+                # 去掉开头的```markdown标识头和结尾的```
+                readme_content = MarkdownFenceStripper.strip(readme_content)
+            
+            if cache_key is not None:
+                self.readme_cache.put(cache_key, {"readme": readme_content})
             
             logger.info("README生成成功")
             return readme_content
@@ -45,6 +75,92 @@ class ReadmeGenerator:
             logger.error(f"生成README失败: {str(e)}")
             raise
     
+    def generate_stream(self, repo_analysis: Dict[str, Any], force: bool = False) -> Iterator[str]:
+        """
+        根据仓库分析结果流式生成README，边接收边去除外层代码块标记
+        
+        Args:
+            repo_analysis: 仓库分析结果
+            force: 是否忽略README缓存强制重新生成
+            
+        Yields:
+            str: README内容片段，全部拼接后与generate的结果一致
+        """
+        logger.info("开始流式生成README内容")
+        
+        try:
+            # 预处理分析结果
+            processed_analysis = self._preprocess_analysis(repo_analysis)
+            
+            # 处理后的分析结果与上次相同时直接返回缓存的README
+            cache_key = None
+            if self.readme_cache is not None:
+                cache_key = self._get_cache_key(processed_analysis)
+                if not force:
+                    cached = self.readme_cache.get(cache_key)
+                    if cached is not None:
+                        logger.info("分析结果未变化，使用缓存的README")
+                        yield cached["readme"]
+                        return
+            
+            parts = []
+            if Config.README_SECTION_PARALLEL:
+                # 分章节模式下按顺序逐个输出已完成的章节
+                for text in self.agent.generate_readme_sections(processed_analysis):
+                    parts.append(text)
+                    yield text
+                
+                if cache_key is not None:
+                    self.readme_cache.put(cache_key, {"readme": "".join(parts)})
+                
+                logger.info("README流式生成成功")
+                return
+            
+            stripper = MarkdownFenceStripper()
+            for chunk in self.agent.generate_readme_stream(processed_analysis):
+                text = stripper.feed(chunk)
+                if text:
+                    parts.append(text)
+                    yield text
+            
+            text = stripper.finish()
+            if text:
+                parts.append(text)
+                yield text
+            
+            if cache_key is not None:
+                self.readme_cache.put(cache_key, {"readme": "".join(parts)})
+            
+            logger.info("README流式生成成功")
+            
+        except Exception as e:
+            logger.error(f"流式生成README失败: {str(e)}")
+            raise
+    
+    def _get_cache_key(self, processed_analysis: Dict[str, Any]) -> str:
+        """
+        根据处理后的分析结果、提示词和模型参数计算README缓存键
+        
+        Args:
+            processed_analysis: 处理后的分析结果
+            
+        Returns:
+            str: 缓存键（sha256十六进制）
+        """
+        client = self.agent.openai_client
+        key_source = json.dumps({
+            "analysis": processed_analysis,
+            "system_prompt": self.agent.system_prompt,
+            "prompt_template": PromptTemplates.get_readme_generation_prompt({}),
+            "model": str(client.model),
+            "temperature": str(client.temperature),
+            "max_tokens": str(client.max_tokens),
+            "token_budget": Config.README_PROMPT_TOKEN_BUDGET,
+            "sections": PromptTemplates.README_SECTIONS if Config.README_SECTION_PARALLEL else None,
+            "section_max_tokens": Config.README_SECTION_MAX_TOKENS if Config.README_SECTION_PARALLEL else None,
+        }, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+    
     def _preprocess_analysis(self, repo_analysis: Dict[str, Any]) -> Dict[str, Any]:
         """
         预处理仓库分析结果
@@ -57,9 +173,18 @@ class ReadmeGenerator:
         """
         processed = repo_analysis.copy()
         
-        # 如果languages是集合，转换为列表
+        # 如果languages是集合，转换为有序列表
         if isinstance(processed.get("languages"), set):
-            processed["languages"] = list(processed["languages"])
+            processed["languages"] = sorted(processed["languages"])
+        
+        # 将嵌套的仓库结构渲染为紧凑文本树，原始结构仍保留在repo_analysis中
+        if isinstance(processed.get("structure"), dict):
+            processed["structure"] = FileHandler.render_tree(
+                processed["structure"],
+                max_depth=Config.STRUCTURE_MAX_DEPTH,
+                max_children=Config.STRUCTURE_MAX_CHILDREN,
+                collapse_threshold=Config.STRUCTURE_COLLAPSE_THRESHOLD
+            )
         
         # 优先处理核心文件
         core_files = processed.get("core_files", [])
@@ -0,0 +1,189 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+from typing import Dict, Any, Optional
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    """基于内容寻址的文件分析结果磁盘缓存，按总大小进行LRU淘汰"""
+
+    _shared_instance = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None  # 键 -> (大小, 最近访问时间)，首次使用时加载
+        self._total_bytes = 0
+
+    @classmethod
+    def get_shared(cls) -> Optional["AnalysisCache"]:
+        """
+        获取进程内共享的缓存实例
+
+        Returns:
+            Optional[AnalysisCache]: 缓存实例，配置中禁用缓存时返回None
+        """
+        if not Config.ANALYSIS_CACHE_ENABLED:
+            return None
+
+        with cls._shared_lock:
+            if cls._shared_instance is None:
+                cls._shared_instance = cls(Config.ANALYSIS_CACHE_DIR, Config.ANALYSIS_CACHE_MAX_BYTES)
+            return cls._shared_instance
+
+    @staticmethod
+    def make_key(file_content: str, prompt_version: str, model: str, temperature: float) -> str:
+        """
+        根据文件内容、提示词版本、模型和温度生成缓存键
+
+        Args:
+            file_content: 文件内容
+            prompt_version: 提示词模板版本
+            model: 模型名称
+            temperature: 温度参数
+
+        Returns:
+            str: 缓存键（sha256十六进制）
+        """
+        content_hash = hashlib.sha256(file_content.encode('utf-8', errors='replace')).hexdigest()
+        key_source = json.dumps([content_hash, prompt_version, model, temperature])
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存条目，命中时刷新其访问时间
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Dict[str, Any]]: 缓存的分析结果，未命中时返回None
+        """
+        with self._lock:
+            self._load_index()
+            path = self._entry_path(key)
+
+            if key not in self._index:
+                self.misses += 1
+                return None
+
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    value = json.load(f)
+                os.utime(path)
+                self._index[key] = (self._index[key][0], os.path.getmtime(path))
+                self.hits += 1
+                return value
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取分析缓存 {key} 失败: {str(e)}")
+                self._forget(key)
+                self.misses += 1
+                return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        """
+        写入缓存条目，超出大小上限时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            value: 分析结果
+        """
+        data = json.dumps(value, ensure_ascii=False).encode('utf-8')
+
+        with self._lock:
+            self._load_index()
+            path = self._entry_path(key)
+
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # 先写临时文件再原子替换，避免并发读到半写入的条目
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"写入分析缓存 {key} 失败: {str(e)}")
+                return
+
+            self._forget(key, remove_file=False)
+            self._index[key] = (len(data), os.path.getmtime(path))
+            self._total_bytes += len(data)
+            self._evict()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict[str, Any]: 命中数、未命中数、条目数和占用字节数
+        """
+        with self._lock:
+            self._load_index()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+            }
+
+    def _entry_path(self, key: str) -> str:
+        """获取缓存条目的文件路径"""
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_index(self) -> None:
+        """从缓存目录加载条目索引"""
+        if self._index is not None:
+            return
+
+        self._index = {}
+        self._total_bytes = 0
+        if not os.path.isdir(self.cache_dir):
+            return
+
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.json'):
+                    continue
+                stat = entry.stat()
+                self._index[entry.name[:-5]] = (stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+
+        self._evict()
+
+    def _forget(self, key: str, remove_file: bool = True) -> None:
+        """从索引中移除条目，可选地删除对应文件"""
+        entry = self._index.pop(key, None)
+        if entry:
+            self._total_bytes -= entry[0]
+        if remove_file:
+            try:
+                os.remove(self._entry_path(key))
+            except OSError:
+                pass
+
+    def _evict(self) -> None:
+        """按最近访问时间淘汰条目，直到总大小不超过上限"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        for key, _ in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._forget(key)
@@ -0,0 +1,137 @@
+import re
+import logging
+from typing import List, Tuple
+
+from src.utils.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+class CodeChunker:
+    """将大文件按顶层定义切分为不超过token上限的分块，用于分块分析"""
+
+    # 顶层定义的起始行：不缩进的函数、类、结构体等定义以及装饰器
+    TOP_LEVEL_PATTERN = re.compile(
+        r'^(?:@|(?:export\s+)?(?:default\s+)?(?:async\s+)?'
+        r'(?:def|class|function|func|fn|impl|struct|enum|trait|interface|type|module|'
+        r'public|private|protected|static|const|let|var|pub)\b)'
+    )
+
+    @classmethod
+    def split(cls, content: str, max_tokens: int, model: str) -> List[str]:
+        """
+        将内容切分为分块，优先在顶层定义处切分，单个定义超出上限时按行切分
+
+        Args:
+            content: 文件内容
+            max_tokens: 每个分块的token上限
+            model: 用于计数的模型名称
+
+        Returns:
+            List[str]: 按原始顺序排列的分块，拼接后与原内容一致
+        """
+        chunks = []
+        current = ""
+        current_tokens = 0
+
+        for segment in cls._split_top_level(content):
+            segment_tokens = TokenCounter.count(segment, model)
+
+            if segment_tokens > max_tokens:
+                # 过大的定义按行进一步切分
+                if current:
+                    chunks.append(current)
+                    current, current_tokens = "", 0
+                chunks.extend(cls._split_lines(segment, max_tokens, model))
+                continue
+
+            if current and current_tokens + segment_tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = "", 0
+
+            current += segment
+            current_tokens += segment_tokens
+
+        if current:
+            chunks.append(current)
+
+        return chunks
+
+    @classmethod
+    def limit_tokens(cls, chunks: List[str], token_cap: int, model: str) -> Tuple[List[str], int]:
+        """
+        按文件级token上限截取分块，控制单个文件的分析成本
+
+        Args:
+            chunks: 分块列表
+            token_cap: 单个文件允许分析的token总数，0表示不限制
+            model: 用于计数的模型名称
+
+        Returns:
+            Tuple[List[str], int]: 保留的分块，以及被丢弃的分块数
+        """
+        if not token_cap:
+            return chunks, 0
+
+        kept = []
+        total = 0
+        for chunk in chunks:
+            tokens = TokenCounter.count(chunk, model)
+            if kept and total + tokens > token_cap:
+                break
+            kept.append(chunk)
+            total += tokens
+
+        return kept, len(chunks) - len(kept)
+
+    @classmethod
+    def _split_top_level(cls, content: str) -> List[str]:
+        """在每个顶层定义（包括其前面的装饰器）开始处切分内容"""
+        segments = []
+        current = []
+        previous_is_decorator = False
+
+        for line in content.splitlines(keepends=True):
+            is_boundary = bool(cls.TOP_LEVEL_PATTERN.match(line))
+            # 紧跟在装饰器后面的定义与装饰器属于同一段
+            if is_boundary and current and not previous_is_decorator:
+                segments.append("".join(current))
+                current = []
+            current.append(line)
+            if line.strip():
+                previous_is_decorator = line.startswith('@')
+
+        if current:
+            segments.append("".join(current))
+
+        return segments
+
+    @classmethod
+    def _split_lines(cls, segment: str, max_tokens: int, model: str) -> List[str]:
+        """按行累积切分过大的段，单行超出上限时按字符切分"""
+        chunks = []
+        current = ""
+        current_tokens = 0
+
+        for line in segment.splitlines(keepends=True):
+            line_tokens = TokenCounter.count(line, model)
+
+            if line_tokens > max_tokens:
+                if current:
+                    chunks.append(current)
+                    current, current_tokens = "", 0
+                # 按token数比例估算每段字符数
+                step = max(1, len(line) * max_tokens // line_tokens)
+                chunks.extend(line[i:i + step] for i in range(0, len(line), step))
+                continue
+
+            if current and current_tokens + line_tokens > max_tokens:
+                chunks.append(current)
+                current, current_tokens = "", 0
+
+            current += line
+            current_tokens += line_tokens
+
+        if current:
+            chunks.append(current)
+
+        return chunks
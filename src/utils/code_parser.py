@@ -1,6 +1,8 @@
 import os
+import re
+import ast
 import logging
-from typing import Dict, List, Set, Any
+from typing import Dict, List, Set, Any, Optional
 
 logger = logging.getLogger(__name__)
 
@@ -72,6 +74,22 @@ class CodeParser:
             
         return False
     
+    @classmethod
+    def should_ignore_entry(cls, name: str, is_dir: bool) -> bool:
+        """
+        根据条目名称判断是否应该忽略，用于逐级遍历时在目录层级剪枝
+        
+        Args:
+            name: 文件或目录名称
+            is_dir: 是否为目录
+            
+        Returns:
+            bool: 是否忽略
+        """
+        if is_dir:
+            return name in cls.IGNORED_DIRS
+        return name in cls.IGNORED_FILES
+    
     @classmethod
     def parse_imports(cls, content: str, language: str) -> List[str]:
         """解析文件中的导入语句"""
@@ -90,6 +108,110 @@ class CodeParser:
         
         return imports
     
+    @classmethod
+    def parse_python_imports(cls, content: str) -> List[Dict[str, Any]]:
+        """
+        解析Python文件中的结构化导入语句
+        
+        Args:
+            content: 文件内容
+            
+        Returns:
+            List[Dict[str, Any]]: 导入列表，每项包含module（模块名）、names（导入的名称）和level（相对导入层级）
+        """
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            # 无法解析（如Python 2代码）时退回到逐行匹配
+            return cls._parse_python_imports_by_line(content)
+        
+        imports = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    imports.append({"module": alias.name, "names": [], "level": 0})
+            elif isinstance(node, ast.ImportFrom):
+                imports.append({
+                    "module": node.module or "",
+                    "names": [alias.name for alias in node.names],
+                    "level": node.level
+                })
+        
+        return imports
+    
+    @classmethod
+    def extract_python_structure(cls, content: str) -> Optional[Dict[str, Any]]:
+        """
+        使用ast静态提取Python文件的顶层类和函数、文档字符串及依赖
+        
+        Args:
+            content: 文件内容
+            
+        Returns:
+            Optional[Dict[str, Any]]: 包含docstring（模块文档字符串首行）、components（顶层类和函数名）、
+            docstrings（组件名到文档字符串首行）、dependencies（导入的模块）和lines（有效行数），无法解析时返回None
+        """
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError):
+            return None
+        
+        components = []
+        docstrings = {}
+        for node in tree.body:
+            if isinstance(node, (ast.ClassDef, ast.FunctionDef, ast.AsyncFunctionDef)):
+                components.append(node.name)
+                docstring = cls._first_docstring_line(node)
+                if docstring:
+                    docstrings[node.name] = docstring
+        
+        # 依赖按首次出现的顺序去重，相对导入保留前导点号
+        dependencies = []
+        for item in cls.parse_python_imports(content):
+            module = "." * item["level"] + item["module"]
+            if module and module not in dependencies:
+                dependencies.append(module)
+        
+        return {
+            "docstring": cls._first_docstring_line(tree),
+            "components": components,
+            "docstrings": docstrings,
+            "dependencies": dependencies,
+            "lines": sum(1 for line in content.split('\n') if line.strip() and not line.strip().startswith('#')),
+        }
+    
+    @staticmethod
+    def _first_docstring_line(node: ast.AST) -> str:
+        """获取模块、类或函数文档字符串的首个非空行"""
+        docstring = ast.get_docstring(node) or ""
+        for line in docstring.split('\n'):
+            if line.strip():
+                return line.strip()
+        return ""
+    
+    @classmethod
+    def _parse_python_imports_by_line(cls, content: str) -> List[Dict[str, Any]]:
+        """逐行匹配Python导入语句，用于无法进行语法解析的文件"""
+        imports = []
+        from_pattern = re.compile(r'^from\s+(\.*)([\w.]*)\s+import\s+\(?([\w\s,*]+)')
+        import_pattern = re.compile(r'^import\s+([\w.\s,]+)')
+        
+        for line in content.split('\n'):
+            line = line.strip()
+            match = from_pattern.match(line)
+            if match:
+                names = [name.strip().split()[0] for name in match.group(3).split(',') if name.strip()]
+                imports.append({"module": match.group(2), "names": names, "level": len(match.group(1))})
+                continue
+            
+            match = import_pattern.match(line)
+            if match:
+                for name in match.group(1).split(','):
+                    if name.strip():
+                        imports.append({"module": name.strip().split()[0], "names": [], "level": 0})
+        
+        return imports
+    
     @classmethod
     def extract_comments(cls, content: str, language: str) -> List[str]:
         """提取文件中的注释"""
@@ -109,30 +231,45 @@ class CodeParser:
         return comments
     
     @classmethod
-    def identify_dependencies(cls, repo_path: str) -> Dict[str, Any]:
-        """识别项目依赖"""
+    def identify_dependencies(cls, repo_path: str, read_func: Optional[callable] = None) -> Dict[str, Any]:
+        """
+        识别项目依赖
+        
+        Args:
+            repo_path: 仓库路径
+            read_func: 按文件名读取仓库根目录下文件的函数，文件不存在时返回None；默认从repo_path读取
+            
+        Returns:
+            Dict[str, Any]: 依赖文件名到依赖内容的字典
+        """
         dependencies = {}
         
+        if read_func is None:
+            def read_func(file_name):
+                file_path = os.path.join(repo_path, file_name)
+                if not os.path.exists(file_path):
+                    return None
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+        
         # 检查Python依赖
         req_files = ['requirements.txt', 'Pipfile', 'pyproject.toml']
         for req_file in req_files:
-            req_path = os.path.join(repo_path, req_file)
-            if os.path.exists(req_path):
-                with open(req_path, 'r', encoding='utf-8') as f:
-                    dependencies[req_file] = f.read()
+            content = read_func(req_file)
+            if content is not None:
+                dependencies[req_file] = content
         
         # 检查JavaScript依赖
-        package_json = os.path.join(repo_path, 'package.json')
-        if os.path.exists(package_json):
-            try:
+        try:
+            content = read_func('package.json')
+            if content is not None:
                 import json
-                with open(package_json, 'r', encoding='utf-8') as f:
-                    package_data = json.load(f)
-                    if 'dependencies' in package_data:
-                        dependencies['package.json:dependencies'] = package_data['dependencies']
-                    if 'devDependencies' in package_data:
-                        dependencies['package.json:devDependencies'] = package_data['devDependencies']
-            except Exception as e:
-                logger.error(f"解析package.json失败: {str(e)}")
+                package_data = json.loads(content)
+                if 'dependencies' in package_data:
+                    dependencies['package.json:dependencies'] = package_data['dependencies']
+                if 'devDependencies' in package_data:
+                    dependencies['package.json:devDependencies'] = package_data['devDependencies']
+        except Exception as e:
+            logger.error(f"解析package.json失败: {str(e)}")
         
         return dependencies
@@ -1,6 +1,9 @@
 import os
 import logging
-from typing import Dict, List, Set, Any, Optional
+import tempfile
+from typing import Dict, List, Set, Any, Optional, Iterable
+
+from src.utils.zip_filesystem import ZipFileSystem
 
 logger = logging.getLogger(__name__)
 
@@ -60,6 +63,45 @@ class FileHandler:
             logger.error(f"写入文件 {file_path} 失败: {str(e)}")
             return False
     
+    @staticmethod
+    def write_file_stream(file_path: str, chunks: Iterable[str], encoding: str = 'utf-8') -> bool:
+        """
+        逐块写入文件内容
+        
+        内容先写入同一目录下的临时文件，全部写入后再原子替换目标文件；
+        生成或写入中途失败时删除临时文件，已有的目标文件保持不变。
+        
+        Args:
+            file_path: 文件路径
+            chunks: 要写入的内容片段，生成片段时抛出的异常会原样抛出
+            encoding: 文件编码，默认utf-8
+            
+        Returns:
+            bool: 是否成功写入
+        """
+        tmp_path = None
+        try:
+            # 确保目录存在
+            file_dir = os.path.dirname(os.path.abspath(file_path))
+            os.makedirs(file_dir, exist_ok=True)
+            
+            fd, tmp_path = tempfile.mkstemp(dir=file_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding=encoding) as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp_path, file_path)
+            tmp_path = None
+            return True
+        except OSError as e:
+            logger.error(f"写入文件 {file_path} 失败: {str(e)}")
+            return False
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+    
     @staticmethod
     def list_files(dir_path: str, ignore_func: Optional[callable] = None) -> List[str]:
         """
@@ -138,3 +180,235 @@ class FileHandler:
         except Exception as e:
             logger.error(f"获取仓库 {repo_path} 结构失败: {str(e)}")
             return {"name": os.path.basename(repo_path), "type": "directory", "children": [], "error": str(e)}
+
+    
+    @staticmethod
+    def scan_repo(repo_path: str, ignore_entry_func: Optional[callable] = None) -> Dict[str, Any]:
+        """
+        使用一次os.scandir遍历同时获取仓库结构、文件列表和文件大小
+        
+        被忽略的目录在目录层级直接剪枝，不会进入其中遍历；指向目录的符号链接不会被跟随。
+        
+        Args:
+            repo_path: 仓库路径
+            ignore_entry_func: 判断是否忽略条目的函数，参数为(条目名称, 是否为目录)
+            
+        Returns:
+            Dict[str, Any]: 包含structure（与get_repo_structure格式相同的结构）、
+                            files（文件路径列表）、sizes（文件路径到字节数的字典）
+                            和mtimes（文件路径到修改时间的字典）
+        """
+        structure = {"name": os.path.basename(repo_path), "type": "directory", "children": []}
+        files = []
+        sizes = {}
+        mtimes = {}
+        
+        def scan(path, parent):
+            """递归扫描目录"""
+            try:
+                with os.scandir(path) as it:
+                    entries = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                logger.warning(f"扫描目录 {path} 失败: {str(e)}")
+                return
+            
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if not is_dir and entry.is_symlink() and os.path.isdir(entry.path):
+                        continue
+                except OSError:
+                    continue
+                
+                # 如果提供了忽略函数，过滤文件和目录
+                if ignore_entry_func and ignore_entry_func(entry.name, is_dir):
+                    continue
+                
+                if is_dir:
+                    dir_node = {"name": entry.name, "type": "directory", "children": []}
+                    parent["children"].append(dir_node)
+                    scan(entry.path, dir_node)
+                else:
+                    parent["children"].append({"name": entry.name, "type": "file"})
+                    files.append(entry.path)
+                    try:
+                        stat = entry.stat()
+                        sizes[entry.path] = stat.st_size
+                        mtimes[entry.path] = stat.st_mtime
+                    except OSError:
+                        sizes[entry.path] = 0
+        
+        scan(repo_path, structure)
+        return {"structure": structure, "files": files, "sizes": sizes, "mtimes": mtimes}
+    
+    @staticmethod
+    def open_zip(
+        zip_path: str,
+        ignore_entry_func: Optional[callable] = None,
+        max_entry_bytes: int = 0,
+        max_total_bytes: int = 0,
+        max_entries: int = 0
+    ) -> ZipFileSystem:
+        """
+        以虚拟文件系统方式打开ZIP文件，可直接扫描和读取其中的文件而无需先全部解压
+        
+        返回的ZipFileSystem与DirectorySource接口相同，可作为仓库来源传给CodeAnalyzer。
+        忽略规则和大小限制在解压任何数据之前按中央目录检查，读取时再按实际解压字节数检查。
+        
+        Args:
+            zip_path: ZIP文件路径
+            ignore_entry_func: 判断是否忽略条目的函数，参数为(条目名称, 是否为目录)
+            max_entry_bytes: 单个文件解压后的大小上限，0表示不限制
+            max_total_bytes: 所有保留文件解压后的总大小上限，0表示不限制
+            max_entries: 保留文件数上限，0表示不限制
+            
+        Returns:
+            ZipFileSystem: ZIP虚拟文件系统，使用完毕后需关闭
+            
+        Raises:
+            zipfile.BadZipFile: 文件不是有效的ZIP文件时
+            ZipLimitError: 条目数或声明的解压大小超出限制时
+        """
+        return ZipFileSystem(
+            zip_path,
+            ignore_entry_func=ignore_entry_func,
+            max_entry_bytes=max_entry_bytes,
+            max_total_bytes=max_total_bytes,
+            max_entries=max_entries
+        )
+    
+    @staticmethod
+    def render_tree(
+        structure: Dict[str, Any],
+        max_depth: int = 4,
+        max_children: int = 20,
+        collapse_threshold: int = 8
+    ) -> str:
+        """
+        将仓库结构渲染为紧凑的缩进文本树
+        
+        Args:
+            structure: get_repo_structure返回的嵌套结构
+            max_depth: 展开的最大目录深度，更深的目录只显示文件数量
+            max_children: 每个目录最多显示的条目数，其余合并为"... N more"
+            collapse_threshold: 同一扩展名的文件数达到该值时合并为"N *.ext files"
+            
+        Returns:
+            str: 文本树，目录以/结尾，每级缩进两个空格
+        """
+        def count_files(node):
+            """递归统计目录中的文件数"""
+            return sum(
+                count_files(child) if child.get("type") == "directory" else 1
+                for child in node.get("children", [])
+            )
+        
+        def render(node, depth, lines):
+            """递归渲染目录节点"""
+            indent = "  " * depth
+            children = node.get("children", [])
+            
+            if depth > 0 and depth >= max_depth and children:
+                file_count = count_files(node)
+                lines.append(f"{indent}{node['name']}/ ({file_count} file{'s' if file_count != 1 else ''})")
+                return
+            lines.append(f"{indent}{node['name']}/")
+            
+            child_indent = "  " * (depth + 1)
+            dirs = [child for child in children if child.get("type") == "directory"]
+            files = [child for child in children if child.get("type") != "directory"]
+            
+            # 按扩展名分组，数量较多的同类文件合并为一行
+            files_by_ext = {}
+            for child in files:
+                ext = os.path.splitext(child["name"])[1]
+                files_by_ext.setdefault(ext, []).append(child)
+            
+            entries = [("dir", child) for child in dirs]
+            for child in files:
+                ext = os.path.splitext(child["name"])[1]
+                group = files_by_ext[ext]
+                if ext and len(group) >= collapse_threshold:
+                    if group[0] is child:
+                        entries.append(("group", (ext, len(group))))
+                else:
+                    entries.append(("file", child))
+            
+            for kind, entry in entries[:max_children]:
+                if kind == "dir":
+                    render(entry, depth + 1, lines)
+                elif kind == "group":
+                    lines.append(f"{child_indent}{entry[1]} *{entry[0]} files")
+                else:
+                    lines.append(f"{child_indent}{entry['name']}")
+            
+            if len(entries) > max_children:
+                lines.append(f"{child_indent}... {len(entries) - max_children} more")
+        
+        lines = []
+        render(structure, 0, lines)
+        return "\n".join(lines)
+
+
+class DirectorySource:
+    """
+    基于本地目录的仓库来源
+    
+    与FileHandler.open_zip返回的ZipFileSystem提供相同的scan、read_file和relpath接口，
+    CodeAnalyzer通过该接口读取仓库，而不关心仓库位于目录还是ZIP文件中。
+    """
+    
+    def __init__(self, repo_path: str, ignore_entry_func: Optional[callable] = None):
+        """
+        初始化目录仓库来源
+        
+        Args:
+            repo_path: 仓库路径
+            ignore_entry_func: 判断是否忽略条目的函数，参数为(条目名称, 是否为目录)
+        """
+        self.repo_path = repo_path
+        self.name = os.path.basename(repo_path)
+        self.ignore_entry_func = ignore_entry_func
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def close(self) -> None:
+        """目录来源无需释放资源"""
+    
+    def scan(self) -> Dict[str, Any]:
+        """
+        遍历目录获取仓库结构、文件列表、文件大小和修改时间
+        
+        Returns:
+            Dict[str, Any]: FileHandler.scan_repo的结果，文件路径为完整路径
+        """
+        return FileHandler.scan_repo(self.repo_path, ignore_entry_func=self.ignore_entry_func)
+    
+    def read_file(self, path: str, encoding: str = 'utf-8') -> str:
+        """
+        读取文件内容
+        
+        Args:
+            path: scan返回的文件路径
+            encoding: 文件编码，默认utf-8
+            
+        Returns:
+            str: 文件内容
+        """
+        return FileHandler.read_file(path, encoding)
+    
+    def relpath(self, path: str) -> str:
+        """
+        获取文件相对于仓库根目录的路径
+        
+        Args:
+            path: scan返回的文件路径
+            
+        Returns:
+            str: 相对路径
+        """
+        return os.path.relpath(path, self.repo_path)
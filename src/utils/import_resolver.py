@@ -0,0 +1,194 @@
+import os
+import logging
+from typing import Dict, List, Set, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ImportResolver:
+    """Python模块解析器，将导入语句解析为仓库内的文件"""
+
+    # 常见的源码根目录（当其本身不是包时，其下的包可以直接被导入）
+    SOURCE_ROOTS = ('src', 'lib', 'python')
+
+    def __init__(self, repo_path: Optional[str], file_paths: List[str]):
+        """
+        初始化模块解析器并建立模块索引
+
+        Args:
+            repo_path: 仓库路径，为None时file_paths已是相对于仓库根目录的路径
+            file_paths: 仓库内所有文件的绝对路径列表
+        """
+        self.repo_path = repo_path
+        # 源码根目录(相对路径，''表示仓库根目录) -> {模块名: 相对文件路径}
+        self.modules = {}
+        # 属于包的目录（包含__init__.py）
+        self.packages = set()
+
+        if repo_path is not None:
+            file_paths = [os.path.relpath(f, repo_path) for f in file_paths]
+        rel_paths = [f for f in file_paths if f.endswith('.py')]
+        self.files = set(rel_paths)
+        for rel_path in rel_paths:
+            if os.path.basename(rel_path) == '__init__.py':
+                self.packages.add(os.path.dirname(rel_path))
+
+        roots = [''] + [root for root in self.SOURCE_ROOTS if root not in self.packages]
+        for root in roots:
+            self.modules[root] = {}
+
+        for rel_path in rel_paths:
+            for root in roots:
+                module_name = self._module_name(rel_path, root)
+                if module_name:
+                    self.modules[root][module_name] = rel_path
+
+    @staticmethod
+    def _module_name(rel_path: str, root: str) -> Optional[str]:
+        """
+        计算文件相对于源码根目录的模块名
+
+        Args:
+            rel_path: 文件相对路径
+            root: 源码根目录
+
+        Returns:
+            Optional[str]: 模块名，文件不在该根目录下时返回None
+        """
+        if root:
+            prefix = root + os.sep
+            if not rel_path.startswith(prefix):
+                return None
+            rel_path = rel_path[len(prefix):]
+
+        parts = os.path.splitext(rel_path)[0].split(os.sep)
+        if parts[-1] == '__init__':
+            parts = parts[:-1]
+        if not parts or not all(part.isidentifier() for part in parts):
+            return None
+        return '.'.join(parts)
+
+    def resolve(self, importer: str, imp: Dict[str, Any]) -> List[str]:
+        """
+        将单条导入语句解析为仓库内的文件
+
+        Args:
+            importer: 发起导入的文件相对路径
+            imp: CodeParser.parse_python_imports返回的导入项
+
+        Returns:
+            List[str]: 被导入文件的相对路径列表
+        """
+        module = imp.get("module", "")
+        names = imp.get("names", [])
+        level = imp.get("level", 0)
+        importer_dir = os.path.dirname(importer)
+
+        if level:
+            # 相对导入：从所在包向上回溯level-1层
+            base_parts = importer_dir.split(os.sep) if importer_dir else []
+            if level - 1 > len(base_parts):
+                return []
+            base_dir = os.sep.join(base_parts[:len(base_parts) - (level - 1)])
+            return self._resolve_path(base_dir, module, names)
+
+        for index in self.modules.values():
+            targets = self._resolve_in(index, module, names)
+            if targets:
+                return targets
+
+        # 非包目录下的脚本可以直接导入同目录的模块
+        if importer_dir not in self.packages:
+            return self._resolve_path(importer_dir, module, names)
+        return []
+
+    @staticmethod
+    def _resolve_in(index: Dict[str, str], module: str, names: List[str]) -> List[str]:
+        """
+        在模块索引中解析绝对导入
+
+        Args:
+            index: 模块名到文件路径的索引
+            module: 模块名
+            names: from导入的名称列表
+
+        Returns:
+            List[str]: 被导入文件的相对路径列表
+        """
+        targets = []
+
+        # from package import submodule 形式优先解析为子模块
+        for name in names:
+            if name == '*':
+                continue
+            submodule = f"{module}.{name}" if module else name
+            if submodule in index:
+                targets.append(index[submodule])
+        if targets:
+            return targets
+
+        # 按最长前缀匹配模块（from a.b import func 解析为 a.b）
+        parts = module.split('.') if module else []
+        while parts:
+            candidate = '.'.join(parts)
+            if candidate in index:
+                return [index[candidate]]
+            parts.pop()
+
+        return []
+
+    def _resolve_path(self, base_dir: str, module: str, names: List[str]) -> List[str]:
+        """
+        以目录为基准按路径解析导入
+
+        Args:
+            base_dir: 基准目录相对路径
+            module: 模块名（相对于基准目录）
+            names: from导入的名称列表
+
+        Returns:
+            List[str]: 被导入文件的相对路径列表
+        """
+        module_dir = os.path.join(base_dir, *module.split('.')) if module else base_dir
+        targets = []
+
+        # from . import submodule 形式优先解析为子模块
+        for name in names:
+            if name == '*':
+                continue
+            target = self._module_file(os.path.join(module_dir, name))
+            if target:
+                targets.append(target)
+        if targets:
+            return targets
+
+        target = self._module_file(module_dir) if module else self._module_file(base_dir, package_only=True)
+        return [target] if target else []
+
+    def _module_file(self, module_path: str, package_only: bool = False) -> Optional[str]:
+        """获取模块路径对应的文件（模块文件或包的__init__.py）"""
+        module_path = os.path.normpath(module_path) if module_path else ''
+        if not package_only and module_path + '.py' in self.files:
+            return module_path + '.py'
+        init_path = os.path.join(module_path, '__init__.py')
+        if init_path in self.files:
+            return init_path
+        return None
+
+    def build_graph(self, imports_by_file: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Set[str]]:
+        """
+        一次性构建整个仓库的导入图
+
+        Args:
+            imports_by_file: 文件相对路径到结构化导入列表的字典
+
+        Returns:
+            Dict[str, Set[str]]: 文件相对路径到其导入的仓库内文件集合的字典
+        """
+        graph = {}
+        for importer, imports in imports_by_file.items():
+            targets = set()
+            for imp in imports:
+                targets.update(self.resolve(importer, imp))
+            targets.discard(importer)
+            graph[importer] = targets
+        return graph
@@ -0,0 +1,98 @@
+class MarkdownFenceStripper:
+    """
+    增量去除模型输出外层的```markdown代码块标记
+
+    与一次性处理的规则一致：内容以```markdown开头时去除该标记及内容首尾的空白，
+    内容以```结尾时去除该标记及内容首尾的空白，其他内容原样保留。
+    逐块输入流式输出，其余内容尽快原样输出；可能属于结尾标记的空白和反引号会暂存，直到确认其后还有内容。
+    唯一的差别是：没有开头标记、以空白开头且以```结尾的内容，流式输出时开头的空白已经输出，不会被去除。
+    """
+
+    OPENING_FENCE = "```markdown"
+    CLOSING_FENCE = "```"
+
+    def __init__(self):
+        """初始化去除器"""
+        self._head = ""          # 尚未确认是否为开头标记的内容
+        self._head_done = False
+        self._fenced = False     # 内容是否以开头标记开始
+        self._skip_whitespace = False
+        self._tail = ""          # 暂存的结尾空白和反引号
+
+    def feed(self, chunk: str) -> str:
+        """
+        输入一块内容
+
+        Args:
+            chunk: 流式输出的一块文本
+
+        Returns:
+            str: 可以立即输出的文本
+        """
+        if not chunk:
+            return ""
+
+        if not self._head_done:
+            self._head += chunk
+            if len(self._head) < len(self.OPENING_FENCE) and self.OPENING_FENCE.startswith(self._head):
+                return ""
+
+            self._head_done = True
+            chunk, self._head = self._head, ""
+            if chunk.startswith(self.OPENING_FENCE):
+                self._fenced = True
+                chunk = chunk[len(self.OPENING_FENCE):].lstrip()
+                self._skip_whitespace = not chunk
+
+        elif self._skip_whitespace:
+            chunk = chunk.lstrip()
+            self._skip_whitespace = not chunk
+
+        if not chunk:
+            return ""
+
+        # 暂存末尾可能属于结尾标记的空白和反引号
+        text = self._tail + chunk
+        keep = len(text)
+        while keep > 0 and (text[keep - 1].isspace() or text[keep - 1] == "`"):
+            keep -= 1
+        self._tail = text[keep:]
+        return text[:keep]
+
+    def finish(self) -> str:
+        """
+        结束输入并输出剩余内容
+
+        Returns:
+            str: 剩余的文本
+        """
+        if not self._head_done:
+            # 内容不足以判断开头标记，按一次性处理的规则处理
+            remaining, self._head = self._head, ""
+            self._head_done = True
+            return self.strip(remaining)
+
+        tail, self._tail = self._tail, ""
+        if self._fenced:
+            tail = tail.rstrip()
+        if tail.endswith(self.CLOSING_FENCE):
+            tail = tail[:-len(self.CLOSING_FENCE)].rstrip()
+        return tail
+
+    @classmethod
+    def strip(cls, content: str) -> str:
+        """
+        一次性去除完整内容的外层代码块标记
+
+        Args:
+            content: 完整的模型输出
+
+        Returns:
+            str: 去除标记后的内容
+        """
+        # 去掉开头的```markdown标识头
+        if content.startswith(cls.OPENING_FENCE):
+            content = content.replace(cls.OPENING_FENCE, "", 1).strip()
+        if content.endswith(cls.CLOSING_FENCE):
+            content = content[:-len(cls.CLOSING_FENCE)].strip()
+        return content
@@ -0,0 +1,186 @@
+import json
+import logging
+from typing import Dict, Any, List, Tuple, Callable, Optional
+
+from src.utils.token_counter import TokenCounter
+
+logger = logging.getLogger(__name__)
+
+class PromptPacker:
+    """按token预算裁剪仓库分析结果，使README生成提示词不超出上下文窗口"""
+
+    # 裁剪顺序：越靠前的部分优先级越低，越先被精简或丢弃
+    # 每一项为 (分析结果字段, 处理方式)，处理方式为summarize时先精简，仍超出预算再丢弃
+    PACKING_PLAN = [
+        ("files_analysis", "drop"),       # 与important_files内容重复
+        ("dependencies", "drop"),         # 与key_dependencies内容重复
+        ("structure", "summarize"),
+        ("key_files", "summarize"),
+        ("core_files", "drop"),           # 与core_files_info内容重复
+        ("important_files", "summarize"),
+        ("key_dependencies", "summarize"),
+        ("core_files_info", "summarize"),
+        ("structure", "drop"),
+        ("key_files", "drop"),
+        ("important_files", "drop"),
+    ]
+
+    # 精简时保留的参数
+    STRUCTURE_SUMMARY_DEPTH = 2
+    KEY_FILE_SUMMARY_CHARS = 1000
+    MAX_DEPENDENCIES_PER_FILE = 30
+
+    def __init__(self, token_budget: int, model: str):
+        """
+        初始化打包器
+
+        Args:
+            token_budget: 分析结果JSON允许占用的token数
+            model: 用于计数的模型名称
+        """
+        self.token_budget = token_budget
+        self.model = model
+
+    def count_tokens(self, value: Any) -> int:
+        """计算值按提示词中的JSON格式序列化后的token数"""
+        return TokenCounter.count(json.dumps(value, indent=2, ensure_ascii=False), self.model)
+
+    def pack(self, repo_analysis: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """
+        将仓库分析结果裁剪到token预算以内
+
+        Args:
+            repo_analysis: 仓库分析结果
+
+        Returns:
+            Tuple[Dict[str, Any], List[Dict[str, Any]]]: 裁剪后的分析结果，以及记录每一步精简或丢弃操作的报告
+        """
+        packed = dict(repo_analysis)
+        section_tokens = {key: self.count_tokens({key: value}) for key, value in packed.items()}
+        report = []
+
+        total = sum(section_tokens.values())
+        if total <= self.token_budget:
+            return packed, report
+
+        logger.info(f"仓库分析结果约 {total} tokens，超出预算 {self.token_budget}，开始裁剪")
+
+        for key, action in self.PACKING_PLAN:
+            if total <= self.token_budget:
+                break
+            if key not in packed:
+                continue
+
+            before = section_tokens[key]
+            if action == "summarize":
+                summarizer = self._get_summarizer(key)
+                if summarizer is None:
+                    continue
+                packed[key] = summarizer(packed[key])
+                section_tokens[key] = self.count_tokens({key: packed[key]})
+                if section_tokens[key] >= before:
+                    continue
+            else:
+                del packed[key]
+                section_tokens.pop(key)
+
+            after = section_tokens.get(key, 0)
+            total -= before - after
+            report.append({
+                "section": key,
+                "action": "summarized" if action == "summarize" else "dropped",
+                "tokens_before": before,
+                "tokens_after": after,
+            })
+
+        if total > self.token_budget:
+            logger.warning(f"裁剪后仍约有 {total} tokens，超出预算 {self.token_budget}")
+
+        for entry in report:
+            logger.info(f"提示词裁剪: {entry['section']} {entry['action']} ({entry['tokens_before']} -> {entry['tokens_after']} tokens)")
+
+        return packed, report
+
+    def _get_summarizer(self, key: str) -> Optional[Callable[[Any], Any]]:
+        """获取字段对应的精简函数"""
+        return {
+            "structure": self._summarize_structure,
+            "key_files": self._summarize_key_files,
+            "important_files": self._summarize_important_files,
+            "key_dependencies": self._summarize_key_dependencies,
+            "core_files_info": self._summarize_core_files_info,
+        }.get(key)
+
+    def _summarize_structure(self, structure: Any) -> Any:
+        """仅保留指定深度以内的目录结构，更深的目录只记录子项数量"""
+        if isinstance(structure, str):
+            # FileHandler.render_tree渲染的文本树，每级缩进两个空格
+            return "\n".join(
+                line for line in structure.split("\n")
+                if (len(line) - len(line.lstrip(" "))) // 2 <= self.STRUCTURE_SUMMARY_DEPTH
+            )
+        if not isinstance(structure, dict):
+            return structure
+
+        def prune(node, depth):
+            pruned = {key: value for key, value in node.items() if key != "children"}
+            children = node.get("children")
+            if children is None:
+                return pruned
+            if depth >= self.STRUCTURE_SUMMARY_DEPTH:
+                pruned["children_count"] = len(children)
+            else:
+                pruned["children"] = [prune(child, depth + 1) for child in children]
+            return pruned
+
+        return prune(structure, 0)
+
+    def _summarize_key_files(self, key_files: Any) -> Any:
+        """截断每个关键文件的内容"""
+        if not isinstance(key_files, dict):
+            return key_files
+
+        summarized = {}
+        for path, content in key_files.items():
+            if isinstance(content, str) and len(content) > self.KEY_FILE_SUMMARY_CHARS:
+                content = content[:self.KEY_FILE_SUMMARY_CHARS] + "\n...(内容已截断)..."
+            summarized[path] = content
+        return summarized
+
+    def _summarize_important_files(self, important_files: Any) -> Any:
+        """只保留文件的语言、用途和核心标记"""
+        if not isinstance(important_files, dict):
+            return important_files
+
+        return {
+            path: {key: value for key, value in info.items() if key in ("language", "summary", "is_core")}
+            if isinstance(info, dict) else info
+            for path, info in important_files.items()
+        }
+
+    def _summarize_key_dependencies(self, key_dependencies: Any) -> Any:
+        """限制每个依赖文件保留的依赖数量"""
+        if not isinstance(key_dependencies, dict):
+            return key_dependencies
+
+        summarized = {}
+        for path, deps in key_dependencies.items():
+            if isinstance(deps, list):
+                deps = deps[:self.MAX_DEPENDENCIES_PER_FILE]
+            elif isinstance(deps, dict):
+                deps = dict(list(deps.items())[:self.MAX_DEPENDENCIES_PER_FILE])
+            summarized[path] = deps
+        return summarized
+
+    def _summarize_core_files_info(self, core_files_info: Any) -> Any:
+        """只保留各目录的用途和文件名"""
+        if not isinstance(core_files_info, dict):
+            return core_files_info
+
+        return {
+            dir_name: {
+                "purpose": info.get("purpose", ""),
+                "files": [file_info.get("name") for file_info in info.get("files", [])],
+            } if isinstance(info, dict) else info
+            for dir_name, info in core_files_info.items()
+        }
@@ -1,9 +1,53 @@
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple, Optional
 
 class PromptTemplates:
     """提示词模板类"""
 
+    # 文件分析提示词版本，修改get_file_analysis_prompt时需要递增以使分析缓存失效
+    FILE_ANALYSIS_PROMPT_VERSION = "3"
+
+    # 分章节并行生成README时的章节定义，按此顺序拼接
+    # fields为该章节所需的分析结果字段，只将这些字段放入提示词
+    README_SECTIONS = [
+        {
+            "key": "overview",
+            "title": "项目简介",
+            "fields": ["repo_name", "languages", "architecture_summary", "core_files_info"],
+            "guidance": "以项目名称作为一级标题，随后用简短清晰的段落描述项目用途，并列出主要特性和功能",
+        },
+        {
+            "key": "installation",
+            "title": "安装",
+            "fields": ["repo_name", "languages", "key_dependencies", "key_files"],
+            "guidance": "说明环境要求、依赖安装和必要的配置步骤",
+        },
+        {
+            "key": "usage",
+            "title": "使用方法",
+            "fields": ["repo_name", "core_files_info", "important_files", "key_files"],
+            "guidance": "提供使用示例、命令行参数和API文档（如果适用）",
+        },
+        {
+            "key": "architecture",
+            "title": "项目架构",
+            "fields": ["repo_name", "structure", "architecture_summary", "core_files_info", "important_files"],
+            "guidance": "解释项目目录结构、主要模块和组件之间的关系",
+        },
+        {
+            "key": "tech_stack",
+            "title": "技术栈",
+            "fields": ["languages", "key_dependencies"],
+            "guidance": "列出使用的编程语言、框架和主要依赖",
+        },
+        {
+            "key": "contributing",
+            "title": "贡献与许可证",
+            "fields": ["repo_name", "key_files"],
+            "guidance": "添加贡献指南；如果找到许可证文件，说明许可证信息，否则省略许可证部分",
+        },
+    ]
+
     @staticmethod
     def get_readme_generation_prompt(repo_analysis: Dict[str, Any]) -> str:
         """
@@ -15,9 +59,11 @@ class PromptTemplates:
         Returns:
             str: 格式化的提示词
         """
+        repo_analysis, structure_section = PromptTemplates._split_structure_section(repo_analysis)
+
         # 将仓库分析结果转换为JSON字符串
         repo_json = json.dumps(repo_analysis, indent=2, ensure_ascii=False)
-        
+
         # 构建提示词
         prompt = f"""请根据以下代码仓库的分析结果，生成一个专业的README.md文件。
 
@@ -25,7 +71,7 @@ class PromptTemplates:
         ```json
         {repo_json}
         ```
-        
+        {structure_section}
         生成README时，请考虑以下要点:
         - 开始用一个简短清晰的项目描述
         - 列出主要特性和功能
@@ -43,17 +89,58 @@ class PromptTemplates:
         return prompt
 
     @staticmethod
-    def get_file_analysis_prompt(file_path: str, file_content: str) -> str:
+    def get_readme_section_prompt(section: Dict[str, Any], section_analysis: Dict[str, Any]) -> str:
+        """
+        获取README单个章节的生成提示词
+        
+        Args:
+            section: README_SECTIONS中的章节定义
+            section_analysis: 只包含该章节所需字段的分析结果
+            
+        Returns:
+            str: 格式化的提示词
+        """
+        section_analysis, structure_section = PromptTemplates._split_structure_section(section_analysis)
+
+        repo_json = json.dumps(section_analysis, indent=2, ensure_ascii=False)
+
+        # 简介章节使用项目名称作为一级标题，其余章节使用二级标题
+        heading = "一级标题为项目名称" if section["key"] == "overview" else f"以二级标题“## {section['title']}”开头"
+
+        prompt = f"""请根据以下代码仓库的分析结果，只生成README.md中的“{section['title']}”章节。
+
+        仓库分析结果:
+        ```json
+        {repo_json}
+        ```
+        {structure_section}
+        章节要求:
+        - {heading}
+        - {section['guidance']}
+        - 只输出本章节内容，不要生成其他章节，也不要添加目录
+        - 使用Markdown格式，内容清晰、专业、易于阅读
+
+        请直接输出章节的Markdown内容，不需要额外的解释。
+        """
+        return prompt
+
+    @staticmethod
+    def get_file_analysis_prompt(file_path: str, file_content: str, max_chars: Optional[int] = 10000) -> str:
         """
         获取文件分析提示词
         
         Args:
             file_path: 文件路径
             file_content: 文件内容
+            max_chars: 内容的最大字符数，超出部分截断；None表示不截断（调用方已按token上限分块）
             
         Returns:
             str: 格式化的提示词
         """
+        truncated = max_chars is not None and len(file_content) > max_chars
+        if truncated:
+            file_content = file_content[:max_chars]
+        
         # 构建文件分析提示词
         prompt = f"""请分析以下代码文件，提取关键信息并以JSON格式返回结果：
         
@@ -61,8 +148,8 @@ class PromptTemplates:
         
         文件内容:
         ```
-        {file_content[:10000]}  # 限制内容长度
-        {"..." if len(file_content) > 10000 else ""}
+        {file_content}
+        {"..." if truncated else ""}
         ```
 
         请提取以下信息并以JSON格式返回：
@@ -89,6 +176,182 @@ class PromptTemplates:
         """
         return prompt
 
+    @staticmethod
+    def get_file_purpose_prompt(
+        file_path: str,
+        file_content: str,
+        structure: Dict[str, Any],
+        max_chars: Optional[int] = 10000
+    ) -> str:
+        """
+        获取已在本地提取组件和依赖的文件的分析提示词，只要求模型给出用途和逻辑
+        
+        Args:
+            file_path: 文件路径
+            file_content: 文件内容
+            structure: CodeParser.extract_python_structure的提取结果
+            max_chars: 内容的最大字符数，超出部分截断；None表示不截断
+            
+        Returns:
+            str: 格式化的提示词
+        """
+        truncated = max_chars is not None and len(file_content) > max_chars
+        if truncated:
+            file_content = file_content[:max_chars]
+        
+        components = "、".join(structure.get("components", [])) or "无"
+        
+        prompt = f"""请阅读以下代码文件（顶层定义: {components}），以JSON格式返回它的用途和核心逻辑：
+        
+        文件路径: {file_path}
+        
+        ```
+        {file_content}
+        {"..." if truncated else ""}
+        ```
+
+        JSON格式示例:
+        ```json
+        {{
+            "purpose": "文件的主要目的",
+            "logic": "核心逻辑概述",
+            "configuration": "配置信息（如果有）",
+            "quality": "代码质量评估"
+        }}
+        ```
+        """
+        return prompt
+
+    @staticmethod
+    def get_file_chunk_analysis_prompt(file_path: str, chunk: str, index: int, total: int) -> str:
+        """
+        获取大文件单个分块的分析提示词
+        
+        Args:
+            file_path: 文件路径
+            chunk: 分块内容
+            index: 分块序号（从1开始）
+            total: 分块总数
+            
+        Returns:
+            str: 格式化的提示词
+        """
+        prompt = f"""以下是代码文件的第 {index}/{total} 部分，请分析这一部分并以JSON格式返回结果：
+        
+        文件路径: {file_path}
+        
+        内容:
+        ```
+        {chunk}
+        ```
+
+        请提取这一部分的以下信息：
+        - 这部分代码的目的和功能
+        - 定义的类、函数或组件
+        - 依赖关系
+        - 核心逻辑
+        - 配置信息（如果有）
+        
+        JSON格式示例:
+        ```json
+        {{
+            "purpose": "这部分代码的目的",
+            "components": ["类或函数1", "类或函数2"],
+            "dependencies": ["依赖1", "依赖2"],
+            "logic": "核心逻辑概述",
+            "configuration": "配置信息"
+        }}
+        ```
+
+        请确保返回有效的JSON格式。
+        """
+        return prompt
+
+    @staticmethod
+    def get_chunk_reduce_prompt(file_path: str, chunk_analyses: List[Dict[str, Any]]) -> str:
+        """
+        获取将各分块分析结果合并为整个文件分析结果的提示词
+        
+        Args:
+            file_path: 文件路径
+            chunk_analyses: 按顺序排列的各分块分析结果
+            
+        Returns:
+            str: 格式化的提示词
+        """
+        chunks_json = json.dumps(chunk_analyses, indent=2, ensure_ascii=False)
+        
+        prompt = f"""以下是代码文件 {file_path} 按顺序分块分析得到的结果，请将它们合并为整个文件的分析结果：
+        
+        ```json
+        {chunks_json}
+        ```
+
+        请概括整个文件的主要目的、核心逻辑和代码质量，合并各部分的组件和依赖（去除重复），以JSON格式返回。
+        
+        JSON格式示例:
+        ```json
+        {{
+            "purpose": "文件的主要目的",
+            "components": ["主要类或函数1", "主要类或函数2"],
+            "dependencies": ["依赖1", "依赖2"],
+            "logic": "核心逻辑概述",
+            "configuration": "配置信息",
+            "quality": "代码质量评估"
+        }}
+        ```
+
+        请确保返回有效的JSON格式。
+        """
+        return prompt
+
+    @staticmethod
+    def get_batch_file_analysis_prompt(files: List[Tuple[str, str]]) -> str:
+        """
+        获取多个小文件合并分析的提示词
+        
+        Args:
+            files: (文件路径, 文件内容) 元组列表
+            
+        Returns:
+            str: 格式化的提示词
+        """
+        files_str = ""
+        for file_path, file_content in files:
+            files_str += f"\n--- 文件路径: {file_path} ---\n```\n{file_content}\n```\n"
+        
+        paths_json = json.dumps([file_path for file_path, _ in files], ensure_ascii=False)
+        
+        # 构建提示词
+        prompt = f"""请分别分析以下 {len(files)} 个代码文件，提取每个文件的关键信息并以JSON格式返回结果：
+        {files_str}
+        请对每个文件提取以下信息：
+        - 文件的主要目的和功能
+        - 主要类、函数或组件
+        - 依赖关系
+        - 核心逻辑
+        - 配置信息（如果有）
+        - 代码质量评估
+        
+        返回一个JSON对象，键为文件路径（必须与上面给出的路径完全一致: {paths_json}），值为该文件的分析结果。
+        JSON格式示例:
+        ```json
+        {{
+            "文件路径1": {{
+                "purpose": "文件的主要目的",
+                "components": ["主要类或函数1", "主要类或函数2"],
+                "dependencies": ["依赖1", "依赖2"],
+                "logic": "核心逻辑概述",
+                "configuration": "配置信息",
+                "quality": "代码质量评估"
+            }}
+        }}
+        ```
+
+        请确保返回有效的JSON格式，并且包含每一个文件。
+        """
+        return prompt
+
     @staticmethod
     def get_repo_summary_prompt(repo_structure: Dict[str, Any], key_files_content: Dict[str, str]) -> str:
         """
@@ -134,3 +397,20 @@ class PromptTemplates:
         请以JSON格式返回分析结果，确保返回有效的JSON。
         """
         return prompt
+
+    @staticmethod
+    def _split_structure_section(analysis: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        """
+        将已渲染为文本树的仓库结构从分析结果中分离，单独展示以避免在JSON中转义换行
+        
+        Args:
+            analysis: 分析结果
+            
+        Returns:
+            Tuple[Dict[str, Any], str]: 去除文本树后的分析结果，以及插入提示词的仓库结构段落（没有文本树时为空）
+        """
+        structure = analysis.get("structure")
+        if not isinstance(structure, str):
+            return analysis, ""
+        analysis = {key: value for key, value in analysis.items() if key != "structure"}
+        return analysis, f"\n        仓库结构:\n        ```\n{structure}\n        ```\n"
@@ -0,0 +1,136 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+from typing import Dict, Any, Optional, Iterable
+
+logger = logging.getLogger(__name__)
+
+class RepoManifest:
+    """仓库文件清单，记录每个文件的修改时间、大小、内容哈希、画像和LLM分析结果，用于增量分析"""
+
+    MANIFEST_VERSION = 1
+
+    def __init__(self, repo_path: str, manifest_dir: str, analysis_version: str):
+        """
+        初始化清单
+
+        Args:
+            repo_path: 仓库路径
+            manifest_dir: 清单存放目录
+            analysis_version: 分析结果版本（模型、提示词和分析方式配置），变化时已有的LLM分析结果失效
+        """
+        self.repo_path = repo_path
+        self.analysis_version = analysis_version
+        repo_key = hashlib.sha256(os.path.abspath(repo_path).encode('utf-8')).hexdigest()[:16]
+        self.manifest_path = os.path.join(manifest_dir, f"{repo_key}.json")
+        self.files = {}
+
+    @staticmethod
+    def hash_content(content: str) -> str:
+        """计算文件内容的哈希"""
+        return hashlib.sha256(content.encode('utf-8', errors='replace')).hexdigest()
+
+    def load(self) -> None:
+        """从磁盘加载清单，不存在或格式不兼容时从空清单开始"""
+        self.files = {}
+        if not os.path.exists(self.manifest_path):
+            return
+
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取仓库清单 {self.manifest_path} 失败: {str(e)}")
+            return
+
+        if data.get("version") != self.MANIFEST_VERSION:
+            return
+
+        self.files = data.get("files", {})
+
+        # 模型或提示词变化后，已有的LLM分析结果不再可用
+        if data.get("analysis_version") != self.analysis_version:
+            for entry in self.files.values():
+                entry.pop("analysis", None)
+                entry.pop("content_length", None)
+
+        logger.info(f"已加载仓库清单，包含 {len(self.files)} 个文件")
+
+    def save(self, keep_paths: Optional[Iterable[str]] = None) -> None:
+        """
+        将清单写入磁盘
+
+        Args:
+            keep_paths: 需要保留的文件相对路径，其余（已删除的文件）会被移除
+        """
+        if keep_paths is not None:
+            keep = set(keep_paths)
+            self.files = {path: entry for path, entry in self.files.items() if path in keep}
+
+        data = {
+            "version": self.MANIFEST_VERSION,
+            "analysis_version": self.analysis_version,
+            "files": self.files,
+        }
+
+        try:
+            manifest_dir = os.path.dirname(self.manifest_path)
+            os.makedirs(manifest_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=manifest_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            logger.warning(f"写入仓库清单 {self.manifest_path} 失败: {str(e)}")
+
+    def lookup(self, rel_path: str, size: int, mtime: float) -> Optional[Dict[str, Any]]:
+        """
+        查找文件的清单条目，仅当大小和修改时间都未变化时返回
+
+        Args:
+            rel_path: 文件相对路径
+            size: 当前文件大小
+            mtime: 当前修改时间
+
+        Returns:
+            Optional[Dict[str, Any]]: 清单条目，文件已变化或不存在时返回None
+        """
+        entry = self.files.get(rel_path)
+        if entry and entry.get("size") == size and entry.get("mtime") == mtime:
+            return entry
+        return None
+
+    def record_profile(self, rel_path: str, size: int, mtime: float, content_hash: str, profile: Dict[str, Any]) -> None:
+        """
+        记录文件的最新画像，内容哈希未变化时保留已有的LLM分析结果
+
+        Args:
+            rel_path: 文件相对路径
+            size: 文件大小
+            mtime: 修改时间
+            content_hash: 内容哈希
+            profile: 文件画像
+        """
+        previous = self.files.get(rel_path, {})
+        entry = {"size": size, "mtime": mtime, "hash": content_hash, "profile": profile}
+        if previous.get("hash") == content_hash and "analysis" in previous:
+            entry["analysis"] = previous["analysis"]
+            entry["content_length"] = previous.get("content_length", 0)
+        self.files[rel_path] = entry
+
+    def record_analysis(self, rel_path: str, analysis: Dict[str, Any], content_length: int) -> None:
+        """
+        记录文件的LLM分析结果，分析失败或模型响应未能解析的结果不记录，下次分析时重试
+
+        Args:
+            rel_path: 文件相对路径
+            analysis: 分析结果
+            content_length: 文件内容长度
+        """
+        entry = self.files.get(rel_path)
+        if entry is None or "error" in analysis or analysis.get("unparsed"):
+            return
+        entry["analysis"] = analysis
+        entry["content_length"] = content_length
@@ -0,0 +1,78 @@
+import re
+import logging
+import threading
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class TokenCounter:
+    """基于tiktoken的token计数工具类，编码不可用时退回到字符估算"""
+
+    _encodings: Dict[str, Any] = {}
+    _lock = threading.Lock()
+
+    # 中日韩字符通常每个字符约占一个token
+    _CJK_PATTERN = re.compile(r'[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]')
+
+    @classmethod
+    def _get_encoding(cls, model: str):
+        """
+        获取模型对应的tiktoken编码，结果（包括加载失败）按模型缓存
+
+        Args:
+            model: 模型名称
+
+        Returns:
+            tiktoken编码对象，无法加载时返回None
+        """
+        with cls._lock:
+            if model in cls._encodings:
+                return cls._encodings[model]
+
+            encoding = None
+            try:
+                import tiktoken
+                try:
+                    encoding = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"无法加载tiktoken编码，使用字符数估算token: {str(e)}")
+
+            cls._encodings[model] = encoding
+            return encoding
+
+    @classmethod
+    def count(cls, text: str, model: str) -> int:
+        """
+        计算文本的token数
+
+        Args:
+            text: 文本
+            model: 模型名称
+
+        Returns:
+            int: token数
+        """
+        if not text:
+            return 0
+
+        encoding = cls._get_encoding(model)
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+
+        return cls.estimate(text)
+
+    @classmethod
+    def estimate(cls, text: str) -> int:
+        """
+        不依赖tokenizer粗略估算token数（英文约4字符一个token，中日韩字符约一个字符一个token）
+
+        Args:
+            text: 文本
+
+        Returns:
+            int: 估算的token数
+        """
+        cjk_count = len(cls._CJK_PATTERN.findall(text))
+        return cjk_count + (len(text) - cjk_count + 3) // 4
@@ -0,0 +1,241 @@
+import os
+import stat
+import time
+import logging
+import zipfile
+import posixpath
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ZipLimitError(ValueError):
+    """ZIP文件的条目数或解压后大小超出限制时抛出的异常"""
+
+
+class ZipFileSystem:
+    """
+    直接基于zipfile.ZipFile的只读虚拟文件系统
+
+    打开时只读取中央目录：忽略规则、路径安全检查和大小限制都在解压任何数据之前完成，
+    被忽略的条目永远不会被解压。只有一个顶层目录时自动将其作为根目录。
+    读取时按实际解压出的字节数检查是否超出声明的大小，防止条目头中声明的大小被篡改；
+    声明的大小在打开时已按限制检查，因此重复读取同一文件不会计入总大小。
+    """
+
+    # 每次解压读取的字节数
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        zip_path: str,
+        ignore_entry_func: Optional[callable] = None,
+        max_entry_bytes: int = 0,
+        max_total_bytes: int = 0,
+        max_entries: int = 0
+    ):
+        """
+        打开ZIP文件并建立保留条目的索引
+
+        Args:
+            zip_path: ZIP文件路径
+            ignore_entry_func: 判断是否忽略条目的函数，参数为(条目名称, 是否为目录)，
+                               对路径中的每一级目录和文件名分别调用
+            max_entry_bytes: 单个文件解压后的大小上限，0表示不限制
+            max_total_bytes: 所有保留文件解压后的总大小上限，0表示不限制
+            max_entries: 保留文件数上限，0表示不限制
+
+        Raises:
+            zipfile.BadZipFile: 文件不是有效的ZIP文件时
+            ZipLimitError: 条目数或声明的解压大小超出限制时
+        """
+        self.zip_path = zip_path
+        self.name = os.path.splitext(os.path.basename(zip_path))[0]
+        self.max_entry_bytes = max_entry_bytes
+        self.max_total_bytes = max_total_bytes
+        self._zip = zipfile.ZipFile(zip_path, 'r')
+
+        try:
+            self.entries = self._build_index(ignore_entry_func)
+            self._check_limits(max_entries)
+        except Exception:
+            self._zip.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """关闭ZIP文件"""
+        self._zip.close()
+
+    def list_files(self) -> List[str]:
+        """
+        列出保留的文件
+
+        Returns:
+            List[str]: 相对于根目录的文件路径列表（以/分隔），按路径排序
+        """
+        return sorted(self.entries)
+
+    def scan(self) -> Dict[str, Any]:
+        """
+        不解压任何数据，获取仓库结构、文件列表、文件大小和修改时间
+
+        Returns:
+            Dict[str, Any]: 与FileHandler.scan_repo格式相同的结果，文件路径为相对路径
+        """
+        structure = {"name": self.name, "type": "directory", "children": []}
+        files = []
+        sizes = {}
+        mtimes = {}
+        dir_nodes = {"": structure}
+
+        def get_dir_node(dir_path):
+            """获取目录节点，不存在时逐级创建"""
+            if dir_path not in dir_nodes:
+                parent = get_dir_node(posixpath.dirname(dir_path))
+                node = {"name": posixpath.basename(dir_path), "type": "directory", "children": []}
+                parent["children"].append(node)
+                dir_nodes[dir_path] = node
+            return dir_nodes[dir_path]
+
+        for path in self.list_files():
+            info = self.entries[path]
+            parent = get_dir_node(posixpath.dirname(path))
+            parent["children"].append({"name": posixpath.basename(path), "type": "file"})
+            files.append(path)
+            sizes[path] = info.file_size
+            mtimes[path] = time.mktime(info.date_time + (0, 0, -1))
+
+        # 与目录遍历的结果一致，同级条目按名称排序
+        def sort_children(node):
+            node["children"].sort(key=lambda child: child["name"])
+            for child in node["children"]:
+                if child["type"] == "directory":
+                    sort_children(child)
+
+        sort_children(structure)
+        return {"structure": structure, "files": files, "sizes": sizes, "mtimes": mtimes}
+
+    def read_bytes(self, path: str) -> bytes:
+        """
+        解压并读取文件内容
+
+        Args:
+            path: list_files返回的相对路径
+
+        Returns:
+            bytes: 文件内容
+
+        Raises:
+            KeyError: 文件不存在或已被忽略时
+            ZipLimitError: 实际解压大小超出限制时
+        """
+        chunks = []
+        with self._open_entry(path) as source:
+            for chunk in self._iter_chunks(path, source):
+                chunks.append(chunk)
+        return b"".join(chunks)
+
+    def read_file(self, path: str, encoding: str = 'utf-8') -> str:
+        """
+        解压并读取文本文件内容，解码失败时使用latin-1
+
+        Args:
+            path: list_files返回的相对路径
+            encoding: 文件编码，默认utf-8
+
+        Returns:
+            str: 文件内容
+        """
+        data = self.read_bytes(path)
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            return data.decode('latin-1')
+
+    def relpath(self, path: str) -> str:
+        """
+        获取文件相对于仓库根目录的路径
+
+        Args:
+            path: scan返回的文件路径
+
+        Returns:
+            str: 使用系统路径分隔符的相对路径
+        """
+        return path.replace('/', os.sep)
+
+    def _build_index(self, ignore_entry_func: Optional[callable]) -> Dict[str, zipfile.ZipInfo]:
+        """根据中央目录建立保留文件的索引"""
+        infos = []
+        for info in self._zip.infolist():
+            if info.is_dir() or stat.S_ISLNK(info.external_attr >> 16):
+                continue
+            parts = self._normalize(info.filename)
+            if parts is None:
+                logger.warning(f"跳过ZIP中的不安全路径: {info.filename}")
+                continue
+            infos.append((parts, info))
+
+        # 所有文件都位于同一个顶层目录中时，将该目录作为根目录
+        top_levels = {parts[0] for parts, _ in infos}
+        if len(top_levels) == 1 and all(len(parts) > 1 for parts, _ in infos):
+            infos = [(parts[1:], info) for parts, info in infos]
+
+        entries = {}
+        for parts, info in infos:
+            if ignore_entry_func and (
+                any(ignore_entry_func(part, True) for part in parts[:-1])
+                or ignore_entry_func(parts[-1], False)
+            ):
+                continue
+            entries["/".join(parts)] = info
+        return entries
+
+    def _check_limits(self, max_entries: int) -> None:
+        """按中央目录中声明的大小检查限制，超出时不解压任何数据"""
+        if max_entries and len(self.entries) > max_entries:
+            raise ZipLimitError(f"ZIP文件包含 {len(self.entries)} 个文件，超出上限 {max_entries}")
+
+        total = 0
+        for path, info in self.entries.items():
+            if self.max_entry_bytes and info.file_size > self.max_entry_bytes:
+                raise ZipLimitError(f"ZIP中的文件 {path} 解压后为 {info.file_size} 字节，超出上限 {self.max_entry_bytes}")
+            total += info.file_size
+        if self.max_total_bytes and total > self.max_total_bytes:
+            raise ZipLimitError(f"ZIP文件解压后共 {total} 字节，超出上限 {self.max_total_bytes}")
+
+    def _open_entry(self, path: str):
+        """打开保留的条目"""
+        if path not in self.entries:
+            raise KeyError(path)
+        return self._zip.open(self.entries[path])
+
+    def _iter_chunks(self, path: str, source):
+        """分块读取条目，按实际解压的字节数检查单个文件的大小"""
+        declared = self.entries[path].file_size
+        entry_bytes = 0
+        while True:
+            chunk = source.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            entry_bytes += len(chunk)
+            # 实际大小超出声明的大小说明条目头被篡改
+            if entry_bytes > declared or (self.max_entry_bytes and entry_bytes > self.max_entry_bytes):
+                raise ZipLimitError(f"ZIP中的文件 {path} 解压后的实际大小超出限制")
+            yield chunk
+
+    @staticmethod
+    def _normalize(filename: str) -> Optional[List[str]]:
+        """将条目名称拆分为路径各级，绝对路径或包含..的路径返回None"""
+        name = filename.replace('\\', '/')
+        if name.startswith('/') or (len(name) > 1 and name[1] == ':'):
+            return None
+        parts = [part for part in name.split('/') if part and part != '.']
+        if not parts or '..' in parts:
+            return None
+        return parts
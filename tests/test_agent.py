@@ -1,7 +1,12 @@
+import time
 import unittest
+import tempfile
+import shutil
 from unittest.mock import MagicMock, patch
 
 from src.models.agent import ReadmeAgent
+from src.utils.analysis_cache import AnalysisCache
+from src.utils.prompt_templates import PromptTemplates
 from config.config import Config
 
 class TestReadmeAgent(unittest.TestCase):
@@ -21,10 +26,21 @@ class TestReadmeAgent(unittest.TestCase):
         
         # 替换agent的客户端为模拟对象
         self.agent.openai_client = self.mock_instance
+        self.mock_instance.model = "test-model"
+        
+        # 使用临时目录作为分析缓存
+        self.cache_dir = tempfile.mkdtemp()
+        self.agent.analysis_cache = AnalysisCache(self.cache_dir, 1024 * 1024)
+        
+        # 默认所有文件都调用LLM分析，本地分析单独测试
+        self.local_only_patcher = patch.object(Config, 'ANALYSIS_LOCAL_ONLY_MAX_LINES', 0)
+        self.local_only_patcher.start()
     
     def tearDown(self):
         # 测试结束后的清理工作
         self.mock_openai_client_patcher.stop()
+        self.local_only_patcher.stop()
+        shutil.rmtree(self.cache_dir)
     
     def test_generate_readme(self):
         """测试README生成功能"""
@@ -46,6 +62,38 @@ class TestReadmeAgent(unittest.TestCase):
         args, kwargs = self.mock_instance.chat_completion.call_args
         self.assertEqual(kwargs["system_prompt"], Config.SYSTEM_PROMPT)
     
+    def test_generate_readme_sections_keeps_order(self):
+        """测试分章节生成时每个章节只拿到所需字段，且按固定顺序拼接"""
+        repo_analysis = {
+            "repo_name": "test-repo",
+            "languages": ["Python"],
+            "architecture_summary": "架构概述",
+            "key_dependencies": {"requirements.txt": ["click"]},
+            "important_files": {"main.py": {"summary": "入口"}},
+        }
+        sections = PromptTemplates.README_SECTIONS
+        prompts = {}
+        
+        def fake_completion(system_prompt, user_prompt, max_tokens=None):
+            section = next(s for s in sections if f"“{s['title']}”章节" in user_prompt)
+            prompts[section["key"]] = user_prompt
+            # 越靠前的章节完成得越晚，验证拼接顺序不受完成顺序影响
+            time.sleep(0.01 * (len(sections) - sections.index(section)))
+            return f"```markdown\n## {section['title']}\n```"
+        
+        self.mock_instance.chat_completion.side_effect = fake_completion
+        
+        result = "".join(self.agent.generate_readme_sections(repo_analysis))
+        
+        expected = "\n\n".join(f"## {section['title']}" for section in sections)
+        self.assertEqual(result, expected)
+        self.assertEqual(self.mock_instance.chat_completion.call_count, len(sections))
+        
+        # 技术栈章节不需要文件分析结果
+        self.assertIn("click", prompts["tech_stack"])
+        self.assertNotIn("main.py", prompts["tech_stack"])
+        self.assertIn("main.py", prompts["usage"])
+    
     def test_analyze_code_file(self):
         """测试代码文件分析功能"""
         # 准备测试数据
@@ -65,5 +113,207 @@ class TestReadmeAgent(unittest.TestCase):
         # 验证OpenAI客户端被正确调用
         self.mock_instance.chat_completion.assert_called_once()
 
+    def test_analyze_code_file_cache_hit(self):
+        """测试相同内容的文件命中缓存并跳过API调用"""
+        file_content = "def hello(): print('Hello, World!')"
+        self.mock_instance.chat_completion.return_value = '{"purpose": "测试函数"}'
+        
+        first = self.agent.analyze_code_file("a.py", file_content)
+        second = self.agent.analyze_code_file("b.py", file_content)
+        
+        self.assertEqual(first, second)
+        self.mock_instance.chat_completion.assert_called_once()
+        stats = self.agent.analysis_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        
+        # 模型变化时不应命中缓存
+        self.mock_instance.model = "other-model"
+        self.agent.analyze_code_file("a.py", file_content)
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 2)
+
+    def test_analyze_code_file_escalates_on_invalid_json(self):
+        """测试分析模型返回的JSON无法解析时改用README生成模型重新分析"""
+        self.mock_instance.chat_completion.side_effect = [
+            "这不是JSON",
+            '```json\n{"purpose": "升级后的结果"}\n```',
+        ]
+        
+        with patch.object(Config, 'ANALYSIS_MODEL', 'cheap-model'), \
+                patch.object(Config, 'ANALYSIS_ESCALATE_ON_PARSE_ERROR', True):
+            result = self.agent.analyze_code_file("a.js", "x = 1")
+        
+        self.assertEqual(result, {"purpose": "升级后的结果"})
+        models = [call.kwargs["model"] for call in self.mock_instance.chat_completion.call_args_list]
+        self.assertEqual(models, ["cheap-model", "test-model"])
+    
+    def test_analyze_code_file_without_escalation(self):
+        """测试关闭升级时直接返回原始文本"""
+        self.mock_instance.chat_completion.return_value = "这不是JSON"
+        
+        with patch.object(Config, 'ANALYSIS_MODEL', 'cheap-model'), \
+                patch.object(Config, 'ANALYSIS_ESCALATE_ON_PARSE_ERROR', False):
+            result = self.agent.analyze_code_file("a.js", "x = 1")
+        
+        self.assertEqual(result, {"summary": "这不是JSON", "unparsed": True})
+        self.mock_instance.chat_completion.assert_called_once()
+        self.assertEqual(self.mock_instance.chat_completion.call_args.kwargs["model"], "cheap-model")
+
+    def test_unparsable_analysis_not_cached(self):
+        """测试无法解析的分析结果不写入缓存，下次分析重新调用模型"""
+        self.mock_instance.chat_completion.side_effect = ["这不是JSON", '{"purpose": "正常结果"}']
+
+        with patch.object(Config, 'ANALYSIS_MODEL', ''):
+            first = self.agent.analyze_code_file("a.js", "x = 1")
+            second = self.agent.analyze_code_file("a.js", "x = 1")
+
+        self.assertEqual(first, {"summary": "这不是JSON", "unparsed": True})
+        self.assertEqual(second, {"purpose": "正常结果"})
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 2)
+
+    def test_analyze_code_files_batch_splits_response(self):
+        """测试合并分析的响应按路径拆分，缺失的文件改为单独分析"""
+        self.mock_instance.chat_completion.side_effect = [
+            '{"a.py": {"purpose": "文件a"}, "b.py": {"purpose": "文件b"}}',
+            '{"purpose": "文件c"}',
+        ]
+        files = [("a.py", "a = 1"), ("b.py", "b = 2"), ("c.py", "c = 3")]
+        
+        results = self.agent.analyze_code_files_batch(files)
+        
+        self.assertEqual([result["purpose"] for result in results], ["文件a", "文件b", "文件c"])
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 2)
+        self.assertIn("c.py", self.mock_instance.chat_completion.call_args_list[0].kwargs["user_prompt"])
+        
+        # 再次分析时全部命中缓存
+        self.assertEqual(self.agent.analyze_code_files_batch(files), results)
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 2)
+
+        # 合并分析的结果不用于单独分析，单独分析的结果优先用于合并分析
+        self.mock_instance.chat_completion.side_effect = ['{"purpose": "单独分析a"}']
+        self.assertEqual(self.agent.analyze_code_file("a.py", "a = 1")["purpose"], "单独分析a")
+        self.assertEqual(self.agent.analyze_code_files_batch(files)[0]["purpose"], "单独分析a")
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 3)
+
+    def test_analyze_code_files_batch_falls_back_on_invalid_json(self):
+        """测试合并分析的响应无法解析时逐个分析"""
+        self.mock_instance.chat_completion.side_effect = [
+            "无法解析",
+            '{"purpose": "文件a"}',
+            '{"purpose": "文件b"}',
+        ]
+        
+        with patch.object(Config, 'ANALYSIS_MODEL', ''):
+            results = self.agent.analyze_code_files_batch([("a.js", "a = 1"), ("b.js", "b = 2")])
+        
+        self.assertEqual(results, [{"purpose": "文件a"}, {"purpose": "文件b"}])
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 3)
+
+    def test_analyze_large_file_in_chunks(self):
+        """测试大文件分块分析后合并，而不是截断"""
+        body = "    value = compute_something(argument_one, argument_two)\n" * 6
+        file_content = "".join(f"def func{i}():\n{body}\n" for i in range(3))
+        
+        def fake_completion(system_prompt, user_prompt, temperature=None, max_tokens=None, model=None):
+            for i in range(3):
+                if f"第 {i + 1}/3 部分" in user_prompt:
+                    return f'{{"purpose": "部分{i}", "components": ["func{i}"]}}'
+            return '{"purpose": "整个文件"}'
+        
+        self.mock_instance.chat_completion.side_effect = fake_completion
+        
+        with patch.object(Config, 'ANALYSIS_CHUNK_TOKENS', 120), patch.object(Config, 'ANALYSIS_FILE_TOKEN_CAP', 0):
+            result = self.agent.analyze_code_file("big.py", file_content)
+        
+        self.assertEqual(result["purpose"], "整个文件")
+        self.assertEqual(result["components"], ["func0", "func1", "func2"])
+        self.assertEqual(result["chunks"], 3)
+        # 3个分块请求加1个合并请求
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 4)
+
+        # 合并响应无法解析时使用本地合并结果，且不写入缓存
+        self.mock_instance.chat_completion.side_effect = lambda *args, **kwargs: (
+            "无法解析" if "第 " not in kwargs["user_prompt"] else fake_completion(*args, **kwargs)
+        )
+        with patch.object(Config, 'ANALYSIS_CHUNK_TOKENS', 120), patch.object(Config, 'ANALYSIS_FILE_TOKEN_CAP', 0):
+            result = self.agent.analyze_code_file("big.py", file_content + "\n")
+            self.agent.analyze_code_file("big.py", file_content + "\n")
+
+        self.assertEqual(result["purpose"], "部分0；部分1；部分2")
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 12)
+
+    def test_chunking_config_changes_cache_key(self):
+        """测试分块配置变化后大文件的分块分析结果不再命中缓存"""
+        file_content = "".join(f"def func{i}():\n    return {i}\n\n" for i in range(20))
+        self.mock_instance.chat_completion.return_value = '{"purpose": "分块"}'
+
+        with patch.object(Config, 'ANALYSIS_CHUNK_TOKENS', 60), patch.object(Config, 'ANALYSIS_FILE_TOKEN_CAP', 0):
+            self.agent.analyze_code_file("big.js", file_content)
+            calls = self.mock_instance.chat_completion.call_count
+            self.agent.analyze_code_file("big.js", file_content)
+            self.assertEqual(self.mock_instance.chat_completion.call_count, calls)
+
+        with patch.object(Config, 'ANALYSIS_CHUNK_TOKENS', 60), patch.object(Config, 'ANALYSIS_FILE_TOKEN_CAP', 120):
+            self.agent.analyze_code_file("big.js", file_content)
+        self.assertGreater(self.mock_instance.chat_completion.call_count, calls)
+
+    def test_local_extraction_mode_changes_cache_key(self):
+        """测试切换本地提取后不复用另一种提示词的缓存结果"""
+        file_content = "".join(f"def func{i}():\n    return {i}\n\n" for i in range(10))
+        self.mock_instance.chat_completion.return_value = '{"purpose": "模型结果", "components": ["模型组件"]}'
+
+        with patch.object(Config, 'ANALYSIS_LOCAL_EXTRACTION', False):
+            without_local = self.agent.analyze_code_file("funcs.py", file_content)
+        with patch.object(Config, 'ANALYSIS_LOCAL_EXTRACTION', True), patch.object(Config, 'ANALYSIS_LOCAL_ONLY_MAX_LINES', 0):
+            with_local = self.agent.analyze_code_file("funcs.py", file_content)
+
+        self.assertEqual(self.mock_instance.chat_completion.call_count, 2)
+        self.assertEqual(without_local["components"], ["模型组件"])
+        self.assertEqual(with_local["components"], [f"func{i}" for i in range(10)])
+
+    def test_analysis_version_covers_analysis_settings(self):
+        """测试影响分析结果的配置变化时分析版本随之变化"""
+        version = self.agent.get_analysis_version()
+        settings = [
+            ('ANALYSIS_CHUNKED_ENABLED', False), ('ANALYSIS_CHUNK_TOKENS', 1), ('ANALYSIS_FILE_TOKEN_CAP', 1),
+            ('ANALYSIS_LOCAL_EXTRACTION', False), ('ANALYSIS_MAX_TOKENS', 1), ('ANALYSIS_BATCH_ENABLED', False),
+            ('ANALYSIS_BATCH_MAX_FILES', 1),
+        ]
+        for name, value in settings:
+            with patch.object(Config, name, value):
+                self.assertNotEqual(self.agent.get_analysis_version(), version, name)
+        self.assertEqual(self.agent.get_analysis_version(), version)
+
+    def test_python_components_extracted_locally(self):
+        """测试Python文件的组件和依赖由本地提取，模型只需给出用途"""
+        file_content = (
+            '"""示例模块"""\n'
+            'import os\n'
+            'from .models import User\n\n'
+            'class Service:\n'
+            '    """业务服务"""\n\n'
+            'def helper():\n'
+            '    return os.getcwd()\n'
+        )
+        self.mock_instance.chat_completion.return_value = '{"purpose": "提供服务", "components": ["错误的组件"]}'
+        
+        result = self.agent.analyze_code_file("service.py", file_content)
+        
+        self.assertEqual(result["purpose"], "提供服务")
+        self.assertEqual(result["components"], ["Service", "helper"])
+        self.assertEqual(result["dependencies"], ["os", ".models"])
+        self.assertEqual(result["docstrings"], {"Service": "业务服务"})
+        self.assertNotIn("依赖关系", self.mock_instance.chat_completion.call_args.kwargs["user_prompt"])
+    
+    def test_trivial_python_file_skips_llm(self):
+        """测试简单的Python文件完全在本地分析"""
+        with patch.object(Config, 'ANALYSIS_LOCAL_ONLY_MAX_LINES', 15):
+            result = self.agent.analyze_code_file("pkg/__init__.py", "from .core import run\n")
+            results = self.agent.analyze_code_files_batch([("a/__init__.py", ""), ("b/__init__.py", "")])
+        
+        self.assertEqual(result, {"purpose": "包初始化文件", "components": [], "dependencies": [".core"]})
+        self.assertEqual([r["purpose"] for r in results], ["包初始化文件", "包初始化文件"])
+        self.mock_instance.chat_completion.assert_not_called()
+
 if __name__ == '__main__':
     unittest.main()
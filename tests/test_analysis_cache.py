@@ -0,0 +1,53 @@
+import unittest
+import os
+import time
+import tempfile
+import shutil
+
+from src.utils.analysis_cache import AnalysisCache
+
+class TestAnalysisCache(unittest.TestCase):
+    """测试AnalysisCache类"""
+    
+    def setUp(self):
+        # 创建临时缓存目录
+        self.cache_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        # 清理临时目录
+        shutil.rmtree(self.cache_dir)
+    
+    def test_persists_across_instances(self):
+        """测试缓存条目在新实例中仍可读取"""
+        key = AnalysisCache.make_key("print(1)", "1", "gpt-4o", 0.3)
+        AnalysisCache(self.cache_dir, 1024 * 1024).put(key, {"purpose": "打印"})
+        
+        cache = AnalysisCache(self.cache_dir, 1024 * 1024)
+        self.assertEqual(cache.get(key), {"purpose": "打印"})
+        self.assertIsNone(cache.get(AnalysisCache.make_key("print(1)", "2", "gpt-4o", 0.3)))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+    
+    def test_lru_eviction_by_size(self):
+        """测试超出大小上限时淘汰最久未使用的条目"""
+        value = {"purpose": "x" * 100}
+        entry_size = len('{"purpose": "' + "x" * 100 + '"}')
+        cache = AnalysisCache(self.cache_dir, entry_size * 2)
+        
+        cache.put("a", value)
+        time.sleep(0.01)
+        cache.put("b", value)
+        time.sleep(0.01)
+        
+        # 访问a使其成为最近使用的条目
+        self.assertIsNotNone(cache.get("a"))
+        time.sleep(0.01)
+        cache.put("c", value)
+        
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, "b.json")))
+
+if __name__ == '__main__':
+    unittest.main()
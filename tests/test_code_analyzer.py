@@ -3,8 +3,11 @@ import os
 from unittest.mock import MagicMock, patch
 import tempfile
 import shutil
+import zipfile
 
 from src.services.code_analyzer import CodeAnalyzer
+from src.utils.file_handler import FileHandler
+from src.utils.code_parser import CodeParser
 
 class TestCodeAnalyzer(unittest.TestCase):
     """测试CodeAnalyzer类"""
@@ -33,6 +36,15 @@ class TestCodeAnalyzer(unittest.TestCase):
         with open(os.path.join(self.test_repo_path, "__pycache__", "test.cpython-39.pyc"), "w") as f:
             f.write("# Compiled Python file")
         
+        # 使用临时目录保存文件清单
+        self.manifest_dir = tempfile.mkdtemp()
+        self.manifest_dir_patcher = patch('src.services.code_analyzer.Config.MANIFEST_DIR', self.manifest_dir)
+        self.manifest_dir_patcher.start()
+        
+        # 默认逐个分析文件，合并分析单独测试
+        self.batch_patcher = patch('src.services.code_analyzer.Config.ANALYSIS_BATCH_ENABLED', False)
+        self.batch_patcher.start()
+        
         # 模拟ReadmeAgent
         self.mock_agent_patcher = patch('src.services.code_analyzer.ReadmeAgent')
         self.mock_agent = self.mock_agent_patcher.start()
@@ -40,6 +52,9 @@ class TestCodeAnalyzer(unittest.TestCase):
         # 设置模拟的返回值
         self.mock_instance = self.mock_agent.return_value
         self.mock_instance.analyze_code_file.return_value = {"purpose": "Test purpose"}
+        self.mock_instance.openai_client.model = "test-model"
+        self.mock_instance.get_analysis_model.return_value = "test-model"
+        self.mock_instance.get_analysis_version.return_value = "test-version"
         
         # 初始化代码分析器
         self.analyzer = CodeAnalyzer(self.test_repo_path)
@@ -48,6 +63,9 @@ class TestCodeAnalyzer(unittest.TestCase):
     def tearDown(self):
         # 清理临时目录
         shutil.rmtree(self.test_repo_path)
+        shutil.rmtree(self.manifest_dir)
+        self.manifest_dir_patcher.stop()
+        self.batch_patcher.stop()
         
         # 停止模拟
         self.mock_agent_patcher.stop()
@@ -77,5 +95,192 @@ class TestCodeAnalyzer(unittest.TestCase):
         # 验证代理被调用来分析文件
         self.mock_instance.analyze_code_file.assert_called()
 
+    def test_incremental_analysis_skips_unchanged_files(self):
+        """测试再次分析时未变化的文件不再读取和调用LLM，变化的文件重新分析"""
+        first = self.analyzer.analyze()
+        first_calls = self.mock_instance.analyze_code_file.call_count
+        self.assertGreater(first_calls, 0)
+        
+        analyzer = CodeAnalyzer(self.test_repo_path)
+        analyzer.agent = self.mock_instance
+        with patch('src.utils.file_handler.FileHandler.read_file', wraps=FileHandler.read_file) as mock_read:
+            second = analyzer.analyze()
+        
+        self.assertEqual(self.mock_instance.analyze_code_file.call_count, first_calls)
+        self.assertEqual(second["files_analysis"], first["files_analysis"])
+        # 只有关键配置文件会被重新读取
+        read_paths = {os.path.basename(call.args[0]) for call in mock_read.call_args_list}
+        self.assertEqual(read_paths, {"requirements.txt"})
+        
+        # 修改文件后只重新分析该文件
+        main_path = os.path.join(self.test_repo_path, "src", "main.py")
+        with open(main_path, "w") as f:
+            f.write("def main(): print('Hello again')")
+        os.utime(main_path, (0, 12345))
+        
+        analyzer = CodeAnalyzer(self.test_repo_path)
+        analyzer.agent = self.mock_instance
+        analyzer.analyze()
+        self.assertEqual(self.mock_instance.analyze_code_file.call_count, first_calls + 1)
+        self.assertEqual(self.mock_instance.analyze_code_file.call_args.args[0], os.path.join("src", "main.py"))
+    
+    def test_unparsed_analysis_not_reused_from_manifest(self):
+        """测试模型响应未能解析的结果不写入清单，再次分析时重新调用LLM"""
+        self.mock_instance.analyze_code_file.return_value = {"summary": "原始文本", "unparsed": True}
+        self.analyzer.analyze()
+        first_calls = self.mock_instance.analyze_code_file.call_count
+        
+        analyzer = CodeAnalyzer(self.test_repo_path)
+        analyzer.agent = self.mock_instance
+        analyzer.analyze()
+        
+        self.assertEqual(self.mock_instance.analyze_code_file.call_count, first_calls * 2)
+    
+    def test_non_incremental_analysis_writes_no_manifest(self):
+        """测试关闭增量分析时不写入文件清单"""
+        analyzer = CodeAnalyzer(self.test_repo_path, incremental=False)
+        analyzer.agent = self.mock_instance
+        analyzer.analyze()
+        
+        self.assertIsNone(analyzer.manifest)
+        self.assertEqual(os.listdir(self.manifest_dir), [])
+    
+    def test_build_file_profiles_reads_each_file_once(self):
+        """测试文件画像对每个文件只读取一次"""
+        all_files = [
+            os.path.join(self.test_repo_path, "test.py"),
+            os.path.join(self.test_repo_path, "src", "main.py"),
+        ]
+        
+        with patch('src.utils.file_handler.FileHandler.read_file', return_value="import os\n# comment\n") as mock_read:
+            profiles = self.analyzer._build_file_profiles(all_files)
+        
+        self.assertEqual(mock_read.call_count, len(all_files))
+        
+        # 验证画像包含评分所需的全部指标
+        main_profile = profiles[all_files[1]]
+        self.assertEqual(main_profile["language"], "Python")
+        self.assertEqual(main_profile["imports"], [{"module": "os", "names": [], "level": 0}])
+        self.assertEqual(main_profile["comments"], 1)
+        self.assertEqual(main_profile["lines"], 3)
+        self.assertTrue(main_profile["is_entry_point"])
+        self.assertFalse(main_profile["is_generated"])
+
+    def test_pagerank_ranking_propagates_importance(self):
+        """测试中心性排序模式下重要模块的依赖排名高于普通叶子模块"""
+        files = {
+            os.path.join("pkg", "__init__.py"): "",
+            os.path.join("pkg", "base.py"): "BASE = 1",
+            os.path.join("pkg", "leaf.py"): "LEAF = 1",
+            os.path.join("pkg", "core.py"): "from pkg.base import BASE",
+            "a.py": "from pkg.core import *",
+            "b.py": "from pkg.core import *",
+            "c.py": "from pkg.core import *",
+            "d.py": "from pkg.leaf import LEAF",
+        }
+        os.makedirs(os.path.join(self.test_repo_path, "pkg"))
+        for rel_path, content in files.items():
+            with open(os.path.join(self.test_repo_path, rel_path), "w") as f:
+                f.write(content)
+        
+        all_files = FileHandler.list_files(self.test_repo_path, ignore_func=CodeParser.should_ignore)
+        base_path = os.path.join(self.test_repo_path, "pkg", "base.py")
+        leaf_path = os.path.join(self.test_repo_path, "pkg", "leaf.py")
+        
+        with patch('src.services.code_analyzer.Config.CORE_FILE_RANKING', 'pagerank'):
+            core_files = self.analyzer._identify_core_files(all_files)
+        self.assertIn(base_path, core_files)
+        self.assertIn(leaf_path, core_files)
+        self.assertLess(core_files.index(base_path), core_files.index(leaf_path))
+        
+        scores = self.analyzer._get_centrality_scores()
+        self.assertGreater(scores[os.path.join("pkg", "base.py")], scores[os.path.join("pkg", "leaf.py")])
+    
+    def test_concurrent_analysis_preserves_order(self):
+        """测试并发分析结果顺序与核心文件顺序一致"""
+        import time
+        
+        core_files = [
+            os.path.join(self.test_repo_path, "test.py"),
+            os.path.join(self.test_repo_path, "src", "main.py"),
+            os.path.join(self.test_repo_path, "requirements.txt"),
+        ]
+        delays = {"test.py": 0.05, os.path.join("src", "main.py"): 0.02, "requirements.txt": 0}
+        
+        def fake_analyze(rel_path, content):
+            time.sleep(delays[rel_path])
+            return {"purpose": rel_path}
+        
+        self.mock_instance.analyze_code_file.side_effect = fake_analyze
+        analysis_result = {"files_analysis": {}, "languages": set()}
+        
+        with patch('src.services.code_analyzer.Config.ANALYSIS_MAX_WORKERS', 3):
+            self.analyzer._analyze_core_files(core_files, analysis_result)
+        
+        expected = [os.path.relpath(f, self.test_repo_path) for f in core_files]
+        self.assertEqual(list(analysis_result["files_analysis"].keys()), expected)
+        for rel_path in expected:
+            self.assertEqual(analysis_result["files_analysis"][rel_path]["analysis"]["purpose"], rel_path)
+    
+    def test_small_files_are_batched(self):
+        """测试小文件按预算合并为一个请求，大文件单独请求，结果顺序不变"""
+        entries = [
+            ("a.py", "x = 1", "Python"),
+            ("big.py", "y = 2\n" * 2000, "Python"),
+            ("b.py", "z = 3", "Python"),
+        ]
+        self.mock_instance.get_analysis_model.return_value = "test-model"
+        self.mock_instance.analyze_code_file.side_effect = lambda rel_path, content: {"purpose": rel_path}
+        self.mock_instance.analyze_code_files_batch.side_effect = lambda files: [{"purpose": path} for path, _ in files]
+        
+        with patch('src.services.code_analyzer.Config.ANALYSIS_BATCH_ENABLED', True), \
+                patch('src.services.code_analyzer.Config.ANALYSIS_MAX_WORKERS', 1):
+            results = self.analyzer._run_file_analyses(entries)
+        
+        self.assertEqual([result["purpose"] for result in results], ["a.py", "big.py", "b.py"])
+        self.mock_instance.analyze_code_files_batch.assert_called_once_with([("a.py", "x = 1"), ("b.py", "z = 3")])
+        self.mock_instance.analyze_code_file.assert_called_once()
+        self.assertEqual(self.mock_instance.analyze_code_file.call_args.args[0], "big.py")
+    
+    def test_progress_callback_reports_stages(self):
+        """测试分析过程通过回调报告各阶段和文件分析进度"""
+        events = []
+        analyzer = CodeAnalyzer(self.test_repo_path, progress_callback=lambda stage, info: events.append((stage, info)))
+        analyzer.agent = self.mock_instance
+        
+        analyzer.analyze()
+        
+        stages = [stage for stage, _ in events]
+        self.assertEqual(stages[:2], ["scan", "score"])
+        analyze_events = [info for stage, info in events if stage == "analyze"]
+        self.assertEqual(analyze_events[0]["done"], 0)
+        self.assertEqual(analyze_events[-1]["done"], analyze_events[-1]["total"])
+    
+    def test_analyze_zip_source_without_extracting(self):
+        """测试直接分析ZIP仓库来源，结果与分析解压后的目录一致"""
+        zip_path = os.path.join(self.manifest_dir, "project.zip")
+        with zipfile.ZipFile(zip_path, "w") as zf:
+            for root, dirs, files in os.walk(self.test_repo_path):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    zf.write(file_path, os.path.join("project", os.path.relpath(file_path, self.test_repo_path)))
+        
+        expected = self.analyzer.analyze()
+        
+        with FileHandler.open_zip(zip_path, ignore_entry_func=CodeParser.should_ignore_entry) as zip_fs, \
+                patch('src.services.code_analyzer.Config.INCREMENTAL_ANALYSIS', False), \
+                patch('src.utils.file_handler.FileHandler.scan_repo', side_effect=AssertionError), \
+                patch('src.utils.file_handler.FileHandler.read_file', side_effect=AssertionError):
+            analyzer = CodeAnalyzer(zip_path, source=zip_fs)
+            analyzer.agent = self.mock_instance
+            result = analyzer.analyze()
+        
+        self.assertEqual(result["repo_name"], "project")
+        self.assertEqual(result["structure"]["children"], expected["structure"]["children"])
+        self.assertEqual(result["core_files"], expected["core_files"])
+        self.assertEqual(result["files_analysis"], expected["files_analysis"])
+        self.assertEqual(result["key_files"], expected["key_files"])
+        self.assertEqual(result["dependencies"], {"requirements.txt": "pytest==7.0.0"})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+
+from src.utils.code_chunker import CodeChunker
+from src.utils.token_counter import TokenCounter
+
+class TestCodeChunker(unittest.TestCase):
+    """测试CodeChunker类"""
+    
+    def setUp(self):
+        # 三个顶层定义，每个约100个token
+        body = "    value = compute_something(argument_one, argument_two)\n" * 6
+        self.content = (
+            "import os\n\n"
+            + "def first():\n" + body + "\n"
+            + "@decorator\nclass Second:\n" + body + "\n"
+            + "def third():\n" + body
+        )
+    
+    def test_split_on_top_level_definitions(self):
+        """测试按顶层定义切分，装饰器与定义在同一分块，拼接后内容不变"""
+        chunks = CodeChunker.split(self.content, 120, "test-model")
+        
+        self.assertEqual("".join(chunks), self.content)
+        self.assertEqual(len(chunks), 3)
+        self.assertTrue(chunks[1].startswith("@decorator\nclass Second:"))
+        self.assertTrue(chunks[2].startswith("def third():"))
+        for chunk in chunks:
+            self.assertLessEqual(TokenCounter.count(chunk, "test-model"), 120)
+    
+    def test_oversized_definition_split_by_lines(self):
+        """测试超出上限的单个定义按行切分"""
+        content = "def huge():\n" + "    x = 1  # padding padding padding\n" * 200
+        
+        chunks = CodeChunker.split(content, 100, "test-model")
+        
+        self.assertEqual("".join(chunks), content)
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks:
+            self.assertLessEqual(TokenCounter.count(chunk, "test-model"), 100)
+    
+    def test_limit_tokens(self):
+        """测试按文件级token上限丢弃后面的分块"""
+        chunks = CodeChunker.split(self.content, 120, "test-model")
+        
+        kept, dropped = CodeChunker.limit_tokens(chunks, 250, "test-model")
+        
+        self.assertEqual(kept, chunks[:2])
+        self.assertEqual(dropped, 1)
+        self.assertEqual(CodeChunker.limit_tokens(chunks, 0, "test-model"), (chunks, 0))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from src.utils.code_parser import CodeParser
+
+class TestCodeParser(unittest.TestCase):
+    """测试CodeParser类"""
+    
+    def test_extract_python_structure(self):
+        """测试提取顶层类和函数、文档字符串和依赖"""
+        content = (
+            '"""\n命令行入口\n\n更多说明"""\n'
+            'import os, sys\n'
+            'from ..utils import helper\n\n'
+            '@decorator\n'
+            'class App:\n'
+            '    """应用"""\n'
+            '    def run(self):\n'
+            '        import json\n\n'
+            'async def main():\n'
+            '    pass\n'
+        )
+        
+        structure = CodeParser.extract_python_structure(content)
+        
+        self.assertEqual(structure["docstring"], "命令行入口")
+        self.assertEqual(structure["components"], ["App", "main"])
+        self.assertEqual(structure["docstrings"], {"App": "应用"})
+        self.assertEqual(structure["dependencies"], ["os", "sys", "..utils", "json"])
+    
+    def test_extract_python_structure_syntax_error(self):
+        """测试无法解析的文件返回None"""
+        self.assertIsNone(CodeParser.extract_python_structure("print 'hello'"))
+
+if __name__ == '__main__':
+    unittest.main()
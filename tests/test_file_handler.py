@@ -0,0 +1,97 @@
+import unittest
+import os
+import tempfile
+import shutil
+
+from src.utils.file_handler import FileHandler
+from src.utils.code_parser import CodeParser
+
+class TestFileHandler(unittest.TestCase):
+    """测试FileHandler类"""
+    
+    def test_render_tree(self):
+        """测试紧凑文本树的深度限制、同类文件合并和条目数限制"""
+        structure = {
+            "name": "repo",
+            "type": "directory",
+            "children": [
+                {"name": "src", "type": "directory", "children": [
+                    {"name": "deep", "type": "directory", "children": [
+                        {"name": "a.py", "type": "file"},
+                        {"name": "b.py", "type": "file"},
+                    ]},
+                    {"name": "main.py", "type": "file"},
+                ]},
+                {"name": "tests", "type": "directory", "children": [
+                    {"name": f"test_{i}.py", "type": "file"} for i in range(10)
+                ] + [{"name": "conftest.cfg", "type": "file"}]},
+                {"name": "README.md", "type": "file"},
+                {"name": "setup.py", "type": "file"},
+                {"name": "LICENSE", "type": "file"},
+            ]
+        }
+        
+        tree = FileHandler.render_tree(structure, max_depth=2, max_children=4, collapse_threshold=5)
+        
+        self.assertEqual(tree, "\n".join([
+            "repo/",
+            "  src/",
+            "    deep/ (2 files)",
+            "    main.py",
+            "  tests/",
+            "    10 *.py files",
+            "    conftest.cfg",
+            "  README.md",
+            "  setup.py",
+            "  ... 1 more",
+        ]))
+
+    def test_write_file_stream_keeps_existing_file_on_failure(self):
+        """测试流式生成中途失败时保留原文件、删除临时文件并抛出原始异常"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(temp_dir, "README.md")
+            with open(file_path, "w", encoding="utf-8") as f:
+                f.write("# 原有内容")
+            
+            def failing_chunks():
+                yield "# 新"
+                raise RuntimeError("API连接中断")
+            
+            with self.assertRaisesRegex(RuntimeError, "API连接中断"):
+                FileHandler.write_file_stream(file_path, failing_chunks())
+            self.assertEqual(FileHandler.read_file(file_path), "# 原有内容")
+            self.assertEqual(os.listdir(temp_dir), ["README.md"])
+            
+            self.assertTrue(FileHandler.write_file_stream(file_path, iter(["# 新", "内容"])))
+            self.assertEqual(FileHandler.read_file(file_path), "# 新内容")
+            self.assertEqual(os.listdir(temp_dir), ["README.md"])
+        finally:
+            shutil.rmtree(temp_dir)
+    
+    def test_scan_repo_matches_separate_walks(self):
+        """测试一次遍历的结果与分别获取结构和文件列表一致"""
+        repo_path = tempfile.mkdtemp()
+        try:
+            files = {
+                "main.py": "print('hi')",
+                os.path.join("src", "app.py"): "x = 1\n" * 10,
+                os.path.join("node_modules", "lib", "index.js"): "module.exports = {}",
+                ".env": "SECRET=1",
+            }
+            for rel_path, content in files.items():
+                os.makedirs(os.path.dirname(os.path.join(repo_path, rel_path)), exist_ok=True)
+                with open(os.path.join(repo_path, rel_path), "w") as f:
+                    f.write(content)
+            
+            result = FileHandler.scan_repo(repo_path, ignore_entry_func=CodeParser.should_ignore_entry)
+            
+            self.assertEqual(result["structure"], FileHandler.get_repo_structure(repo_path, ignore_func=CodeParser.should_ignore))
+            self.assertEqual(sorted(result["files"]), sorted(FileHandler.list_files(repo_path, ignore_func=CodeParser.should_ignore)))
+            self.assertEqual(result["sizes"][os.path.join(repo_path, "src", "app.py")], 60)
+            self.assertNotIn(os.path.join(repo_path, ".env"), result["sizes"])
+        finally:
+            shutil.rmtree(repo_path)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+import os
+import time
+import types
+import shutil
+import tarfile
+import tempfile
+import unittest
+import subprocess
+
+from unittest.mock import patch
+
+from web import git_mirror
+from web.utils import clone_git_repo
+from web.git_mirror import GitMirrorCache
+
+class TestGitMirrorCache(unittest.TestCase):
+    """测试GitMirrorCache类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "mirrors")
+        self.cache = GitMirrorCache(self.cache_dir, 1024 * 1024 * 1024)
+        self.origin = os.path.join(self.temp_dir, "origin")
+        self.origin_url = self._create_repo(self.origin)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _git(self, repo, *args):
+        env = {
+            **os.environ,
+            "GIT_AUTHOR_NAME": "test", "GIT_AUTHOR_EMAIL": "test@example.com",
+            "GIT_COMMITTER_NAME": "test", "GIT_COMMITTER_EMAIL": "test@example.com",
+        }
+        return subprocess.run(["git", "-C", repo, *args], check=True, capture_output=True, text=True, env=env).stdout
+
+    def _commit_file(self, repo, name, content):
+        with open(os.path.join(repo, name), "w", encoding="utf-8") as f:
+            f.write(content)
+        self._git(repo, "add", name)
+        self._git(repo, "commit", "-q", "-m", f"add {name}")
+        return self._git(repo, "rev-parse", "HEAD").strip()
+
+    def _create_repo(self, path):
+        os.makedirs(path)
+        self._git(path, "init", "-q")
+        self._commit_file(path, "main.py", "print('v1')\n")
+        return f"file://{path}"
+
+    def test_checkout_exports_files_without_git_dir(self):
+        """测试首次使用时创建镜像并导出文件"""
+        output_dir = os.path.join(self.temp_dir, "job1")
+
+        commit = self.cache.checkout(self.origin_url, output_dir)
+
+        self.assertEqual(commit, self._git(self.origin, "rev-parse", "HEAD").strip())
+        self.assertEqual(os.listdir(output_dir), ["main.py"])
+        self.assertTrue(os.path.isdir(self.cache.mirror_path(self.origin_url)))
+
+    def test_checkout_fetches_new_commits(self):
+        """测试镜像已存在时增量fetch到远程的新提交"""
+        self.cache.checkout(self.origin_url, os.path.join(self.temp_dir, "job1"))
+        new_commit = self._commit_file(self.origin, "util.py", "VALUE = 2\n")
+
+        output_dir = os.path.join(self.temp_dir, "job2")
+        commit = self.cache.checkout(self.origin_url, output_dir)
+
+        self.assertEqual(commit, new_commit)
+        self.assertEqual(sorted(os.listdir(output_dir)), ["main.py", "util.py"])
+        self.assertEqual(os.listdir(self.cache_dir), [os.path.basename(self.cache.mirror_path(self.origin_url))])
+
+    def test_checkout_exports_requested_commit(self):
+        """测试指定提交时导出该提交，而不是fetch后的最新提交"""
+        old_commit = self._git(self.origin, "rev-parse", "HEAD").strip()
+        self._commit_file(self.origin, "util.py", "VALUE = 2\n")
+
+        output_dir = os.path.join(self.temp_dir, "job1")
+        commit = self.cache.checkout(self.origin_url, output_dir, ref=old_commit)
+
+        self.assertEqual(commit, old_commit)
+        self.assertEqual(os.listdir(output_dir), ["main.py"])
+
+    def test_checkout_without_tarfile_data_filter(self):
+        """测试tarfile不支持data过滤器的Python版本上同样可以导出"""
+        legacy_tarfile = types.SimpleNamespace(
+            open=tarfile.open, TarFile=tarfile.TarFile, TarInfo=tarfile.TarInfo, TarError=tarfile.TarError
+        )
+        output_dir = os.path.join(self.temp_dir, "job1")
+
+        with patch.object(git_mirror, "tarfile", legacy_tarfile):
+            self.cache.checkout(self.origin_url, output_dir)
+
+        self.assertEqual(os.listdir(output_dir), ["main.py"])
+
+    def test_unsafe_archive_members_rejected(self):
+        """测试越界路径、指向目录外的符号链接和特殊文件不会被解包"""
+        output_dir = os.path.join(self.temp_dir, "out")
+
+        def member(name, type_=tarfile.REGTYPE, linkname=""):
+            info = tarfile.TarInfo(name)
+            info.type = type_
+            info.linkname = linkname
+            return info
+
+        self.assertTrue(GitMirrorCache._is_safe_member(member("src/main.py"), output_dir))
+        self.assertTrue(GitMirrorCache._is_safe_member(member("docs/link", tarfile.SYMTYPE, "../README.md"), output_dir))
+        self.assertFalse(GitMirrorCache._is_safe_member(member("../evil.py"), output_dir))
+        self.assertFalse(GitMirrorCache._is_safe_member(member("/etc/passwd"), output_dir))
+        self.assertFalse(GitMirrorCache._is_safe_member(member("link", tarfile.SYMTYPE, "../../etc"), output_dir))
+        self.assertFalse(GitMirrorCache._is_safe_member(member("dev", tarfile.CHRTYPE), output_dir))
+
+    def test_archive_failure_reports_stderr(self):
+        """测试git archive失败时抛出包含错误输出的异常"""
+        self.cache.checkout(self.origin_url, os.path.join(self.temp_dir, "job1"))
+        mirror = self.cache.mirror_path(self.origin_url)
+
+        with self.assertRaises(subprocess.CalledProcessError) as context:
+            self.cache._archive(mirror, "0" * 40, os.path.join(self.temp_dir, "job2"))
+        self.assertTrue(context.exception.stderr)
+
+    def test_evicts_least_recently_used_mirror(self):
+        """测试镜像总大小超出上限时删除最久未使用的镜像"""
+        other_url = self._create_repo(os.path.join(self.temp_dir, "other"))
+        self.cache.checkout(self.origin_url, os.path.join(self.temp_dir, "job1"))
+        self.cache.checkout(other_url, os.path.join(self.temp_dir, "job2"))
+
+        # 让origin成为最久未使用的镜像，再把上限降到只能容纳一个镜像
+        last_used = os.path.join(self.cache.mirror_path(self.origin_url), GitMirrorCache.LAST_USED_FILE)
+        os.utime(last_used, (time.time() - 60, time.time() - 60))
+        sizes = {path: size for path, size, _ in self.cache._list_mirrors()}
+        self.cache.max_bytes = sizes[self.cache.mirror_path(other_url)]
+
+        self.cache.evict()
+
+        self.assertFalse(os.path.exists(self.cache.mirror_path(self.origin_url)))
+        self.assertTrue(os.path.exists(self.cache.mirror_path(other_url)))
+
+    def test_clone_fallback_removes_output_when_commit_unavailable(self):
+        """测试镜像不可用且无法获取指定提交时，浅克隆失败并删除已克隆的内容"""
+        output_dir = os.path.join(self.temp_dir, "job1")
+
+        with patch.object(GitMirrorCache, "get_shared", return_value=None):
+            self.assertFalse(clone_git_repo(self.origin_url, output_dir, ref="0" * 40))
+
+        self.assertFalse(os.path.exists(output_dir))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+import os
+
+from src.utils.import_resolver import ImportResolver
+from src.utils.code_parser import CodeParser
+
+class TestImportResolver(unittest.TestCase):
+    """测试ImportResolver类"""
+    
+    def setUp(self):
+        # 模拟一个包含包、src布局和脚本目录的仓库
+        self.repo_path = os.path.join(os.sep, "repo")
+        rel_paths = [
+            "main.py",
+            os.path.join("app", "__init__.py"),
+            os.path.join("app", "models.py"),
+            os.path.join("app", "utils", "__init__.py"),
+            os.path.join("app", "utils", "helpers.py"),
+            os.path.join("src", "lib_pkg", "__init__.py"),
+            os.path.join("src", "lib_pkg", "core.py"),
+            os.path.join("scripts", "run.py"),
+            os.path.join("scripts", "common.py"),
+        ]
+        self.resolver = ImportResolver(
+            self.repo_path,
+            [os.path.join(self.repo_path, p) for p in rel_paths]
+        )
+    
+    def resolve(self, importer, source):
+        """解析一段源码中的全部导入"""
+        targets = []
+        for imp in CodeParser.parse_python_imports(source):
+            targets.extend(self.resolver.resolve(importer, imp))
+        return targets
+    
+    def test_absolute_imports(self):
+        """测试绝对导入解析为模块文件或包的__init__.py"""
+        self.assertEqual(self.resolve("main.py", "from app.models import User"), [os.path.join("app", "models.py")])
+        self.assertEqual(self.resolve("main.py", "import app.utils"), [os.path.join("app", "utils", "__init__.py")])
+        self.assertEqual(self.resolve("main.py", "from app import utils, models"), [
+            os.path.join("app", "utils", "__init__.py"),
+            os.path.join("app", "models.py"),
+        ])
+        self.assertEqual(self.resolve("main.py", "import os\nimport json"), [])
+    
+    def test_relative_imports(self):
+        """测试相对导入"""
+        importer = os.path.join("app", "utils", "helpers.py")
+        self.assertEqual(self.resolve(importer, "from ..models import User"), [os.path.join("app", "models.py")])
+        self.assertEqual(self.resolve(importer, "from . import helpers"), [importer])
+        self.assertEqual(self.resolve(importer, "from .. import something"), [os.path.join("app", "__init__.py")])
+    
+    def test_source_root_and_script_imports(self):
+        """测试src布局和脚本目录中的同级导入"""
+        self.assertEqual(self.resolve("main.py", "from lib_pkg.core import run"), [os.path.join("src", "lib_pkg", "core.py")])
+        self.assertEqual(
+            self.resolve(os.path.join("scripts", "run.py"), "import common"),
+            [os.path.join("scripts", "common.py")]
+        )
+    
+    def test_build_graph(self):
+        """测试构建导入图时去除自身导入"""
+        importer = os.path.join("app", "utils", "helpers.py")
+        graph = self.resolver.build_graph({
+            "main.py": CodeParser.parse_python_imports("from app.models import User\nimport app.models"),
+            importer: CodeParser.parse_python_imports("from . import helpers"),
+        })
+        self.assertEqual(graph["main.py"], {os.path.join("app", "models.py")})
+        self.assertEqual(graph[importer], set())
+
+if __name__ == '__main__':
+    unittest.main()
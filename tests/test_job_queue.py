@@ -0,0 +1,104 @@
+import threading
+import unittest
+
+from web.jobs import Job, JobQueue, JobQueueFullError
+
+class TestJobQueue(unittest.TestCase):
+    """测试JobQueue类"""
+    
+    def setUp(self):
+        self.queue = JobQueue(max_workers=1, max_queued=1, retention=3600)
+    
+    def tearDown(self):
+        self.queue.shutdown()
+    
+    def test_job_result_and_timings(self):
+        """测试任务结果、状态和阶段耗时"""
+        def work(job, value):
+            with job.track("analyze"):
+                pass
+            return value * 2
+        
+        job = self.queue.submit(work, 21)
+        self.queue.shutdown()
+        
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, 42)
+        data = job.to_dict()
+        self.assertIn("analyze", data["timings"])
+        self.assertIsNotNone(data["run_seconds"])
+        self.assertEqual(self.queue.stats()["done"], 1)
+    
+    def test_failed_job(self):
+        """测试任务异常时记录错误"""
+        def work(job):
+            raise ValueError("仓库为空")
+        
+        job = self.queue.submit(work)
+        self.queue.shutdown()
+        
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.error, "仓库为空")
+    
+    def test_rejects_when_queue_full(self):
+        """测试排队任务数达到上限时拒绝提交"""
+        release = threading.Event()
+        started = threading.Event()
+        
+        def blocking(job):
+            started.set()
+            release.wait(5)
+        
+        self.queue.submit(blocking)
+        started.wait(5)
+        self.queue.submit(blocking)
+        
+        stats = self.queue.stats()
+        self.assertEqual((stats["running"], stats["queued"]), (1, 1))
+        with self.assertRaises(JobQueueFullError):
+            self.queue.submit(blocking)
+        release.set()
+
+    def test_events_for_subscribers(self):
+        """测试阶段切换和进度事件按顺序发布，结束事件在任务结束时可见"""
+        def work(job):
+            with job.track("analyze"):
+                job.publish("progress", {"stage": "analyze", "done": 1, "total": 1})
+            return "generation-id"
+        
+        job = self.queue.submit(work)
+        
+        received = []
+        finished = False
+        while not finished:
+            events, finished = job.wait_events(len(received), timeout=1)
+            received.extend(events)
+        
+        self.assertEqual([event["event"] for event in received], ["stage", "progress", "done"])
+        self.assertEqual([event["id"] for event in received], [0, 1, 2])
+        self.assertEqual(received[-1]["data"], {"result": "generation-id"})
+
+    def test_submit_once_attaches_to_inflight_job(self):
+        """测试相同去重键的任务在进行中时复用，结束后可重新提交"""
+        release = threading.Event()
+        calls = []
+        
+        def work(job):
+            calls.append(job.id)
+            release.wait(5)
+            return job.id
+        
+        first, created_first = self.queue.submit_once("same-key", work)
+        second, created_second = self.queue.submit_once("same-key", work)
+        
+        self.assertTrue(created_first)
+        self.assertFalse(created_second)
+        self.assertIs(first, second)
+        
+        release.set()
+        self.queue.shutdown()
+        self.assertEqual(len(calls), 1)
+        self.assertNotIn("same-key", self.queue.inflight)
+
+if __name__ == '__main__':
+    unittest.main()
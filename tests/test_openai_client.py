@@ -0,0 +1,319 @@
+import unittest
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from src.api.openai_client import OpenAIClient
+from src.api.circuit_breaker import CircuitBreaker, CircuitOpenError
+from src.api.concurrency_limiter import AIMDLimiter
+from src.api.rate_limiter import TokenBucketRateLimiter
+from src.models.agent import ReadmeAgent
+
+class StubHandler(BaseHTTPRequestHandler):
+    """按预设顺序返回响应的本地OpenAI接口桩"""
+    
+    responses = []
+    requests = []
+    
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        StubHandler.requests.append(json.loads(self.rfile.read(length)))
+        
+        status, headers, content = StubHandler.responses.pop(0) if StubHandler.responses else (500, {}, None)
+        if status == 200 and StubHandler.requests[-1].get("stream"):
+            self.send_stream(content)
+            return
+        if status == 200:
+            body = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": "test-model",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }
+        else:
+            body = {"error": {"message": f"stub error {status}", "type": "stub"}}
+        
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def send_stream(self, pieces):
+        """以SSE格式逐块返回内容"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for piece in pieces:
+            chunk = {
+                "id": "chatcmpl-test",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": "test-model",
+                "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+    
+    def log_message(self, format, *args):
+        pass
+
+class TestOpenAIClient(unittest.TestCase):
+    """测试OpenAIClient的重试和熔断"""
+    
+    @classmethod
+    def setUpClass(cls):
+        # 启动本地桩服务器
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}/v1"
+    
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+    
+    def setUp(self):
+        StubHandler.responses = []
+        StubHandler.requests = []
+        
+        # 每个测试使用独立的熔断器和较短的退避时间
+        CircuitBreaker._registry.clear()
+        AIMDLimiter._registry.clear()
+        self.config_patchers = [
+            patch('src.api.openai_client.Config.OPENAI_RETRY_BASE_DELAY', 0.01),
+            patch('src.api.openai_client.Config.CIRCUIT_FAILURE_THRESHOLD', 3),
+            patch('src.api.openai_client.Config.OPENAI_MAX_RETRIES', 2),
+        ]
+        for patcher in self.config_patchers:
+            patcher.start()
+        self.client = OpenAIClient(base_url=self.base_url)
+    
+    def tearDown(self):
+        for patcher in self.config_patchers:
+            patcher.stop()
+        CircuitBreaker._registry.clear()
+        AIMDLimiter._registry.clear()
+    
+    def test_retries_rate_limit_honoring_retry_after(self):
+        """测试429响应按Retry-After等待后重试成功"""
+        StubHandler.responses = [
+            (429, {"Retry-After": "0.05"}, None),
+            (503, {}, None),
+            (200, {}, "重试成功"),
+        ]
+        
+        with patch('src.api.openai_client.time.sleep') as mock_sleep:
+            result = self.client.chat_completion("系统", "用户")
+        
+        self.assertEqual(result, "重试成功")
+        self.assertEqual(len(StubHandler.requests), 3)
+        self.assertAlmostEqual(mock_sleep.call_args_list[0].args[0], 0.05)
+        self.assertLessEqual(mock_sleep.call_args_list[1].args[0], 0.02)
+        
+        # 429使自适应并发上限下降
+        stats = self.client.concurrency_limiter.stats()
+        self.assertEqual(stats["decreases"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+    
+    def test_rate_limiter_reconciles_actual_usage(self):
+        """测试TPM限流按响应中的实际usage修正预留额度"""
+        StubHandler.responses = [(200, {}, "完成")]
+        TokenBucketRateLimiter._registry.clear()
+        
+        try:
+            with patch('src.api.openai_client.Config.RATE_LIMIT_TPM', 100000):
+                self.client.chat_completion("系统", "用户", max_tokens=1000)
+            
+            limiter = TokenBucketRateLimiter._registry[self.client.model]
+            # 预留的1000+个token中未使用的部分已退还
+            self.assertGreaterEqual(limiter.stats()["available_tokens"], 100000 - 15)
+        finally:
+            TokenBucketRateLimiter._registry.clear()
+    
+    def test_clients_share_pooled_sdk_client(self):
+        """测试同一地址的客户端共享连接池，且地址可通过配置覆盖"""
+        other = OpenAIClient(base_url=self.base_url)
+        self.assertIs(other.client, self.client.client)
+        
+        with patch('src.api.openai_client.Config.OPENAI_BASE_URL', self.base_url):
+            agent = ReadmeAgent()
+        self.assertIs(agent.openai_client.client, self.client.client)
+        
+        # 注入的客户端直接使用
+        injected = ReadmeAgent(openai_client=other)
+        self.assertIs(injected.openai_client, other)
+        
+        StubHandler.responses = [(200, {}, "通过共享客户端")]
+        self.assertEqual(agent.openai_client.chat_completion("系统", "用户"), "通过共享客户端")
+    
+    def test_stream_yields_chunks_after_retry(self):
+        """测试流式请求在建立连接前重试，并逐块返回内容"""
+        StubHandler.responses = [(503, {}, None), (200, {}, ["# 标题", "\n", "正文"])]
+        
+        with patch('src.api.openai_client.time.sleep'):
+            chunks = list(self.client.chat_completion_stream("系统", "用户"))
+        
+        self.assertEqual(chunks, ["# 标题", "\n", "正文"])
+        self.assertEqual(len(StubHandler.requests), 2)
+        self.assertTrue(StubHandler.requests[-1]["stream"])
+    
+    def test_client_error_not_retried(self):
+        """测试400错误不重试"""
+        StubHandler.responses = [(400, {}, None)]
+        
+        with self.assertRaises(Exception):
+            self.client.chat_completion("系统", "用户")
+        self.assertEqual(len(StubHandler.requests), 1)
+    
+    def test_circuit_opens_after_consecutive_failures(self):
+        """测试连续失败后熔断器打开并快速失败"""
+        with patch('src.api.openai_client.time.sleep'):
+            with self.assertRaises(Exception):
+                self.client.chat_completion("系统", "用户")
+        self.assertEqual(len(StubHandler.requests), 3)
+        self.assertEqual(self.client.circuit_breaker.state, CircuitBreaker.OPEN)
+        
+        # 熔断期间不再访问端点
+        with self.assertRaises(CircuitOpenError):
+            self.client.chat_completion("系统", "用户")
+        self.assertEqual(len(StubHandler.requests), 3)
+    
+    def test_circuit_half_open_recovers(self):
+        """测试冷却结束后试探请求成功使熔断器关闭"""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        
+        now[0] = 11
+        breaker.before_call()
+        # 半开状态只放行一个试探请求
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+class TestAIMDLimiter(unittest.TestCase):
+    """测试AIMDLimiter类"""
+    
+    def setUp(self):
+        self.now = [0.0]
+        self.limiter = AIMDLimiter(
+            initial_limit=2, min_limit=1, max_limit=4,
+            decrease_factor=0.5, latency_threshold=5, clock=lambda: self.now[0]
+        )
+    
+    def run_request(self, latency, outcome):
+        """模拟一次耗时为latency的请求"""
+        started_at = self.limiter.acquire()
+        self.now[0] += latency
+        self.limiter.release(started_at, outcome)
+    
+    def test_additive_increase_and_multiplicative_decrease(self):
+        """测试健康时加性增加、限流时乘性下降且一批限流只下降一次"""
+        for _ in range(8):
+            self.run_request(1, "success")
+        self.assertEqual(self.limiter.stats()["limit"], 4)
+        self.assertAlmostEqual(self.limiter.stats()["latency_ewma"], 1)
+        
+        # 高延迟请求不再增加并发
+        self.limiter.limit = 3
+        self.run_request(10, "success")
+        self.assertEqual(self.limiter.stats()["limit"], 3)
+        
+        # 同一窗口内的多次限流只下降一次
+        self.limiter.limit = 4
+        started = [self.limiter.acquire() for _ in range(3)]
+        for started_at in started:
+            self.limiter.release(started_at, "overload")
+        self.assertEqual(self.limiter.stats()["limit"], 2)
+        self.assertEqual(self.limiter.stats()["decreases"], 1)
+    
+    def test_sustained_server_errors_decrease_limit(self):
+        """测试连续的服务端错误下降并发上限，偶发错误和其他错误不影响"""
+        self.limiter.limit = 4
+        self.run_request(1, "server_error")
+        self.run_request(1, "server_error")
+        self.run_request(1, "success")
+        self.run_request(1, "server_error")
+        for _ in range(5):
+            self.run_request(1, "error")
+        self.assertEqual(self.limiter.stats()["decreases"], 0)
+        
+        self.run_request(1, "server_error")
+        self.run_request(1, "server_error")
+        self.assertEqual(self.limiter.stats()["decreases"], 1)
+        self.assertEqual(self.limiter.stats()["limit"], 2)
+    
+    def test_acquire_blocks_at_limit(self):
+        """测试在途请求达到上限时阻塞等待"""
+        self.limiter.limit = 1
+        started_at = self.limiter.acquire()
+        acquired = threading.Event()
+        
+        def worker():
+            self.limiter.release(self.limiter.acquire(), "error")
+            acquired.set()
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+        
+        self.limiter.release(started_at, "error")
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    """测试TokenBucketRateLimiter类"""
+    
+    def setUp(self):
+        self.now = [0.0]
+        self.limiter = TokenBucketRateLimiter(tokens_per_minute=600, requests_per_minute=60, clock=lambda: self.now[0])
+    
+    def test_reserve_and_reconcile(self):
+        """测试预留额度并按实际用量退还"""
+        self.assertEqual(self.limiter.acquire(500), 500)
+        self.assertEqual(self.limiter.stats()["available_tokens"], 100)
+        
+        self.limiter.reconcile(500, 200)
+        self.assertEqual(self.limiter.stats()["available_tokens"], 400)
+        
+        # 超过桶容量的请求按容量预留
+        self.now[0] += 60
+        self.assertEqual(self.limiter.acquire(10000), 600)
+    
+    def test_waits_for_refill(self):
+        """测试额度不足时等待补充而不是失败"""
+        self.limiter.acquire(600)
+        waits = []
+        
+        def fake_wait(timeout):
+            waits.append(timeout)
+            self.now[0] += timeout
+        
+        self.limiter._condition.wait = fake_wait
+        self.limiter.acquire(300)
+        
+        self.assertAlmostEqual(sum(waits), 30)
+    
+    def test_shared_per_model(self):
+        """测试同一模型共享限流器，未配置额度时不限流"""
+        TokenBucketRateLimiter._registry.clear()
+        try:
+            first = TokenBucketRateLimiter.for_model("m", 1000, 10)
+            self.assertIs(TokenBucketRateLimiter.for_model("m", 1000, 10), first)
+            self.assertIsNone(TokenBucketRateLimiter.for_model("n", 0, 0))
+        finally:
+            TokenBucketRateLimiter._registry.clear()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+import unittest
+
+from src.utils.prompt_packer import PromptPacker
+
+class TestPromptPacker(unittest.TestCase):
+    """测试PromptPacker类"""
+    
+    def setUp(self):
+        # 准备一个包含大体积低优先级内容的分析结果
+        self.repo_analysis = {
+            "repo_name": "test-project",
+            "languages": ["Python"],
+            "architecture_summary": "test-project是一个使用Python开发的项目。",
+            "structure": {
+                "name": "test-project",
+                "type": "directory",
+                "children": [
+                    {"name": f"dir{i}", "type": "directory", "children": [
+                        {"name": f"sub{j}", "type": "directory", "children": [
+                            {"name": f"file{k}.py", "type": "file"} for k in range(20)
+                        ]} for j in range(5)
+                    ]} for i in range(5)
+                ]
+            },
+            "key_files": {"setup.py": "x = 1\n" * 2000},
+            "files_analysis": {"main.py": {"language": "Python", "analysis": {"purpose": "入口"}}},
+        }
+    
+    def test_within_budget_unchanged(self):
+        """测试未超出预算时不做任何裁剪"""
+        packer = PromptPacker(10 ** 7, "gpt-4o")
+        packed, report = packer.pack(self.repo_analysis)
+        
+        self.assertEqual(packed, self.repo_analysis)
+        self.assertEqual(report, [])
+    
+    def test_drops_lowest_priority_first(self):
+        """测试超出预算时按优先级精简或丢弃并报告"""
+        high_priority = {key: self.repo_analysis[key] for key in ("repo_name", "languages", "architecture_summary")}
+        budget = PromptPacker(0, "gpt-4o").count_tokens(high_priority) + 600
+        packer = PromptPacker(budget, "gpt-4o")
+        packed, report = packer.pack(self.repo_analysis)
+        
+        # 高优先级字段保留
+        for key in high_priority:
+            self.assertEqual(packed[key], self.repo_analysis[key])
+        
+        # 报告按裁剪顺序记录操作
+        self.assertEqual(report[0]["section"], "files_analysis")
+        self.assertEqual(report[0]["action"], "dropped")
+        self.assertIn({"section": "structure", "action": "summarized"},
+                      [{"section": r["section"], "action": r["action"]} for r in report])
+        self.assertLessEqual(sum(packer.count_tokens({k: v}) for k, v in packed.items()), budget)
+        
+        # 原始分析结果不被修改
+        self.assertIn("files_analysis", self.repo_analysis)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,11 @@
 import unittest
+import tempfile
+import shutil
 from unittest.mock import MagicMock, patch
 
 from src.services.readme_generator import ReadmeGenerator
+from src.utils.analysis_cache import AnalysisCache
+from src.utils.markdown_fence import MarkdownFenceStripper
 
 class TestReadmeGenerator(unittest.TestCase):
     """测试ReadmeGenerator类"""
@@ -20,6 +24,12 @@ class TestReadmeGenerator(unittest.TestCase):
         
         # 替换generator的agent为模拟对象
         self.generator.agent = self.mock_instance
+        self.mock_instance.system_prompt = "系统提示词"
+        self.mock_instance.openai_client.model = "test-model"
+        
+        # 使用临时目录作为README缓存
+        self.cache_dir = tempfile.mkdtemp()
+        self.generator.readme_cache = AnalysisCache(self.cache_dir, 1024 * 1024)
         
         # 准备测试数据
         self.test_repo_analysis = {
@@ -44,6 +54,7 @@ class TestReadmeGenerator(unittest.TestCase):
     def tearDown(self):
         # 测试结束后的清理工作
         self.mock_agent_patcher.stop()
+        shutil.rmtree(self.cache_dir)
     
     def test_generate(self):
         """测试README生成功能"""
@@ -64,6 +75,10 @@ class TestReadmeGenerator(unittest.TestCase):
         self.assertIsInstance(processed_analysis["languages"], list)
         self.assertEqual(set(processed_analysis["languages"]), set(["Python", "Markdown"]))
         
+        # 验证仓库结构被渲染为紧凑文本树，原始结构不变
+        self.assertEqual(processed_analysis["structure"], "test-project/")
+        self.assertIsInstance(self.test_repo_analysis["structure"], dict)
+        
         # 验证重要文件被提取
         self.assertIn("important_files", processed_analysis)
         self.assertIn("test.py", processed_analysis["important_files"])
@@ -72,5 +87,58 @@ class TestReadmeGenerator(unittest.TestCase):
             "Python"
         )
 
+    def test_generate_uses_cache_for_unchanged_analysis(self):
+        """测试分析结果未变化时直接返回缓存的README，force时重新生成"""
+        first = self.generator.generate(self.test_repo_analysis)
+        second = self.generator.generate(self.test_repo_analysis)
+        
+        self.assertEqual(first, second)
+        self.mock_instance.generate_readme.assert_called_once()
+        
+        # 模型变化时缓存失效
+        self.mock_instance.openai_client.model = "other-model"
+        self.generator.generate(self.test_repo_analysis)
+        self.assertEqual(self.mock_instance.generate_readme.call_count, 2)
+        
+        # force忽略缓存
+        self.generator.generate(self.test_repo_analysis, force=True)
+        self.assertEqual(self.mock_instance.generate_readme.call_count, 3)
+
+    def test_generate_stream_strips_fence_incrementally(self):
+        """测试流式生成逐块去除外层代码块标记，结果与一次性生成一致"""
+        chunks = ["```mark", "down\n", "# 测试项目\n\n", "```python\nprint(1)\n```", "\n完成\n``", "`\n"]
+        self.mock_instance.generate_readme_stream.return_value = iter(chunks)
+        
+        streamed = list(self.generator.generate_stream(self.test_repo_analysis))
+        
+        self.assertEqual("".join(streamed), "# 测试项目\n\n```python\nprint(1)\n```\n完成")
+        self.assertEqual(streamed[0], "# 测试项目")
+        
+        # 流式结果写入缓存，再次生成直接返回
+        self.assertEqual(self.generator.generate(self.test_repo_analysis), "".join(streamed))
+        self.mock_instance.generate_readme.assert_not_called()
+
+    def test_fence_stripping_matches_whole_content_rules(self):
+        """测试只在存在外层标记时去除首尾空白，流式结果与一次性处理在任意切分位置一致"""
+        cases = {
+            "```markdown\n# 项目\n\n内容\n```\n": "# 项目\n\n内容",
+            "```markdown\n# 项目\n": "# 项目",
+            "# 项目\n\n内容\n": "# 项目\n\n内容\n",
+            "# 项目\n```python\nx = 1\n```": "# 项目\n```python\nx = 1",
+            "\n  # 项目\n\n": "\n  # 项目\n\n",
+            "``": "``",
+            "```": "",
+        }
+        for content, expected in cases.items():
+            self.assertEqual(MarkdownFenceStripper.strip(content), expected)
+            for split in range(len(content) + 1):
+                stripper = MarkdownFenceStripper()
+                streamed = stripper.feed(content[:split]) + stripper.feed(content[split:]) + stripper.finish()
+                self.assertEqual(streamed, expected, f"{content!r} 在位置 {split} 切分")
+
+        # 没有外层标记时一次性生成的结果保持原样
+        self.mock_instance.generate_readme.return_value = "# 测试项目\n\n内容\n"
+        self.assertEqual(self.generator.generate(self.test_repo_analysis), "# 测试项目\n\n内容\n")
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,105 @@
+import os
+import shutil
+import zipfile
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.utils.file_handler import FileHandler
+from src.utils.code_parser import CodeParser
+from src.utils.zip_filesystem import ZipFileSystem, ZipLimitError
+
+class TestZipFileSystem(unittest.TestCase):
+    """测试ZipFileSystem类"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.zip_path = os.path.join(self.temp_dir, "repo.zip")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _create_zip(self, files):
+        with zipfile.ZipFile(self.zip_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, content in files.items():
+                zf.writestr(name, content)
+
+    def test_list_and_read_without_ignored_entries(self):
+        """测试单个顶层目录作为根目录，被忽略的条目不会被解压"""
+        self._create_zip({
+            "project/main.py": "print('hi')",
+            "project/src/app.py": "x = 1\n",
+            "project/node_modules/lib/index.js": "module.exports = {}",
+            "project/.env": "SECRET=1",
+            "../evil.py": "import os",
+        })
+
+        opened = []
+        original_open = zipfile.ZipFile.open
+
+        def tracking_open(zf, name, *args, **kwargs):
+            opened.append(getattr(name, "filename", name))
+            return original_open(zf, name, *args, **kwargs)
+
+        with patch.object(zipfile.ZipFile, "open", tracking_open):
+            with FileHandler.open_zip(self.zip_path, ignore_entry_func=CodeParser.should_ignore_entry) as zip_fs:
+                self.assertEqual(zip_fs.list_files(), ["main.py", "src/app.py"])
+                self.assertEqual(zip_fs.read_file("src/app.py"), "x = 1\n")
+                scan_result = zip_fs.scan()
+                with self.assertRaises(KeyError):
+                    zip_fs.read_file("node_modules/lib/index.js")
+
+        self.assertEqual(opened, ["project/src/app.py"])
+        self.assertEqual(scan_result["files"], ["main.py", "src/app.py"])
+        self.assertEqual(scan_result["sizes"]["main.py"], len("print('hi')"))
+        self.assertEqual(scan_result["structure"], {"name": "repo", "type": "directory", "children": [
+            {"name": "main.py", "type": "file"},
+            {"name": "src", "type": "directory", "children": [{"name": "app.py", "type": "file"}]},
+        ]})
+
+    def test_keeps_multiple_top_level_entries(self):
+        """测试有多个顶层条目时保持原有路径"""
+        self._create_zip({"main.py": "a", "pkg/util.py": "b", "build/out.py": "c"})
+
+        with ZipFileSystem(self.zip_path, ignore_entry_func=CodeParser.should_ignore_entry) as zip_fs:
+            self.assertEqual(zip_fs.list_files(), ["main.py", "pkg/util.py"])
+            self.assertEqual(zip_fs.read_file("pkg/util.py"), "b")
+            self.assertEqual(zip_fs.relpath("pkg/util.py"), os.path.join("pkg", "util.py"))
+
+    def test_rejects_zip_bomb_before_decompressing(self):
+        """测试声明的解压大小超出限制时在打开时即拒绝"""
+        self._create_zip({"a.txt": "0" * 10000, "b.txt": "0" * 10000})
+
+        with self.assertRaises(ZipLimitError):
+            ZipFileSystem(self.zip_path, max_entry_bytes=5000)
+        with self.assertRaises(ZipLimitError):
+            ZipFileSystem(self.zip_path, max_total_bytes=15000)
+        with self.assertRaises(ZipLimitError):
+            ZipFileSystem(self.zip_path, max_entries=1)
+
+        # 被忽略的条目不计入限制
+        with ZipFileSystem(self.zip_path, ignore_entry_func=lambda name, is_dir: name == "b.txt",
+                           max_total_bytes=15000) as zip_fs:
+            self.assertEqual(zip_fs.list_files(), ["a.txt"])
+
+    def test_rereading_files_within_total_limit(self):
+        """测试声明大小已通过限制检查时，分析过程中重复读取文件不会超出总大小限制"""
+        self._create_zip({"a.txt": "0" * 10000, "b.txt": "0" * 10000})
+
+        with ZipFileSystem(self.zip_path, max_total_bytes=20000) as zip_fs:
+            for _ in range(3):
+                self.assertEqual(len(zip_fs.read_bytes("a.txt")), 10000)
+                self.assertEqual(len(zip_fs.read_bytes("b.txt")), 10000)
+
+    def test_rejects_entry_larger_than_declared(self):
+        """测试实际解压大小超出条目头中声明的大小时拒绝读取"""
+        self._create_zip({"a.txt": "0" * 10000})
+
+        with ZipFileSystem(self.zip_path) as zip_fs:
+            with zip_fs._open_entry("a.txt") as source:
+                zip_fs.entries["a.txt"].file_size = 100
+                with self.assertRaises(ZipLimitError):
+                    list(zip_fs._iter_chunks("a.txt", source))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,6 +7,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config.config import Config
 from web.routes import register_routes
+from web.jobs import JobQueue
 
 def create_app():
     """创建并配置Flask应用"""
@@ -22,6 +23,13 @@ def create_app():
     os.makedirs(app.config["UPLOAD_FOLDER"], exist_ok=True)
     os.makedirs(app.config["GENERATE_FOLDER"], exist_ok=True)
     
+    # 后台README生成任务队列
+    app.extensions["job_queue"] = JobQueue(
+        max_workers=Config.WEB_JOB_WORKERS,
+        max_queued=Config.WEB_JOB_MAX_QUEUED,
+        retention=Config.WEB_JOB_RETENTION
+    )
+    
     # 注册路由
     register_routes(app)
     
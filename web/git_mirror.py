@@ -0,0 +1,246 @@
+import os
+import shutil
+import hashlib
+import logging
+import tarfile
+import tempfile
+import threading
+import subprocess
+from typing import Dict, Optional, List, Tuple
+
+from config.config import Config
+
+logger = logging.getLogger(__name__)
+
+class GitMirrorCache:
+    """
+    Git仓库的本地裸镜像缓存
+
+    每个远程仓库保存一个git clone --mirror得到的裸仓库，再次使用时只做增量fetch，
+    然后用git archive导出指定版本的文件；所有镜像的总大小超出上限时按最近使用时间淘汰。
+    """
+
+    # 记录镜像最近使用时间的文件
+    LAST_USED_FILE = "germ-last-used"
+
+    _shared_instance = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache_dir: str, max_bytes: int, timeout: float = 600):
+        """
+        初始化镜像缓存
+
+        Args:
+            cache_dir: 镜像存放目录
+            max_bytes: 所有镜像的总大小上限（字节）
+            timeout: 单个git命令的超时秒数
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+        self._evict_lock = threading.Lock()
+
+    @classmethod
+    def get_shared(cls) -> Optional["GitMirrorCache"]:
+        """
+        获取进程内共享的镜像缓存
+
+        Returns:
+            Optional[GitMirrorCache]: 镜像缓存，配置中禁用时返回None
+        """
+        if not Config.GIT_MIRROR_CACHE_ENABLED:
+            return None
+
+        with cls._shared_lock:
+            if cls._shared_instance is None:
+                cls._shared_instance = cls(Config.GIT_MIRROR_CACHE_DIR, Config.GIT_MIRROR_CACHE_MAX_BYTES)
+            return cls._shared_instance
+
+    def mirror_path(self, repo_url: str) -> str:
+        """获取远程仓库对应的镜像目录"""
+        repo_key = hashlib.sha256(repo_url.encode('utf-8')).hexdigest()[:16]
+        return os.path.join(self.cache_dir, f"{repo_key}.git")
+
+    def checkout(self, repo_url: str, output_dir: str, ref: str = "HEAD") -> str:
+        """
+        更新镜像并将指定版本的文件导出到输出目录（不包含.git）
+
+        Args:
+            repo_url: Git仓库URL，支持file://
+            output_dir: 输出目录
+            ref: 要导出的分支、标签或提交，默认为远程默认分支
+
+        Returns:
+            str: 导出的提交SHA
+
+        Raises:
+            subprocess.CalledProcessError: git命令失败时
+        """
+        mirror = self.mirror_path(repo_url)
+
+        with self._get_lock(mirror):
+            self._update(repo_url, mirror)
+            commit = self._git(mirror, "rev-parse", f"{ref}^{{commit}}").strip()
+            self._archive(mirror, commit, output_dir)
+            self._touch(mirror)
+
+        self.evict(keep=mirror)
+        return commit
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        镜像总大小超出上限时，按最近使用时间从旧到新删除镜像
+
+        Args:
+            keep: 不参与淘汰的镜像目录（通常是刚使用的镜像）
+        """
+        with self._evict_lock:
+            mirrors = self._list_mirrors()
+            total = sum(size for _, size, _ in mirrors)
+            if total <= self.max_bytes:
+                return
+
+            for path, size, _ in sorted(mirrors, key=lambda item: item[2]):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                with self._get_lock(path):
+                    shutil.rmtree(path, ignore_errors=True)
+                total -= size
+                logger.info(f"镜像缓存超出上限，已删除 {path}（{size} 字节）")
+
+    def _update(self, repo_url: str, mirror: str) -> None:
+        """已有镜像时增量fetch，否则新建镜像，调用方需持有该镜像的锁"""
+        if os.path.isdir(mirror):
+            logger.info(f"增量更新Git镜像: {repo_url}")
+            try:
+                self._git(mirror, "fetch", "--prune", "--tags", "origin")
+                return
+            except subprocess.CalledProcessError as e:
+                # 镜像损坏时重新克隆
+                logger.warning(f"增量更新镜像失败，重新克隆: {e.stderr}")
+                shutil.rmtree(mirror, ignore_errors=True)
+
+        logger.info(f"创建Git镜像: {repo_url}")
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            self._run(["git", "clone", "--mirror", "--quiet", repo_url, tmp_dir])
+            os.replace(tmp_dir, mirror)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+    def _archive(self, mirror: str, commit: str, output_dir: str) -> None:
+        """用git archive导出提交的文件并流式解包到输出目录"""
+        os.makedirs(output_dir, exist_ok=True)
+        # stderr写入临时文件，避免在读取stdout期间git因stderr管道写满而阻塞
+        with tempfile.TemporaryFile() as stderr_file:
+            process = subprocess.Popen(
+                ["git", "--git-dir", mirror, "archive", "--format=tar", commit],
+                stdout=subprocess.PIPE,
+                stderr=stderr_file
+            )
+            archive_error = None
+            try:
+                with tarfile.open(fileobj=process.stdout, mode="r|") as archive:
+                    for member in archive:
+                        if self._is_safe_member(member, output_dir):
+                            self._extract_member(archive, member, output_dir)
+                        else:
+                            logger.warning(f"跳过归档中的不安全条目: {member.name}")
+            except tarfile.TarError as e:
+                # git失败时输出为空或不完整，优先报告git的错误
+                archive_error = e
+            finally:
+                process.stdout.close()
+                returncode = process.wait(timeout=self.timeout)
+
+            if returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", errors="replace")
+                raise subprocess.CalledProcessError(returncode, "git archive", stderr=stderr)
+            if archive_error is not None:
+                raise archive_error
+
+    @staticmethod
+    def _is_safe_member(member: tarfile.TarInfo, output_dir: str) -> bool:
+        """只允许解包到输出目录内的普通文件、目录和不指向目录外的符号链接"""
+        if not (member.isfile() or member.isdir() or member.issym()):
+            return False
+
+        root = os.path.realpath(output_dir)
+        target = os.path.realpath(os.path.join(root, member.name))
+        if os.path.isabs(member.name) or os.path.commonpath([root, target]) != root:
+            return False
+
+        if member.issym():
+            link_target = os.path.realpath(os.path.join(os.path.dirname(target), member.linkname))
+            if os.path.isabs(member.linkname) or os.path.commonpath([root, link_target]) != root:
+                return False
+        return True
+
+    @staticmethod
+    def _extract_member(archive: tarfile.TarFile, member: tarfile.TarInfo, output_dir: str) -> None:
+        """解包单个条目，支持时使用tarfile的data过滤器（Python 3.12及安全补丁版本）"""
+        if hasattr(tarfile, "data_filter"):
+            archive.extract(member, output_dir, filter="data")
+        else:
+            # 去除setuid等特殊权限位，与data过滤器一致
+            member.mode &= 0o755
+            archive.extract(member, output_dir)
+
+    def _list_mirrors(self) -> List[Tuple[str, int, float]]:
+        """列出所有镜像及其大小和最近使用时间"""
+        if not os.path.isdir(self.cache_dir):
+            return []
+
+        mirrors = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if not name.endswith(".git") or not os.path.isdir(path):
+                continue
+            size = 0
+            for root, _, files in os.walk(path):
+                for file_name in files:
+                    try:
+                        size += os.path.getsize(os.path.join(root, file_name))
+                    except OSError:
+                        pass
+            try:
+                last_used = os.path.getmtime(os.path.join(path, self.LAST_USED_FILE))
+            except OSError:
+                last_used = 0.0
+            mirrors.append((path, size, last_used))
+        return mirrors
+
+    def _touch(self, mirror: str) -> None:
+        """刷新镜像的最近使用时间"""
+        with open(os.path.join(mirror, self.LAST_USED_FILE), "w"):
+            pass
+
+    def _get_lock(self, mirror: str) -> threading.Lock:
+        """获取镜像对应的锁，同一镜像的更新、导出和删除互斥"""
+        with self._locks_lock:
+            if mirror not in self._locks:
+                self._locks[mirror] = threading.Lock()
+            return self._locks[mirror]
+
+    def _git(self, mirror: str, *args: str) -> str:
+        """在镜像上执行git命令并返回标准输出"""
+        return self._run(["git", "--git-dir", mirror, *args])
+
+    def _run(self, command: List[str]) -> str:
+        """执行命令，失败时抛出CalledProcessError"""
+        result = subprocess.run(
+            command,
+            check=True,
+            capture_output=True,
+            text=True,
+            timeout=self.timeout,
+            env={**os.environ, "GIT_TERMINAL_PROMPT": "0"}
+        )
+        return result.stdout
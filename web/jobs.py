@@ -0,0 +1,275 @@
+import time
+import uuid
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFullError(Exception):
+    """排队任务数达到上限时拒绝提交抛出的异常"""
+
+
+class Job:
+    """后台README生成任务，记录状态、各阶段耗时和供SSE推送的进度事件"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, job_id: str):
+        """
+        初始化任务
+
+        Args:
+            job_id: 任务ID
+        """
+        self.id = job_id
+        self.status = self.QUEUED
+        self.stage = None
+        self.error = None
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.timings = {}
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Condition()
+
+    @contextmanager
+    def track(self, stage: str):
+        """
+        记录一个处理阶段的耗时
+
+        Args:
+            stage: 阶段名称
+        """
+        with self._lock:
+            self.stage = stage
+        self.publish("stage", {"stage": stage})
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.timings[stage] = round(time.monotonic() - started, 3)
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """
+        发布一条进度事件并唤醒等待中的订阅者
+
+        Args:
+            event: 事件类型，如stage、progress、readme、done、failed
+            data: 事件数据
+        """
+        with self._lock:
+            self.events.append({"id": len(self.events), "event": event, "data": data})
+            self._lock.notify_all()
+
+    def wait_events(self, since: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        获取指定序号之后的事件，暂无新事件时最多等待timeout秒
+
+        Args:
+            since: 已收到的事件数（即下一条事件的序号）
+            timeout: 最长等待秒数
+
+        Returns:
+            Tuple[List[Dict[str, Any]], bool]: 新事件列表，以及任务是否已结束
+        """
+        with self._lock:
+            if len(self.events) <= since and self.finished_at is None:
+                self._lock.wait(timeout)
+            return self.events[since:], self.finished_at is not None
+
+    def mark_running(self) -> None:
+        """标记任务开始执行"""
+        with self._lock:
+            self.status = self.RUNNING
+            self.started_at = time.time()
+
+    def mark_finished(self, result: Any = None, error: Optional[str] = None) -> None:
+        """
+        标记任务结束
+
+        Args:
+            result: 任务结果
+            error: 错误信息，不为None时任务标记为失败
+        """
+        with self._lock:
+            self.status = self.FAILED if error is not None else self.DONE
+            self.result = result
+            self.error = error
+            self.stage = None
+            self.finished_at = time.time()
+            # 在同一把锁内发布结束事件，订阅者看到任务结束时一定已能读到该事件
+            if error is not None:
+                self.publish("failed", {"error": error})
+            else:
+                self.publish("done", {"result": result})
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        获取任务状态，用于状态接口
+
+        Returns:
+            Dict[str, Any]: 状态、当前阶段、错误信息、排队和运行耗时以及各阶段耗时
+        """
+        with self._lock:
+            now = time.time()
+            queued_until = self.started_at or now
+            data = {
+                "job_id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "error": self.error,
+                "created_at": self.created_at,
+                "queue_seconds": round(queued_until - self.created_at, 3),
+                "run_seconds": round((self.finished_at or now) - self.started_at, 3) if self.started_at else None,
+                "timings": dict(self.timings),
+            }
+        return data
+
+
+class JobQueue:
+    """
+    有界后台任务队列
+
+    任务由固定大小的线程池执行，排队中的任务数超过上限时拒绝提交；
+    相同去重键的任务在执行期间只运行一次（single-flight）；
+    已结束的任务保留一段时间供状态查询，之后自动清理。
+    """
+
+    def __init__(self, max_workers: int, max_queued: int, retention: float):
+        """
+        初始化任务队列
+
+        Args:
+            max_workers: 同时执行的任务数
+            max_queued: 排队中（尚未开始）的任务数上限
+            retention: 已结束任务的保留秒数
+        """
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.retention = retention
+        self.jobs: Dict[str, Job] = {}
+        self.inflight: Dict[str, Job] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="germ-job")
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        提交任务，func的第一个参数为Job对象，返回值保存为任务结果
+
+        Args:
+            func: 任务函数
+            *args: 传给任务函数的其他参数
+            **kwargs: 传给任务函数的关键字参数
+
+        Returns:
+            Job: 新建的任务
+
+        Raises:
+            JobQueueFullError: 排队任务数达到上限时
+        """
+        job, _ = self.submit_once(None, func, *args, **kwargs)
+        return job
+
+    def submit_once(self, dedupe_key: Optional[str], func: Callable[..., Any], *args, **kwargs) -> Tuple[Job, bool]:
+        """
+        提交任务，已有相同去重键的任务在排队或执行中时直接返回该任务
+
+        Args:
+            dedupe_key: 去重键，None表示不去重
+            func: 任务函数，第一个参数为Job对象
+            *args: 传给任务函数的其他参数
+            **kwargs: 传给任务函数的关键字参数
+
+        Returns:
+            Tuple[Job, bool]: 任务，以及是否新建了任务（False表示复用了进行中的任务）
+
+        Raises:
+            JobQueueFullError: 需要新建任务但排队任务数达到上限时
+        """
+        with self._lock:
+            self._prune()
+            existing = self.inflight.get(dedupe_key) if dedupe_key is not None else None
+            if existing is not None:
+                logger.info(f"相同内容的任务 {existing.id} 正在进行，复用该任务")
+                return existing, False
+
+            if self._count(Job.QUEUED) >= self.max_queued:
+                raise JobQueueFullError(f"当前排队任务已达上限 {self.max_queued}，请稍后再试")
+            job = Job(str(uuid.uuid4()))
+            self.jobs[job.id] = job
+            if dedupe_key is not None:
+                self.inflight[dedupe_key] = job
+
+        self._executor.submit(self._run, job, dedupe_key, func, args, kwargs)
+        logger.info(f"已提交任务 {job.id}，当前排队 {self.stats()['queued']} 个")
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        获取任务
+
+        Args:
+            job_id: 任务ID
+
+        Returns:
+            Optional[Job]: 任务，不存在或已被清理时返回None
+        """
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取队列状态，用于监控
+
+        Returns:
+            Dict[str, Any]: 各状态的任务数、工作线程数和排队上限
+        """
+        with self._lock:
+            return {
+                "queued": self._count(Job.QUEUED),
+                "running": self._count(Job.RUNNING),
+                "done": self._count(Job.DONE),
+                "failed": self._count(Job.FAILED),
+                "workers": self.max_workers,
+                "max_queued": self.max_queued,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        """关闭线程池"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, dedupe_key: Optional[str], func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        """在工作线程中执行任务并记录结果"""
+        job.mark_running()
+        try:
+            result = func(job, *args, **kwargs)
+        except Exception as e:
+            logger.error(f"任务 {job.id} 失败: {str(e)}", exc_info=True)
+            job.mark_finished(error=str(e))
+        else:
+            job.mark_finished(result=result)
+        finally:
+            if dedupe_key is not None:
+                with self._lock:
+                    if self.inflight.get(dedupe_key) is job:
+                        del self.inflight[dedupe_key]
+        logger.info(f"任务 {job.id} 结束，状态: {job.status}，各阶段耗时: {job.timings}")
+
+    def _count(self, status: str) -> int:
+        """统计指定状态的任务数，调用方需持有锁"""
+        return sum(1 for job in self.jobs.values() if job.status == status)
+
+    def _prune(self) -> None:
+        """清理超过保留时间的已结束任务，调用方需持有锁"""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self.jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self.jobs[job_id]
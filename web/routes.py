@@ -1,22 +1,147 @@
 import os
-import uuid
+import json
+import hashlib
 import shutil
 import tempfile
 import logging
+from typing import Tuple, Optional
 from flask import (
     render_template, request, redirect, url_for, flash, 
-    current_app, jsonify, send_from_directory, abort
+    current_app, jsonify, send_from_directory, abort,
+    Response, stream_with_context
 )
 import markdown
 from werkzeug.utils import secure_filename
 
 from src.services.code_analyzer import CodeAnalyzer
 from src.services.readme_generator import ReadmeGenerator
+from src.models.agent import ReadmeAgent
+from config.config import Config
 from web.forms import UploadRepoForm
-from web.utils import extract_zip_file, clone_git_repo
+from web.utils import open_zip_source, clone_git_repo, save_upload_with_hash, resolve_git_commit
+from src.utils.prompt_templates import PromptTemplates
+from web.jobs import Job, JobQueueFullError
 
 logger = logging.getLogger(__name__)
 
+def run_generation_job(
+    job: Job,
+    temp_dir: str,
+    source: Tuple[str, str],
+    generate_folder: str,
+    generation_id: Optional[str] = None
+) -> str:
+    """
+    在后台线程中准备仓库、分析代码并生成README
+    
+    Args:
+        job: 当前任务
+        temp_dir: 本次生成使用的临时目录，任务结束后删除
+        source: 仓库来源，("zip", ZIP文件路径) 或 ("git", 仓库URL)
+        generate_folder: 生成结果的存放目录
+        generation_id: 生成ID；Git仓库为None时按当前提交计算，无法查询提交时使用任务ID
+        
+    Returns:
+        str: 生成ID，用于预览和下载
+    """
+    repo_source = None
+    try:
+        with job.track("extract"):
+            source_type, location = source
+            if source_type == "zip":
+                # 直接在ZIP中分析而不解压，超出限制等错误原样报告给任务
+                repo_path = location
+                repo_source = open_zip_source(location)
+            else:
+                # 在后台查询当前提交并导出该提交，保证生成ID与内容一致
+                repo_path = os.path.join(temp_dir, "repo")
+                commit = resolve_git_commit(location)
+                if commit and generation_id is None:
+                    generation_id = _get_generation_id(f"git:{location}@{commit}")
+                    if os.path.exists(os.path.join(generate_folder, generation_id, "README.md")):
+                        logger.info(f"相同提交已生成过README，复用结果 {generation_id}")
+                        return generation_id
+                # 检查是否成功克隆仓库
+                if not clone_git_repo(location, repo_path, ref=commit) or not os.listdir(repo_path):
+                    raise ValueError("无法处理提供的仓库，请确保格式正确")
+        
+        generation_id = generation_id or job.id
+        
+        # 分析代码仓库（分析与生成共用一个Agent及其共享连接池客户端）
+        # 仓库每次都位于新的临时路径，文件清单不会被再次读取，因此不使用增量分析；未变化文件的LLM结果仍由分析缓存复用
+        agent = ReadmeAgent()
+        with job.track("analyze"):
+            code_analyzer = CodeAnalyzer(
+                repo_path,
+                agent=agent,
+                progress_callback=lambda stage, info: job.publish("progress", {"stage": stage, **info}),
+                source=repo_source,
+                incremental=False
+            )
+            repo_analysis = code_analyzer.analyze()
+        
+        # 流式生成README内容，每个片段作为事件推送给订阅者
+        with job.track("generate"):
+            readme_generator = ReadmeGenerator(agent=agent)
+            parts = []
+            for chunk in readme_generator.generate_stream(repo_analysis):
+                parts.append(chunk)
+                job.publish("readme", {"text": chunk})
+            readme_content = "".join(parts)
+        
+        # 保存仓库名称和生成的README，README最后原子写入，存在即表示结果完整
+        output_dir = os.path.join(generate_folder, generation_id)
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "repo_info.txt"), "w", encoding="utf-8") as f:
+            f.write(repo_analysis.get("repo_name", "未知项目"))
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix='.tmp')
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(readme_content)
+        os.replace(tmp_path, os.path.join(output_dir, "README.md"))
+        
+        return generation_id
+    
+    finally:
+        if repo_source is not None:
+            repo_source.close()
+        
+        # 清理临时目录
+        try:
+            shutil.rmtree(temp_dir)
+        except Exception as e:
+            logger.warning(f"清理临时目录时出错: {str(e)}")
+
+def _get_generation_id(source_key: str) -> str:
+    """
+    根据仓库内容标识和影响生成结果的配置计算生成ID，相同输入得到相同ID
+    
+    Args:
+        source_key: 仓库内容标识（ZIP内容哈希或URL加提交SHA；只有URL时用作进行中任务的去重键）
+        
+    Returns:
+        str: 生成ID
+    """
+    key_source = json.dumps({
+        "source": source_key,
+        "system_prompt": Config.SYSTEM_PROMPT,
+        "prompt_template": PromptTemplates.get_readme_generation_prompt({}),
+        "model": Config.OPENAI_MODEL,
+        "temperature": Config.TEMPERATURE,
+        "max_tokens": Config.MAX_TOKENS,
+        "token_budget": Config.README_PROMPT_TOKEN_BUDGET,
+        "sections": PromptTemplates.README_SECTIONS if Config.README_SECTION_PARALLEL else None,
+        "section_max_tokens": Config.README_SECTION_MAX_TOKENS if Config.README_SECTION_PARALLEL else None,
+        "analysis_model": Config.ANALYSIS_MODEL,
+        "analysis_temperature": Config.ANALYSIS_TEMPERATURE,
+        "analysis_max_tokens": Config.ANALYSIS_MAX_TOKENS,
+        "prompt_version": PromptTemplates.FILE_ANALYSIS_PROMPT_VERSION,
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(key_source.encode('utf-8')).hexdigest()[:32]
+
+def _wants_json() -> bool:
+    """请求方是否期望JSON响应（API调用）而不是页面"""
+    return request.accept_mimetypes.best == 'application/json'
+
 def register_routes(app):
     """注册应用路由"""
     
@@ -28,7 +153,7 @@ def register_routes(app):
     
     @app.route('/generate', methods=['POST'])
     def generate():
-        """处理仓库上传并生成README"""
+        """处理仓库上传并提交后台README生成任务"""
         form = UploadRepoForm()
         
         if not form.validate_on_submit():
@@ -37,76 +162,145 @@ def register_routes(app):
                     flash(f"错误: {getattr(form, field).label.text} - {error}", "danger")
             return redirect(url_for('index'))
         
-        # 创建唯一ID用于本次生成
-        generation_id = str(uuid.uuid4())
+        # 创建临时目录
+        temp_dir = tempfile.mkdtemp()
         
         try:
-            # 创建临时目录
-            temp_dir = tempfile.mkdtemp()
-            
-            # 上传方式：文件上传
+            # 上传方式：文件上传（上传的文件只能在请求内保存，分析在后台进行）
+            # 边写入磁盘边计算哈希，相同内容的ZIP得到相同的生成ID
             if form.repo_upload.data:
                 zip_file = form.repo_upload.data
                 zip_path = os.path.join(temp_dir, secure_filename(zip_file.filename))
-                zip_file.save(zip_path)
-                
-                # 解压缩文件
-                repo_dir = os.path.join(temp_dir, "repo")
-                os.makedirs(repo_dir, exist_ok=True)
-                extract_zip_file(zip_path, repo_dir)
+                content_hash = save_upload_with_hash(zip_file, zip_path)
+                source = ("zip", zip_path)
+                generation_id = _get_generation_id(f"zip:{content_hash}")
+                dedupe_key = generation_id
                 
-            # 上传方式：Git URL
+            # 上传方式：Git URL（请求中不访问网络，进行中的任务按URL去重，
+            # 提交在后台任务中查询，已生成过的提交在任务中直接复用结果）
             elif form.repo_url.data:
                 repo_url = form.repo_url.data
-                repo_dir = os.path.join(temp_dir, "repo")
-                clone_git_repo(repo_url, repo_dir)
+                source = ("git", repo_url)
+                generation_id = None
+                dedupe_key = _get_generation_id(f"git:{repo_url}")
             
             else:
+                shutil.rmtree(temp_dir, ignore_errors=True)
                 flash("请提供代码仓库（ZIP文件或Git URL）", "danger")
                 return redirect(url_for('index'))
             
-            # 检查是否成功提取/克隆仓库
-            if not os.path.exists(repo_dir) or not os.listdir(repo_dir):
-                flash("无法处理提供的仓库，请确保格式正确", "danger")
-                return redirect(url_for('index'))
-            
-            # 创建输出目录
-            output_dir = os.path.join(current_app.config["GENERATE_FOLDER"], generation_id)
-            os.makedirs(output_dir, exist_ok=True)
+            # 已生成过相同内容的README时直接返回已保存的结果
+            generate_folder = current_app.config["GENERATE_FOLDER"]
+            if generation_id and os.path.exists(os.path.join(generate_folder, generation_id, "README.md")):
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                logger.info(f"相同仓库已生成过README，复用结果 {generation_id}")
+                preview_url = url_for('preview', generation_id=generation_id)
+                if _wants_json():
+                    return jsonify({"generation_id": generation_id, "preview_url": preview_url})
+                return redirect(preview_url)
             
-            # 分析代码仓库
-            code_analyzer = CodeAnalyzer(repo_dir)
-            repo_analysis = code_analyzer.analyze()
-            
-            # 生成README内容
-            readme_generator = ReadmeGenerator()
-            readme_content = readme_generator.generate(repo_analysis)
-            
-            # 保存生成的README
-            readme_path = os.path.join(output_dir, "README.md")
-            with open(readme_path, "w", encoding="utf-8") as f:
-                f.write(readme_content)
-            
-            # 保存仓库名称以便显示
-            repo_name = repo_analysis.get("repo_name", "未知项目")
-            repo_info_path = os.path.join(output_dir, "repo_info.txt")
-            with open(repo_info_path, "w", encoding="utf-8") as f:
-                f.write(repo_name)
-            
-            # 重定向到预览页面
-            return redirect(url_for('preview', generation_id=generation_id))
+            # 相同内容的任务正在进行时复用该任务
+            job, created = current_app.extensions["job_queue"].submit_once(
+                dedupe_key,
+                run_generation_job,
+                temp_dir,
+                source,
+                generate_folder,
+                generation_id=generation_id
+            )
+            if not created:
+                shutil.rmtree(temp_dir, ignore_errors=True)
             
+        except JobQueueFullError as e:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            if _wants_json():
+                return jsonify({"error": str(e)}), 503
+            flash(str(e), "warning")
+            return redirect(url_for('index'))
+        
         except Exception as e:
-            logger.error(f"生成README时出错: {str(e)}", exc_info=True)
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            logger.error(f"提交README生成任务时出错: {str(e)}", exc_info=True)
             flash(f"生成README时发生错误: {str(e)}", "danger")
             return redirect(url_for('index'))
         
-        finally:
-            # 清理临时目录
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception as e:
-                logger.warning(f"清理临时目录时出错: {str(e)}")
+        # 立即返回任务ID，由任务页面轮询状态
+        if _wants_json():
+            return jsonify({
+                "job_id": job.id,
+                "status_url": url_for('job_status', job_id=job.id)
+            }), 202
+        return redirect(url_for('job_page', job_id=job.id))
+    
+    @app.route('/jobs/<job_id>')
+    def job_page(job_id):
+        """任务进度页面，任务完成后跳转到预览页面"""
+        job = current_app.extensions["job_queue"].get(job_id)
+        if job is None:
+            flash("找不到指定的生成任务", "danger")
+            return redirect(url_for('index'))
+        
+        if job.status == Job.DONE:
+            return redirect(url_for('preview', generation_id=job.result))
+        if job.status == Job.FAILED:
+            flash(f"生成README时发生错误: {job.error}", "danger")
+            return redirect(url_for('index'))
+        
+        return render_template('generate.html', job=job.to_dict())
+    
+    @app.route('/jobs/<job_id>/status')
+    def job_status(job_id):
+        """查询任务状态和各阶段耗时"""
+        job = current_app.extensions["job_queue"].get(job_id)
+        if job is None:
+            return jsonify({"error": "找不到指定的生成任务"}), 404
+        
+        data = job.to_dict()
+        if job.status == Job.DONE:
+            data["preview_url"] = url_for('preview', generation_id=job.result)
+        return jsonify(data)
+    
+    @app.route('/jobs/<job_id>/events')
+    def job_events(job_id):
+        """以SSE推送任务的阶段切换、文件分析进度和README生成片段"""
+        job = current_app.extensions["job_queue"].get(job_id)
+        if job is None:
+            return jsonify({"error": "找不到指定的生成任务"}), 404
+        
+        # 断线重连时从Last-Event-ID之后继续推送
+        last_event_id = request.headers.get("Last-Event-ID", "")
+        since = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+        heartbeat = Config.WEB_SSE_HEARTBEAT
+        
+        def stream():
+            nonlocal since
+            while True:
+                events, finished = job.wait_events(since, heartbeat)
+                if not events and not finished:
+                    # 保持连接，避免被代理断开
+                    yield ": keep-alive\n\n"
+                    continue
+                
+                for event in events:
+                    data = dict(event["data"])
+                    if event["event"] == "done":
+                        data["preview_url"] = url_for('preview', generation_id=data.pop("result"))
+                    yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                since += len(events)
+                
+                if finished and since >= len(job.events):
+                    return
+        
+        return Response(
+            stream_with_context(stream()),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+    
+    @app.route('/jobs/stats')
+    def job_stats():
+        """查询任务队列深度"""
+        return jsonify(current_app.extensions["job_queue"].stats())
     
     @app.route('/preview/<generation_id>')
     def preview(generation_id):
@@ -1,55 +1,76 @@
 import os
-import zipfile
+import hashlib
 import subprocess
 import logging
 import shutil
+import zipfile
 from typing import Optional
 
+from config.config import Config
+from src.utils.file_handler import FileHandler
+from src.utils.code_parser import CodeParser
+from src.utils.zip_filesystem import ZipFileSystem
+from web.git_mirror import GitMirrorCache
+
 logger = logging.getLogger(__name__)
 
-def extract_zip_file(zip_path: str, output_dir: str) -> bool:
+def open_zip_source(zip_path: str) -> ZipFileSystem:
     """
-    解压ZIP文件到指定目录
+    打开上传的ZIP文件作为仓库来源，直接在ZIP中分析而不解压到磁盘
+    
+    只有一个顶层目录时直接以其内容作为仓库根目录；被忽略的文件（如node_modules、build）
+    在读取中央目录时即被过滤，不会被解压；超出大小限制的ZIP文件会被拒绝。
     
     Args:
         zip_path: ZIP文件路径
-        output_dir: 输出目录
         
     Returns:
-        bool: 是否成功解压
+        ZipFileSystem: ZIP仓库来源，使用完毕后需关闭
+        
+    Raises:
+        ZipLimitError: 条目数或解压后大小超出限制时
+        ValueError: 文件不是有效的ZIP文件或不包含可分析的文件时
     """
     try:
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            zip_ref.extractall(output_dir)
-        
-        # 检查是否解压出单个目录
-        contents = os.listdir(output_dir)
-        if len(contents) == 1 and os.path.isdir(os.path.join(output_dir, contents[0])):
-            # 如果是单个目录，将其内容移动到输出目录
-            inner_dir = os.path.join(output_dir, contents[0])
-            for item in os.listdir(inner_dir):
-                shutil.move(
-                    os.path.join(inner_dir, item),
-                    os.path.join(output_dir, item)
-                )
-            os.rmdir(inner_dir)
-        
-        return True
-    except Exception as e:
-        logger.error(f"解压ZIP文件失败: {str(e)}")
-        return False
+        zip_fs = FileHandler.open_zip(
+            zip_path,
+            ignore_entry_func=CodeParser.should_ignore_entry,
+            max_entry_bytes=Config.ZIP_MAX_ENTRY_BYTES,
+            max_total_bytes=Config.ZIP_MAX_TOTAL_BYTES,
+            max_entries=Config.ZIP_MAX_ENTRIES
+        )
+    except zipfile.BadZipFile as e:
+        logger.error(f"打开ZIP文件失败: {str(e)}")
+        raise ValueError("上传的文件不是有效的ZIP文件") from e
+    
+    if not zip_fs.list_files():
+        zip_fs.close()
+        raise ValueError("无法处理提供的仓库，ZIP文件中没有可分析的文件")
+    return zip_fs
 
-def clone_git_repo(repo_url: str, output_dir: str) -> bool:
+def clone_git_repo(repo_url: str, output_dir: str, ref: Optional[str] = None) -> bool:
     """
     克隆Git仓库到指定目录
     
     Args:
         repo_url: Git仓库URL
         output_dir: 输出目录
+        ref: 要导出的提交SHA，默认为远程默认分支的最新提交
         
     Returns:
-        bool: 是否成功克隆
+        bool: 是否成功克隆；失败时输出目录会被删除
     """
+    # 优先通过本地镜像缓存导出，镜像不可用时退回浅克隆
+    mirror_cache = GitMirrorCache.get_shared()
+    if mirror_cache is not None:
+        try:
+            commit = mirror_cache.checkout(repo_url, output_dir, ref=ref or "HEAD")
+            logger.info(f"已从镜像缓存导出 {repo_url}@{commit}")
+            return True
+        except Exception as e:
+            logger.warning(f"从镜像缓存导出仓库失败，改为直接克隆: {str(e)}")
+            shutil.rmtree(output_dir, ignore_errors=True)
+    
     try:
         # 执行git clone命令
         subprocess.run(
@@ -58,6 +79,18 @@ def clone_git_repo(repo_url: str, output_dir: str) -> bool:
             capture_output=True
         )
         
+        # 默认分支已指向其他提交时，单独获取指定的提交
+        if ref:
+            head = subprocess.run(
+                ["git", "-C", output_dir, "rev-parse", "HEAD"],
+                check=True,
+                capture_output=True,
+                text=True
+            ).stdout.strip()
+            if head != ref:
+                subprocess.run(["git", "-C", output_dir, "fetch", "--depth=1", "origin", ref], check=True, capture_output=True)
+                subprocess.run(["git", "-C", output_dir, "checkout", "-q", "FETCH_HEAD"], check=True, capture_output=True)
+        
         # 删除.git目录以减小大小
         git_dir = os.path.join(output_dir, ".git")
         if os.path.exists(git_dir):
@@ -66,8 +99,61 @@ def clone_git_repo(repo_url: str, output_dir: str) -> bool:
         return True
     except Exception as e:
         logger.error(f"克隆Git仓库失败: {str(e)}")
+        # 删除不完整或不是指定提交的内容，避免被当作该提交分析
+        shutil.rmtree(output_dir, ignore_errors=True)
         return False
 
+def save_upload_with_hash(file_storage, output_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """
+    分块保存上传的文件，同时计算内容哈希
+    
+    Args:
+        file_storage: 上传的文件对象（werkzeug FileStorage）
+        output_path: 保存路径
+        chunk_size: 每次读取的字节数
+        
+    Returns:
+        str: 文件内容的sha256十六进制哈希
+    """
+    digest = hashlib.sha256()
+    with open(output_path, 'wb') as f:
+        while True:
+            chunk = file_storage.stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+            f.write(chunk)
+    return digest.hexdigest()
+
+def resolve_git_commit(repo_url: str, timeout: float = 30) -> Optional[str]:
+    """
+    查询远程仓库默认分支当前指向的提交
+    
+    Args:
+        repo_url: Git仓库URL
+        timeout: 超时秒数
+        
+    Returns:
+        Optional[str]: 提交SHA，查询失败时返回None
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-remote", repo_url, "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+    except Exception as e:
+        logger.warning(f"查询远程仓库提交失败: {str(e)}")
+        return None
+    
+    for line in result.stdout.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[1] == "HEAD":
+            return parts[0]
+    return None
+
 def sanitize_filename(filename: str) -> str:
     """
     清理文件名，确保安全